@@ -0,0 +1,133 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_outage(result: Dict[str, Any]) -> bool:
+    """
+    Whether an API result points at the endpoint being unavailable: a connection
+    failure, a server error or exhausted rate limit retries. Other client errors
+    (bad request, auth) say nothing about the endpoint's health.
+    """
+    if "error" not in result:
+        return False
+    status_code = result.get("status_code")
+    return status_code is None or status_code == 429 or status_code >= 500
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one provider endpoint. After `failure_threshold` consecutive
+    outage results the circuit opens and calls fail immediately instead of waiting
+    out retries. After `recovery_timeout` seconds one probe request is let through
+    (half open); its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        """
+        :param name: Endpoint name, used for logging
+        :param failure_threshold: Consecutive failures after which the circuit opens
+        :param recovery_timeout: Seconds the circuit stays open before a probe is allowed
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == OPEN
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now. In half open state only one probe is let through."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    return False
+                self._state = HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record(self, result: Dict[str, Any]):
+        """Update the circuit from the result of a request it allowed."""
+        if is_outage(result):
+            self.record_failure()
+        elif "error" not in result:
+            self.record_success()
+        else:
+            with self._lock:
+                self._probing = False
+
+    def release(self):
+        """Give up a request it allowed without a result (e.g. cancelled), freeing the probe."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                print(f"Circuit breaker ({self.name}): closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    print(f"Circuit breaker ({self.name}): open for {self.recovery_timeout} seconds")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(endpoint: str) -> CircuitBreaker:
+    """Get the process-wide circuit breaker of an endpoint URL, creating it with default settings."""
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(endpoint)
+                _breakers[endpoint] = breaker
+    return breaker
+
+
+def configure_circuit_breaker(
+    endpoint: str,
+    failure_threshold: Optional[int] = None,
+    recovery_timeout: Optional[float] = None,
+) -> CircuitBreaker:
+    """Override the thresholds of an endpoint's circuit breaker."""
+    breaker = get_circuit_breaker(endpoint)
+    if failure_threshold is not None:
+        breaker.failure_threshold = failure_threshold
+    if recovery_timeout is not None:
+        breaker.recovery_timeout = recovery_timeout
+    return breaker
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+DAY = 24 * 60 * 60
+
+
+def payload_key(endpoint: str, payload: Dict[str, Any]) -> str:
+    """Canonical content hash of a request: same endpoint + same payload -> same key."""
+    canonical = json.dumps(
+        {"endpoint": endpoint, "payload": payload},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent, content-addressed cache of successful LLM API responses, stored in a
+    SQLite file. Entries expire after a per-API TTL and the least recently used
+    entries are evicted once the cache grows past `max_bytes`.
+
+    Opt in by assigning an instance to the `cache` attribute of an API class or client:
+
+        ThreadedPerplexitySonarAPI.cache = ResponseCache("responses.sqlite")
+        ThreadedChatGPTAPI.cache = ResponseCache("responses.sqlite", ttls={"ChatGPTEthGenAPI": 90 * DAY})
+    """
+
+    def __init__(
+        self,
+        path: str = "masontilutils_cache.sqlite",
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 30 * DAY,
+        max_bytes: int = 512 * 1024 * 1024,
+    ):
+        """
+        :param path: SQLite file to store responses in
+        :param ttls: Seconds to keep responses for, keyed by API class name (e.g. "PerplexityExecutiveAPI")
+        :param default_ttl: Seconds to keep responses of APIs missing from `ttls`
+        :param max_bytes: Size of stored (compressed) responses above which LRU entries are evicted
+        """
+        self.path = path
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " api TEXT NOT NULL,"
+            " expires REAL NOT NULL,"
+            " accessed REAL NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " body BLOB NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def ttl(self, api: str) -> float:
+        return self.ttls.get(api, self.default_ttl)
+
+    def get(self, api: str, endpoint: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the cached response for this request, or None on a miss."""
+        key = payload_key(endpoint, payload)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._delete(key)
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, api: str, endpoint: str, payload: Dict[str, Any], response: Dict[str, Any]):
+        """Store a successful response. Error responses are never cached."""
+        if "error" in response:
+            return
+        key = payload_key(endpoint, payload)
+        body = zlib.compress(json.dumps(response, separators=(",", ":")).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, api, expires, accessed, size, body) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, api, now + self.ttl(api), now, len(body), body)
+            )
+            self._total_bytes += len(body) - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _delete(self, key: str):
+        row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._total_bytes -= row[0]
+        self._conn.commit()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until 90% of max_bytes."""
+        self._conn.execute("DELETE FROM responses WHERE expires < ?", (time.time(),))
+        target = int(self.max_bytes * 0.9)
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > target:
+            cutoff = self._conn.execute(
+                "SELECT accessed FROM ("
+                " SELECT accessed, SUM(size) OVER (ORDER BY accessed DESC) AS kept FROM responses"
+                ") WHERE kept > ? ORDER BY accessed DESC LIMIT 1",
+                (target,)
+            ).fetchone()
+            if cutoff:
+                self._conn.execute("DELETE FROM responses WHERE accessed <= ?", (cutoff[0],))
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of this process plus the size of the cache file contents."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": self._total_bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,6 +1,7 @@
 from masontilutils.api.chatgpt.base import ThreadedChatGPTAPI
 from masontilutils.api.chatgpt.ethgen import ChatGPTEthGenAPI, ChatGPTGenderAPI
 from masontilutils.api.chatgpt.industry import ChatGPTIndustryClassificationAPI
+from masontilutils.api.chatgpt.repair import ChatGPTJSONRepairAPI
 from masontilutils.api.queries.enums import Region, Ethnicity, Sex
 
 __all__ = [
@@ -8,6 +9,7 @@ __all__ = [
     'ChatGPTEthGenAPI', 
     'ChatGPTGenderAPI',
     'ChatGPTIndustryClassificationAPI',
+    'ChatGPTJSONRepairAPI',
     'Region',
     'Ethnicity',
     'Sex'
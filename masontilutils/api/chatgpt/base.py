@@ -1,17 +1,31 @@
 import json
 import threading
+import time
 import traceback
 from typing import Dict, Any, List, Optional, Union
 import base64
-from openai import OpenAI
+import httpx
+import openai
+from openai import OpenAI, DefaultHttpxClient
 from openai.types.chat import ChatCompletion
 
+from masontilutils.api.deadline import current_deadline
+from masontilutils.api.metrics import record_rate_limited, record_retry, record_tokens
 from masontilutils.api.queries.enums import Region, Ethnicity, Sex
+from masontilutils.api.ratelimit import estimate_tokens
+from masontilutils.api.transport import GuardedAPIMixin
+from masontilutils.api.usage import record_usage
 
-class ThreadedChatGPTAPI:
+class ThreadedChatGPTAPI(GuardedAPIMixin):
     _client_lock = threading.Lock()
     _clients = {}
 
+    provider = "openai"
+    base_url = "https://api.openai.com/v1/chat/completions"  # Only used to namespace cache keys
+    max_retries = 5
+    pool_maxsize = 32  # Max HTTP connections per API key, shared by all threads
+    pool_idle_timeout = 90.0  # Seconds after which an idle kept-alive connection is closed
+
     def __init__(self, api_key: str):
         """
         Initialize the ChatGPT API client
@@ -21,14 +35,32 @@ class ThreadedChatGPTAPI:
 
     @property
     def client(self) -> OpenAI:
-        """Get or create an OpenAI client for the current thread"""
-        thread_id = threading.get_ident()
-
-        with self._client_lock:
-            if thread_id not in self._clients:
-                self._clients[thread_id] = OpenAI(api_key=self.api_key)
+        """Get or create the OpenAI client for this API key; it is safe to share across threads"""
+        client = self._clients.get(self.api_key)
+        if client is None:
+            with self._client_lock:
+                client = self._clients.get(self.api_key)
+                if client is None:
+                    # Retries are handled in execute_query so 429s go through the shared rate limiter
+                    client = OpenAI(
+                        api_key=self.api_key,
+                        max_retries=0,
+                        http_client=DefaultHttpxClient(limits=httpx.Limits(
+                            max_connections=self.pool_maxsize,
+                            max_keepalive_connections=self.pool_maxsize,
+                            keepalive_expiry=self.pool_idle_timeout,
+                        )),
+                    )
+                    self._clients[self.api_key] = client
+        return client
 
-            return self._clients[thread_id]
+    @staticmethod
+    def json_schema_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """`response_format` asking for a strict structured output that matches `schema`"""
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": name, "strict": True, "schema": schema},
+        }
 
     def execute_query(
             self,
@@ -51,22 +83,66 @@ class ThreadedChatGPTAPI:
         elif "messages" in additional_args:
             messages = additional_args.pop("messages")
 
-        try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                **additional_args
-            )
-            
-            return {
-                "choices": [{
-                    "message": {
-                        "content": response.choices[0].message.content
-                    }
-                }]
-            }
-        except Exception as e:
-            return {
-                "error": f"API request failed: {str(e)}",
-                "status_code": getattr(e, 'status_code', None)
-            } 
\ No newline at end of file
+        payload = {"model": model, "messages": messages, **additional_args}
+        return self._guarded(payload, lambda: self._send(payload))
+
+    def _send(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a chat completion, retrying 429s through the shared rate limiter. Inside a
+        `deadline_scope` the request timeout, waits and retries are cut to the time left.
+        """
+        estimated_tokens = estimate_tokens(payload)
+        current_retry = 0
+        deadline = current_deadline()
+
+        while True:
+            if current_retry and self.circuit_breaker.is_open:
+                # Other callers saw the endpoint fail meanwhile; stop waiting out retries
+                return self._circuit_open()
+            if deadline is not None and deadline.expired:
+                return self._deadline_exceeded()
+            max_wait = deadline.remaining() if deadline is not None else None
+            if self.rate_limiter.acquire(estimated_tokens, max_wait) is None:
+                return self._deadline_exceeded()
+            request_args = {"timeout": deadline.remaining()} if deadline is not None else {}
+            try:
+                raw = self.client.chat.completions.with_raw_response.create(**payload, **request_args)
+                self.rate_limiter.update_from_headers(raw.headers)
+                response: ChatCompletion = raw.parse()
+                result = {
+                    "choices": [{
+                        "message": {
+                            "content": response.choices[0].message.content
+                        }
+                    }]
+                }
+                if response.usage is not None:
+                    self.rate_limiter.settle(estimated_tokens, response.usage.total_tokens)
+                    usage = response.usage.model_dump()
+                    record_usage(payload.get("model"), usage, type(self).__name__)
+                    record_tokens(type(self).__name__, payload.get("model"), usage)
+                    result["usage"] = usage
+
+                return result
+            except (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError) as e:
+                if deadline is not None and deadline.expired:
+                    return self._deadline_exceeded()
+                if current_retry >= self.max_retries - 1:
+                    if isinstance(e, openai.RateLimitError):
+                        record_rate_limited(type(self).__name__)
+                    return self._error(f"API request failed: {str(e)}", getattr(e, 'status_code', None))
+                record_retry(type(self).__name__, getattr(e, 'status_code', None))
+                if isinstance(e, openai.RateLimitError):
+                    # Pause every OpenAI caller, not only this thread
+                    headers = e.response.headers
+                    self.rate_limiter.update_from_headers(headers)
+                    wait = self._retry_after(headers, current_retry)
+                    print(f"Rate limit exceeded. Retry after {wait} seconds.")
+                    self.rate_limiter.pause(wait)
+                elif deadline is not None:
+                    deadline.sleep(0.5 * (2 ** current_retry))
+                else:
+                    time.sleep(0.5 * (2 ** current_retry))
+                current_retry += 1
+            except Exception as e:
+                return self._error(f"API request failed: {str(e)}", getattr(e, 'status_code', None))
@@ -1,34 +1,104 @@
 import json
 import traceback
-import base64
+from typing import Dict, List
 
 from masontilutils.api.chatgpt.base import ThreadedChatGPTAPI
+from masontilutils.api.chatgpt.repair import ChatGPTJSONRepairAPI
+from masontilutils.api.deadline import Deadline, deadline_scope
+from masontilutils.api.image_cache import ImageCache
+from masontilutils.api.images import ImagePreprocessor, encode_data_uri, load_image
+from masontilutils.api.lexicon import NameLexicon
+from masontilutils.api.llm_json import parse_json
+from masontilutils.api.metrics import record_parse_failure
 from masontilutils.api.queries.ethgen import (
     ETHGEN_SYSTEM_MESSAGE,
-    GENDER_SYSTEM_MESSAGE
+    ETHGEN_JSON_SCHEMA,
+    GENDER_SYSTEM_MESSAGE,
+    GENDER_JSON_SCHEMA,
+    GENDER_BATCH_SYSTEM_MESSAGE,
 )
-from masontilutils.utils import extract_json_substring
 from masontilutils.api.requests.ethgen.ethgen import (
     EthGenRequest,
     GenderRequest,
+    GenderBatchRequest,
     build_ethgen_payload,
     build_gender_payload,
+    build_gender_batch_payload,
+)
+from masontilutils.api.responses.ethgen.ethgen import (
+    EthGenResponse,
+    GenderResponse,
+    build_ethgen_response,
+    build_gender_response,
+    build_gender_batch_response,
 )
-from masontilutils.api.responses.ethgen.ethgen import EthGenResponse, GenderResponse, build_ethgen_response, build_gender_response
 
 MODEL = "gpt-4.1"
+GENDER_BATCH_SIZE = 50
 
 class ChatGPTEthGenAPI(ThreadedChatGPTAPI):
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        structured_outputs: bool = False,
+        repair: ChatGPTJSONRepairAPI | None = None,
+        preprocessor: ImagePreprocessor | None = None,
+        image_cache: ImageCache | None = None,
+    ):
         super().__init__(api_key)
         self.system_message = ETHGEN_SYSTEM_MESSAGE
+        # Opt-in strict JSON schema answers, parsed with a single json.loads
+        self.structured_outputs = structured_outputs
+        # Optional cheap text model reformatting unparseable answers instead of discarding the image call
+        self.repair = repair
+        # Optional downscaling to a small low-detail JPEG before the image is sent
+        self.preprocessor = preprocessor
+        # Optional perceptual-hash cache of answers and placeholder avatar blocklist
+        self.image_cache = image_cache
 
     def _encode_image(self, image_path: str) -> str:
-        """Encode image to base64 string"""
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
-        
-    def call(self, image_path: str, name: str | None = None, parse_url: bool = True) -> EthGenResponse | None:
+        """Encode a local image to a base64 data URI, capped at MAX_IMAGE_BYTES"""
+        return encode_data_uri(image_path)
+
+
+    def _fingerprint(self, image_path: str, parse_url: bool, data: bytes | None = None) -> tuple[int | None, bytes | None]:
+        """Perceptual hash and bytes of the image for the image cache; (None, None) if it can't be loaded"""
+        try:
+            if data is None:
+                data = self.preprocessor.load(image_path, parse_url) if self.preprocessor else load_image(image_path, parse_url)
+            return self.image_cache.fingerprint(data), data
+        except Exception as e:
+            print(f"Error hashing image, skipping the image cache: {str(e)}")
+            return None, None
+
+    def _prepare_image(self, image_path: str, parse_url: bool, data: bytes | None = None) -> tuple[str, str | None]:
+        """The image URL or data URI to send and its detail level"""
+        if self.preprocessor is not None:
+            try:
+                return self.preprocessor.data_uri(image_path, is_url=parse_url, data=data), self.preprocessor.detail
+            except Exception as e:
+                # Let the model fetch the original image instead
+                print(f"Error preprocessing image, sending it as is: {str(e)}")
+
+        if data is not None:
+            try:
+                return encode_data_uri(data), None
+            except ValueError as e:
+                if not parse_url:
+                    raise
+                print(f"Error encoding image, sending its URL: {str(e)}")
+        if parse_url:
+            return image_path, None
+        return self._encode_image(image_path), None
+
+    def call(
+        self,
+        image_path: str,
+        name: str | None = None,
+        parse_url: bool = True,
+        deadline: Deadline | None = None,
+        image_data: bytes | None = None,
+    ) -> EthGenResponse | None:
         """
         Analyze an image to determine the likely geographic origin of the person shown.
         
@@ -36,49 +106,76 @@ class ChatGPTEthGenAPI(ThreadedChatGPTAPI):
             image_path: Path to the image file
             name: Name of the person in the image
             parse_url: Whether the image_path is a url or a local file path
+            deadline: Optional time budget the request's timeout and retries are cut to
+            image_data: The image's bytes if they have already been downloaded (e.g. by
+                ImagePrefetcher); sent as a data URI instead of having OpenAI fetch the URL
             
         Returns:
-            EthGenResponse or None if analysis fails
+            EthGenResponse or None if analysis fails or the image is a placeholder avatar
         """
+        answer = None
+        repaired = False
+        fingerprint = None
         try:
-            if parse_url:
-                image_url = image_path
-            else:
-                base64_image = self._encode_image(image_path)
-                image_url = f"data:image/{image_path.split('.')[-1]};base64,{base64_image}"
-
-            # Build payload via helpers
-            request = EthGenRequest(image_path=image_url, name=name)
-            payload = build_ethgen_payload(
-                self.system_message,
-                request,
-                image_url,
-                model=MODEL,
-                max_tokens=100,
-                temperature=1,
-            )
+            with deadline_scope(deadline):
+                data = image_data
+                if self.image_cache is not None:
+                    if self.image_cache.is_placeholder(url=image_path if parse_url else None):
+                        print("Placeholder avatar, skipping image analysis")
+                        return None
+                    fingerprint, data = self._fingerprint(image_path, parse_url, data)
+                    if fingerprint is not None:
+                        if self.image_cache.is_placeholder(fingerprint):
+                            print("Placeholder avatar, skipping image analysis")
+                            return None
+                        if (cached := self.image_cache.get(fingerprint)) is not None:
+                            return cached
 
-            response = self.execute_query(**payload)
+                image_url, detail = self._prepare_image(image_path, parse_url, data)
 
-            if "error" in response:
-                print(f"Error: {response['error']}")
-                return None
-            
-            print("Response: ", response)
+                # Build payload via helpers; the request text names the image instead of repeating a data URI
+                request = EthGenRequest(image_path=image_path, name=name)
+                payload = build_ethgen_payload(
+                    self.system_message,
+                    request,
+                    image_url,
+                    model=MODEL,
+                    max_tokens=100,
+                    temperature=1,
+                    response_format=self.json_schema_format("ethgen", ETHGEN_JSON_SCHEMA) if self.structured_outputs else None,
+                    detail=detail,
+                )
 
-            # Extract and validate the response
-            answer = response["choices"][0]["message"]["content"].strip()
-            print(f"Answer: {answer}")
-            json_string = extract_json_substring(answer) 
-
-            print(f"Json string: {json_string}")
+                response = self.execute_query(**payload)
 
+                if "error" in response:
+                    print(f"Error: {response['error']}")
+                    return None
+            
+                print("Response: ", response)
 
-            api_res = json.loads(json_string)
-            res: EthGenResponse = build_ethgen_response(api_res)
-            return res
+                # Extract and validate the response
+                answer = response["choices"][0]["message"]["content"].strip()
+                print(f"Answer: {answer}")
+                try:
+                    api_res = json.loads(answer) if self.structured_outputs else parse_json(answer)
+                except ValueError:
+                    if self.repair is None:
+                        raise
+                    record_parse_failure(type(self).__name__)
+                    # Recorded once: a failure of the repaired answer below is not counted again
+                    repaired = True
+                    api_res = self.repair.call(answer, "ethgen", ETHGEN_JSON_SCHEMA, api=type(self).__name__)
+                    if api_res is None:
+                        return None
+                res: EthGenResponse = build_ethgen_response(api_res)
+                if res is not None and fingerprint is not None:
+                    self.image_cache.set(fingerprint, res)
+                return res
             
         except Exception as e:
+            if answer is not None and not repaired:
+                record_parse_failure(type(self).__name__)
             print(f"Error processing image: {str(e)}")
             print("Full traceback:")
             traceback.print_exc()
@@ -86,23 +183,36 @@ class ChatGPTEthGenAPI(ThreadedChatGPTAPI):
             return None
 
 class ChatGPTGenderAPI(ThreadedChatGPTAPI):
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, lexicon: NameLexicon | None = None, structured_outputs: bool = False):
         super().__init__(api_key)
         self.system_message = GENDER_SYSTEM_MESSAGE
+        self.batch_system_message = GENDER_BATCH_SYSTEM_MESSAGE
+        # Optional local first name table answering common names without a request
+        self.lexicon = lexicon
+        # Opt-in strict JSON schema answers for single names; batches keep the text format
+        # since their keys change with every request
+        self.structured_outputs = structured_outputs
         
-    def call(self, name: str) -> GenderResponse | None:
+    def call(self, name: str, deadline: Deadline | None = None) -> GenderResponse | None:
         """
         Analyze a name to determine the likely gender of the person.
         
         Args:
             name: Name of the person
+            deadline: Optional time budget the request's timeout and retries are cut to
             
         Returns:
             GenderResponse or None if analysis fails
         """
+        answer = None
         try:
             # Build payload via helpers
             first_name = name.split()[0]
+            if self.lexicon is not None:
+                known = self.lexicon.lookup(first_name)
+                if known is not None:
+                    return known
+
             request = GenderRequest(name=first_name)
             payload = build_gender_payload(
                 self.system_message,
@@ -110,9 +220,11 @@ class ChatGPTGenderAPI(ThreadedChatGPTAPI):
                 model=MODEL,
                 max_tokens=100,
                 temperature=1,
+                response_format=self.json_schema_format("gender", GENDER_JSON_SCHEMA) if self.structured_outputs else None,
             )
 
-            response = self.execute_query(**payload)
+            with deadline_scope(deadline):
+                response = self.execute_query(**payload)
 
             if "error" in response:
                 print(f"Error: {response['error']}")
@@ -120,18 +232,104 @@ class ChatGPTGenderAPI(ThreadedChatGPTAPI):
         
             # Extract and validate the response
             answer = response["choices"][0]["message"]["content"].strip()
-            json_string = extract_json_substring(answer)
-
-            api_res = json.loads(json_string)
+            if self.structured_outputs:
+                api_res = json.loads(answer)
+            else:
+                api_res = parse_json(answer)
             res: GenderResponse = build_gender_response(api_res)
+            if res is not None and self.lexicon is not None:
+                self.lexicon.record(first_name, res)
 
             return res
             
         except Exception as e:
+            if answer is not None:
+                record_parse_failure(type(self).__name__)
             print(f"Error processing name: {str(e)}")
             print("Full traceback:")
         
             traceback.print_exc()
             print()
             print(f"Answer: {answer}")
-            return None 
\ No newline at end of file
+            return None
+
+    def call_many(self, names: List[str], batch_size: int = GENDER_BATCH_SIZE) -> Dict[str, GenderResponse | None]:
+        """
+        Determine the likely gender for many names with as few requests as possible.
+        Unique first names are packed `batch_size` at a time into a single request
+        answered with a JSON object keyed by name. Names missing from a batch answer
+        are retried in smaller batches, down to a single `call` per name. Names the
+        lexicon answers with confidence are not sent at all.
+
+        Args:
+            names: Names of the people
+            batch_size: Maximum number of first names per request
+
+        Returns:
+            Dict mapping every input name to its GenderResponse, or None if analysis fails
+        """
+        first_names: Dict[str, str] = {}
+        for name in names:
+            parts = name.split() if name else []
+            if parts:
+                first_names.setdefault(parts[0].lower(), parts[0])
+
+        answers: Dict[str, GenderResponse | None] = {}
+        unique = []
+        for first_name in first_names.values():
+            known = self.lexicon.lookup(first_name) if self.lexicon is not None else None
+            if known is not None:
+                answers[first_name] = known
+            else:
+                unique.append(first_name)
+
+        for start in range(0, len(unique), batch_size):
+            answers.update(self._call_batch(unique[start:start + batch_size]))
+
+        res: Dict[str, GenderResponse | None] = {}
+        for name in names:
+            parts = name.split() if name else []
+            res[name] = answers.get(first_names[parts[0].lower()]) if parts else None
+        return res
+
+    def _call_batch(self, first_names: List[str]) -> Dict[str, GenderResponse | None]:
+        """Resolve one batch, splitting it in half to retry names the model left out."""
+        if len(first_names) == 1:
+            return {first_names[0]: self.call(first_names[0])}
+
+        parsed: Dict[str, GenderResponse | None] = {}
+        answer = None
+        try:
+            payload = build_gender_batch_payload(
+                self.batch_system_message,
+                GenderBatchRequest(names=first_names),
+                model=MODEL,
+            )
+            response = self.execute_query(**payload)
+
+            if "error" in response:
+                print(f"Error: {response['error']}")
+                return {name: None for name in first_names}
+
+            answer = response["choices"][0]["message"]["content"].strip()
+            api_res = parse_json(answer)
+            parsed = build_gender_batch_response(api_res, first_names)
+            if self.lexicon is not None:
+                for name, gender in parsed.items():
+                    if gender is not None:
+                        self.lexicon.record(name, gender)
+        except Exception as e:
+            if answer is not None:
+                record_parse_failure(type(self).__name__)
+            print(f"Error processing batch of {len(first_names)} names: {str(e)}")
+            print(f"Answer: {answer}")
+
+        res: Dict[str, GenderResponse | None] = dict(parsed)
+        missing = [name for name in first_names if name not in parsed]
+        if missing:
+            print(f"Retrying {len(missing)} of {len(first_names)} names missing from batch answer")
+            middle = (len(missing) + 1) // 2
+            for half in (missing[:middle], missing[middle:]):
+                if half:
+                    res.update(self._call_batch(half))
+        return res
@@ -3,16 +3,22 @@ import traceback
 from typing import List
 
 from masontilutils.api.chatgpt.base import ThreadedChatGPTAPI, Sex
-from masontilutils.api.queries.industry import INDUSTRY_CLASSIFICATION_SYSTEM_MESSAGE
-from masontilutils.utils import extract_json_substring
+from masontilutils.api.llm_json import parse_json
+from masontilutils.api.metrics import record_parse_failure
+from masontilutils.api.queries.industry import (
+    INDUSTRY_CLASSIFICATION_SYSTEM_MESSAGE,
+    INDUSTRY_CLASSIFICATION_JSON_SCHEMA,
+)
 
 class ChatGPTIndustryClassificationAPI(ThreadedChatGPTAPI):
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, structured_outputs: bool = False):
         super().__init__(api_key)
         self.system_message = {
             "role": "system",
             "content": INDUSTRY_CLASSIFICATION_SYSTEM_MESSAGE
         }
+        # Opt-in strict JSON schema answers, parsed with a single json.loads
+        self.structured_outputs = structured_outputs
         
     def _build_response(self, api_res: dict):
         print("api_res: ", api_res)
@@ -30,6 +36,7 @@ class ChatGPTIndustryClassificationAPI(ThreadedChatGPTAPI):
 
     def call(self, description: str) -> List[str]:
         res = []
+        answer = None
         try:
             # Prepare the message with the image
             messages = [
@@ -52,7 +59,11 @@ class ChatGPTIndustryClassificationAPI(ThreadedChatGPTAPI):
                 messages=messages,
                 max_tokens=300,  # We only need a short response
                 temperature=0.0,  # Ensure consistent responses
-                response_format={"type": "text"}  # Ensure we get text response
+                response_format=(
+                    self.json_schema_format("industry_classification", INDUSTRY_CLASSIFICATION_JSON_SCHEMA)
+                    if self.structured_outputs
+                    else {"type": "text"}  # Ensure we get text response
+                )
             )
 
             if "error" in response:
@@ -62,10 +73,10 @@ class ChatGPTIndustryClassificationAPI(ThreadedChatGPTAPI):
             # Extract and validate the response
             answer = response["choices"][0]["message"]["content"].strip()
             print(answer)
-            json_string = extract_json_substring(answer)
-        
-
-            api_res: dict = json.loads(json_string)
+            if self.structured_outputs:
+                api_res: dict = json.loads(answer)
+            else:
+                api_res: dict = parse_json(answer)
             for d in api_res.values():
                 if d["NAICS"] != None and d["industry_code"] != None:
                     res.append(d)
@@ -73,6 +84,8 @@ class ChatGPTIndustryClassificationAPI(ThreadedChatGPTAPI):
             return res
             
         except Exception as e:
+            if answer is not None:
+                record_parse_failure(type(self).__name__)
             traceback.print_exc()
             print()
             return None 
\ No newline at end of file
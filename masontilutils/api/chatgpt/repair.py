@@ -0,0 +1,64 @@
+import json
+import traceback
+from typing import Any, Dict
+
+from masontilutils.api.chatgpt.base import ThreadedChatGPTAPI
+from masontilutils.api.metrics import record_repair
+from masontilutils.api.queries.repair import JSON_REPAIR_SYSTEM_MESSAGE
+
+MODEL = "gpt-4.1-nano"
+MAX_REPAIR_CHARS = 8000  # Longer answers are cut; the JSON is usually near the start
+
+
+class ChatGPTJSONRepairAPI(ThreadedChatGPTAPI):
+    """
+    Reformats an answer that could not be parsed into JSON matching a schema, using a
+    cheap text model with strict structured outputs. Only the malformed text is sent,
+    so a repair costs a small fraction of redoing the original (image or deep research)
+    request.
+    """
+
+    def __init__(self, api_key: str, model: str = MODEL):
+        """
+        :param api_key: Your ChatGPT API key
+        :param model: Text model used for repairs
+        """
+        super().__init__(api_key)
+        self.model = model
+        self.system_message = {"role": "system", "content": JSON_REPAIR_SYSTEM_MESSAGE}
+
+    def call(self, text: str, name: str, schema: Dict[str, Any], api: str | None = None) -> Dict[str, Any] | None:
+        """
+        Reformat a malformed answer.
+
+        Args:
+            text: The answer that could not be parsed
+            name: Name of the schema, e.g. "ethgen"
+            schema: Strict JSON schema the repaired answer must match
+            api: Name of the API whose answer is repaired, for metrics
+
+        Returns:
+            The repaired answer or None if the repair fails
+        """
+        repaired = None
+        try:
+            response = self.execute_query(
+                model=self.model,
+                messages=[self.system_message, {"role": "user", "content": text[:MAX_REPAIR_CHARS]}],
+                max_tokens=1000,
+                temperature=0,
+                response_format=self.json_schema_format(name, schema),
+            )
+            if "error" in response:
+                print(f"Error: {response['error']}")
+                return None
+
+            repaired = json.loads(response["choices"][0]["message"]["content"])
+            return repaired
+
+        except Exception as e:
+            print(f"Error repairing answer: {str(e)}")
+            traceback.print_exc()
+            return None
+        finally:
+            record_repair(api or "unknown", repaired is not None)
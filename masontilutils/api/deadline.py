@@ -0,0 +1,69 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class Deadline:
+    """
+    Wall-clock budget for a unit of work, e.g. one company. Every layer it is passed
+    to cuts its timeouts, retries and sleeps to the time that is left, so the work
+    finishes (possibly with partial results) within a predictable time.
+
+        deadline = Deadline(120)
+        service.call(company_name, city, state, address, deadline=deadline)
+    """
+
+    def __init__(self, seconds: float):
+        """
+        :param seconds: Time budget from now
+        """
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: float) -> float:
+        """`default` capped at the remaining time."""
+        return min(default, self.remaining())
+
+    def sleep(self, seconds: float) -> bool:
+        """Sleep `seconds` or until the deadline; returns whether the full time was slept."""
+        remaining = self.remaining()
+        time.sleep(min(seconds, remaining))
+        return seconds <= remaining
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.1f}s)"
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """The deadline of the enclosing `deadline_scope`, read by the API transports."""
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """
+    Apply `deadline` to every API request made by this thread or task inside the block.
+    Scopes nest; the earlier of the enclosing and the new deadline wins. `None` keeps
+    the enclosing deadline.
+    """
+    enclosing = _current.get()
+    if deadline is None or (enclosing is not None and enclosing.expires_at <= deadline.expires_at):
+        yield enclosing
+        return
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
@@ -1,19 +1,15 @@
 import ast
 import json
 import re
-import threading
 import time
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util import Retry
 from typing import Dict, Any, Optional
 
+from masontilutils.api.transport import ThreadedChatCompletionsAPI
 from masontilutils.utils import clean_deep_research_text, extract_json_substring
 
 
-class ThreadedDeepseekR1API:
-    _session_lock = threading.Lock()
-    _sessions = {}
+class ThreadedDeepseekR1API(ThreadedChatCompletionsAPI):
+    provider = "deepseek"
 
     def __init__(self, api_key: str):
         """
@@ -27,44 +23,13 @@ class ThreadedDeepseekR1API:
             "Content-Type": "application/json"
         }
 
-    @property
-    def session(self):
-        """Get or create a requests session for the current thread"""
-        thread_id = threading.get_ident()
-
-        with self._session_lock:
-            if thread_id not in self._sessions:
-                session = requests.Session()
-                # Configure retry strategy
-                retry_strategy = Retry(
-                    total=3,
-                    backoff_factor=0.5,
-                    status_forcelist=[429, 500, 502, 503, 504]
-                )
-                adapter = HTTPAdapter(max_retries=retry_strategy)
-                session.mount("https://", adapter)
-                session.mount("http://", adapter)
-                self._sessions[thread_id] = session
-
-            return self._sessions[thread_id]
-
-    def execute_query(
+    def _build_payload(
             self,
             query: str = None,
             model: str = "deepseek-reasoner",
             max_tokens: Optional[int] = 3000,
             **additional_args
     ) -> Dict[str, Any]:
-        """
-        Execute a query against the Deepseek R1 API
-
-        :param query: User query string
-        :param model: Model to use (default: deepseek-reasoner)
-        :param max_tokens: Maximum response tokens
-        :param temperature: Temperature parameter (0.0-1.0)
-        :param additional_args: Additional API parameters
-        :return: API response dictionary
-        """
         payload = {
             "model": model,
             **additional_args
@@ -78,54 +43,38 @@ class ThreadedDeepseekR1API:
         if max_tokens is not None:
             payload["max_tokens"] = max_tokens
 
-        max_retries = 5
-        base_delay = 5  # Base delay in seconds
-        current_retry = 0
-
-        while current_retry < max_retries:
-            try:
-                response = self.session.post(
-                    self.base_url,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=500
-                )
-                response.raise_for_status()
-                return response.json()
+        return payload
 
-            except requests.exceptions.HTTPError as e:
-                print(f"API request failed: {str(e)}")
-                if e.response.status_code == 429:
-                    # Get rate limit information from headers
-                    retry_after = int(e.response.headers.get('Retry-After', base_delay * (2 ** current_retry)))
-                    reset_time = e.response.headers.get('X-RateLimit-Reset')
-                    
-                    print(f"Rate limit exceeded. Retry after {retry_after} seconds.")
-                    if reset_time:
-                        print(f"Rate limit resets at: {reset_time}")
-                    
-                    # Sleep for the specified time
-                    time.sleep(retry_after)
-                    current_retry += 1
-                    continue
-                else:
-                    print(f"API request failed: {str(e)}",
-                        f"Status code: {e.response.status_code if hasattr(e, 'response') and e.response else None}")
-                    return {
-                        "error": f"API request failed: {str(e)}",
-                        "status_code": e.response.status_code if hasattr(e, 'response') and e.response else None
-                    }
+    def execute_query(
+            self,
+            query: str = None,
+            model: str = "deepseek-reasoner",
+            max_tokens: Optional[int] = 3000,
+            **additional_args
+    ) -> Dict[str, Any]:
+        """
+        Execute a query against the Deepseek R1 API
 
-            except requests.exceptions.RequestException as e:
-                print(f"API request failed: {str(e)}",
-                    f"Status code: {e.response.status_code if hasattr(e, 'response') and e.response else None}")
-                return {
-                    "error": f"API request failed: {str(e)}",
-                    "status_code": e.response.status_code if hasattr(e, 'response') and e.response else None
-                }
+        :param query: User query string
+        :param model: Model to use (default: deepseek-reasoner)
+        :param max_tokens: Maximum response tokens
+        :param temperature: Temperature parameter (0.0-1.0)
+        :param additional_args: Additional API parameters
+        :return: API response dictionary
+        """
+        payload = self._build_payload(query, model, max_tokens, **additional_args)
+        return self._post(payload)
 
-        # If we've exhausted all retries
-        return {
-            "error": "Max retries exceeded for rate limit",
-            "status_code": 429
-        } 
\ No newline at end of file
+    async def execute_query_async(
+            self,
+            query: str = None,
+            model: str = "deepseek-reasoner",
+            max_tokens: Optional[int] = 3000,
+            **additional_args
+    ) -> Dict[str, Any]:
+        """
+        Asyncio variant of `execute_query`. Concurrency is capped per event loop
+        by `max_concurrency` instead of one OS thread per in-flight request.
+        """
+        payload = self._build_payload(query, model, max_tokens, **additional_args)
+        return await self._post_async(payload)
@@ -1,19 +1,19 @@
 from masontilutils.api.deepseek.base import ThreadedDeepseekR1API
+from masontilutils.api.failover import FailoverMixin
 from masontilutils.api.queries.industry import DESCRIPTION_OUTPUT_SYSTEM_MESSAGE, DESCRIPTION_QUERY
 from masontilutils.utils import clean_deep_research_text
 
 
-class DeepseekBusinessDescriptionAPI(ThreadedDeepseekR1API):
-    def __init__(self, api_key: str):
+class DeepseekBusinessDescriptionAPI(FailoverMixin, ThreadedDeepseekR1API):
+    def __init__(self, api_key: str, fallback=None):
+        """
+        :param api_key: Your Deepseek API key
+        :param fallback: PerplexityBusinessDescAPI to fail over to when this provider is unavailable
+        """
         super().__init__(api_key=api_key)
+        self.fallback = fallback
 
-    def call(self,
-             company_name: str,
-             city: str,
-             state: str,
-             address: str,
-             ) -> list[str] | None:
-
+    def _build_messages(self, company_name: str, city: str, state: str, address: str) -> list[dict]:
         system_role = {"role": "system", "content": DESCRIPTION_OUTPUT_SYSTEM_MESSAGE}
 
         query = DESCRIPTION_QUERY.format(
@@ -23,13 +23,12 @@ class DeepseekBusinessDescriptionAPI(ThreadedDeepseekR1API):
             address=address
         )
 
-        response = super().execute_query(
-            model="deepseek-chat",
-            messages=[
-                system_role,
-                {"role": "user", "content": query}
-            ]
-        )
+        return [
+            system_role,
+            {"role": "user", "content": query}
+        ]
+
+    def _handle_response(self, response: dict) -> str | None:
         if "error" not in response:
             answer = response["choices"][0]["message"]["content"]
             if "None" in answer:
@@ -37,4 +36,34 @@ class DeepseekBusinessDescriptionAPI(ThreadedDeepseekR1API):
             return clean_deep_research_text(answer)
         else:
             print(f"Error: {response['error']}")
-            return None 
\ No newline at end of file
+            return None
+
+    def _query(self, company_name: str, city: str, state: str, address: str) -> dict:
+        return super().execute_query(
+            model="deepseek-chat",
+            messages=self._build_messages(company_name, city, state, address)
+        )
+
+    async def _query_async(self, company_name: str, city: str, state: str, address: str) -> dict:
+        return await super().execute_query_async(
+            model="deepseek-chat",
+            messages=self._build_messages(company_name, city, state, address)
+        )
+
+    def call(self,
+             company_name: str,
+             city: str,
+             state: str,
+             address: str,
+             ) -> list[str] | None:
+
+        return self._call_with_failover(company_name, city, state, address)
+
+    async def call_async(self,
+             company_name: str,
+             city: str,
+             state: str,
+             address: str,
+             ) -> list[str] | None:
+
+        return await self._call_with_failover_async(company_name, city, state, address)
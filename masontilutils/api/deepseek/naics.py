@@ -15,25 +15,40 @@ class DeepseekNAICSCodeAPI(ThreadedDeepseekR1API):
         naics_codes = re.findall(r'\d{6}', json_string)
         return naics_codes
 
-    def call(self,
-             description: str,
-             ) -> list[str] | None:
-
+    def _build_messages(self, description: str) -> list[dict]:
         system_role = {"role": "system", "content": NAICS_CODE_OUTPUT_MESSAGE}
 
         query = NAICS_CODE_QUERY_DESCRIPTION.format(
             description=description
         )
 
-        response = super().execute_query(
-            messages=[
-                system_role,
-                {"role": "user", "content": query}
-            ]
-        )
+        return [
+            system_role,
+            {"role": "user", "content": query}
+        ]
+
+    def _handle_response(self, response: dict) -> list[str] | None:
         if "error" not in response:
             answer = response["choices"][0]["message"]["content"]
             return self.format_response(answer)
         else:
             print(f"Error: {response['error']}")
-            return None 
\ No newline at end of file
+            return None
+
+    def call(self,
+             description: str,
+             ) -> list[str] | None:
+
+        response = super().execute_query(
+            messages=self._build_messages(description)
+        )
+        return self._handle_response(response)
+
+    async def call_async(self,
+             description: str,
+             ) -> list[str] | None:
+
+        response = await super().execute_query_async(
+            messages=self._build_messages(description)
+        )
+        return self._handle_response(response)
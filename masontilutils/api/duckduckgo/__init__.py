@@ -1,7 +1,11 @@
 from masontilutils.api.duckduckgo.base import DDGSearch
+from masontilutils.api.duckduckgo.html_search import DDGHTMLSearch
 from masontilutils.api.duckduckgo.linkedin import DuckDuckGoLinkedInAPI
+from masontilutils.api.duckduckgo.pool import DDGSearchPool
 
 __all__ = [
     'DDGSearch',
+    'DDGHTMLSearch',
+    'DDGSearchPool',
     'DuckDuckGoLinkedInAPI'
 ] 
\ No newline at end of file
@@ -1,11 +1,16 @@
 from typing import Dict, Any, List
 from urllib.parse import urlencode
 from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException
 from seleniumbase import Driver
 import random
 from time import sleep, time
 
+from masontilutils.api.deadline import Deadline
+
 class DDGSearch:
+    page_load_timeout = 300  # Selenium's default, restored after a deadline shortened it
+
     def __init__(self, headless: bool = True):
         try:
             self.driver = Driver(
@@ -14,21 +19,38 @@ class DDGSearch:
             )
             self.driver.get("https://www.duckduckgo.com")
             self.last_request_time = 0
+            self._current_page_load_timeout = self.page_load_timeout
         except Exception as e:
             raise RuntimeError(f"Failed to initialize WebDriver: {str(e)}")
+
+    def _set_page_load_timeout(self, seconds: float):
+        if seconds != self._current_page_load_timeout:
+            self.driver.set_page_load_timeout(seconds)
+            self._current_page_load_timeout = seconds
         
-    def _get(self, url: str):
+    def _get(self, url: str, deadline: Deadline | None = None) -> bool:
+        """Load a page, pacing requests; returns False if the deadline leaves no time for it."""
         current_time = time()
         time_since_last_request = current_time - self.last_request_time
         
         if time_since_last_request < 5:  # If less than minimum wait time has passed
             sleep_time = random.uniform(1.0, 10.0) - time_since_last_request
             if sleep_time > 0:
+                if deadline is not None and sleep_time >= deadline.remaining():
+                    return False
                 print(f"Sleeping for {sleep_time} seconds")
                 sleep(sleep_time)
-        
+
+        if deadline is None:
+            self._set_page_load_timeout(self.page_load_timeout)
+        else:
+            if deadline.expired:
+                return False
+            self._set_page_load_timeout(deadline.timeout(self.page_load_timeout))
+
         self.driver.get(url)
         self.last_request_time = time()
+        return True
 
     def _get_html(self) -> str:
         return self.driver.page_source
@@ -67,7 +89,11 @@ class DDGSearch:
     def __exit__(self, exc_type, exc_value, traceback):
         self.driver.quit()
     
-    def search(self, query: str) -> List[Dict[str, Any]]:
+    def search(self, query: str, deadline: Deadline | None = None) -> List[Dict[str, Any]]:
+        """
+        :param query: Search query
+        :param deadline: Optional time budget; no results are returned if the page can't load within it
+        """
         params = {
             'q': query,
             't': 'h_',
@@ -75,7 +101,15 @@ class DDGSearch:
         }
         url = f"https://duckduckgo.com/?{urlencode(params)}"
 
-        self._get(url)
+        try:
+            if not self._get(url, deadline):
+                print("Deadline exceeded, skipping search")
+                return []
+        except TimeoutException:
+            if deadline is None:
+                raise
+            print("Deadline exceeded while loading search results")
+            return []
 
         return self._parse_response(self._get_html())
     
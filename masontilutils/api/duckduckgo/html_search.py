@@ -0,0 +1,190 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+from masontilutils.api.deadline import Deadline
+from masontilutils.api.pool import SessionPool, new_session
+
+HTML_ENDPOINT = "https://html.duckduckgo.com/html/"
+
+# The HTML endpoint turns away the default python-requests agent
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+)
+
+# DuckDuckGo answers suspected bots with 202 and a challenge page instead of results
+BLOCKED_STATUS_CODES = (202, 403, 418, 429)
+
+
+def _new_session() -> requests.Session:
+    session = new_session()
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+class DDGBlockedError(Exception):
+    """DuckDuckGo answered with a bot challenge or a page that isn't a results page."""
+
+
+class DDGHTMLSearch:
+    """
+    DuckDuckGo search over the lightweight HTML endpoint, behind the same `search()`
+    interface as the Selenium DDGSearch, without starting a browser. Requests go
+    through a pooled HTTP session and are paced `min_interval` seconds apart.
+
+    When DuckDuckGo blocks a request, searches go to the `fallback` searcher
+    (e.g. a DDGSearchPool) for `block_cooldown` seconds. The fallback is only
+    created the first time it is needed.
+
+        search = DDGHTMLSearch(fallback=lambda: DDGSearchPool(size=1))
+        results = search.search('"Jane Doe" "Acme" site:linkedin.com')
+    """
+
+    def __init__(
+        self,
+        fallback: Callable[[], Any] | None = None,
+        min_interval: float = 1.0,
+        block_cooldown: float = 600.0,
+        timeout: float = 10.0,
+        sessions: SessionPool | None = None,
+    ):
+        """
+        :param fallback: Creates the searcher used while the HTML endpoint blocks us;
+            without one, blocked searches return no results
+        :param min_interval: Minimum seconds between two requests to the HTML endpoint
+        :param block_cooldown: Seconds searches go to the fallback after a block
+        :param timeout: Request timeout in seconds, cut to the search's deadline
+        :param sessions: HTTP session pool; one with a browser User-Agent by default
+        """
+        self.fallback_factory = fallback
+        self.min_interval = min_interval
+        self.block_cooldown = block_cooldown
+        self.timeout = timeout
+        self.sessions = sessions or SessionPool(_new_session, maxsize=4)
+
+        self._lock = threading.Lock()
+        self._next_request = 0.0
+        self._blocked_until = 0.0
+        self._fallback = None
+
+    @property
+    def blocked(self) -> bool:
+        """Whether searches currently go to the fallback."""
+        return time.monotonic() < self._blocked_until
+
+    def _get_fallback(self):
+        with self._lock:
+            if self._fallback is None and self.fallback_factory is not None:
+                self._fallback = self.fallback_factory()
+            return self._fallback
+
+    def _wait_turn(self, deadline: Deadline | None) -> bool:
+        """Reserve the next request slot and sleep until it; False if the deadline ends first."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_request)
+            wait = start - now
+            if deadline is not None and (deadline.expired or wait >= deadline.remaining()):
+                return False
+            self._next_request = start + self.min_interval
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def _fetch(self, query: str, deadline: Deadline | None) -> str:
+        timeout = deadline.timeout(self.timeout) if deadline is not None else self.timeout
+        with self.sessions.session() as session:
+            response = session.post(HTML_ENDPOINT, data={"q": query, "b": ""}, timeout=timeout)
+        if response.status_code in BLOCKED_STATUS_CODES:
+            raise DDGBlockedError(f"HTTP {response.status_code}")
+        response.raise_for_status()
+        return response.text
+
+    @staticmethod
+    def _result_url(href: str) -> str:
+        """Unwrap DuckDuckGo's //duckduckgo.com/l/?uddg=<url> redirect links."""
+        parsed = urlparse(href)
+        if parsed.path == "/l/":
+            target = parse_qs(parsed.query).get("uddg")
+            if target:
+                return target[0]
+        return href
+
+    def _parse_response(self, html: str) -> List[Dict[str, Any]]:
+        """
+        Results of an HTML endpoint page in the same shape as DDGSearch's. Raises
+        DDGBlockedError for challenge pages and pages with neither results nor a
+        no-results notice, which means the markup changed.
+        """
+        soup = BeautifulSoup(html, 'html.parser')
+        if soup.select_one('.anomaly-modal, #challenge-form, form[action*="anomaly"]'):
+            raise DDGBlockedError("Bot challenge")
+
+        bodies = soup.select('.result')
+        if not bodies:
+            if soup.select_one('.no-results'):
+                return []
+            raise DDGBlockedError("Unrecognized results page")
+
+        results = []
+        for body in bodies:
+            classes = body.get('class', [])
+            if 'result--ad' in classes or 'result--no-result' in classes:
+                continue
+
+            link = body.select_one('a.result__a')
+            url = self._result_url(link['href']) if link and link.get('href') else None
+            title = link.get_text() if link else None
+
+            description = body.select_one('.result__snippet')
+            description_text = ' '.join(description.stripped_strings) if description else None
+
+            results.append({
+                'url': url,
+                'title': title,
+                'description': description_text
+            })
+
+        return results
+
+    def _search_fallback(self, query: str, deadline: Deadline | None) -> List[Dict[str, Any]]:
+        fallback = self._get_fallback()
+        if fallback is None:
+            return []
+        return fallback.search(query, deadline)
+
+    def search(self, query: str, deadline: Deadline | None = None) -> List[Dict[str, Any]]:
+        """
+        :param query: Search query
+        :param deadline: Optional time budget; no results are returned if the request can't fit in it
+        """
+        if self.blocked:
+            return self._search_fallback(query, deadline)
+
+        if not self._wait_turn(deadline):
+            print("Deadline exceeded, skipping search")
+            return []
+
+        try:
+            return self._parse_response(self._fetch(query, deadline))
+        except DDGBlockedError as e:
+            print(f"DuckDuckGo HTML search blocked ({str(e)}), falling back for {self.block_cooldown} seconds")
+            with self._lock:
+                self._blocked_until = time.monotonic() + self.block_cooldown
+            return self._search_fallback(query, deadline)
+        except requests.RequestException as e:
+            if deadline is not None and deadline.expired:
+                print("Deadline exceeded while loading search results")
+                return []
+            print(f"Error searching DuckDuckGo HTML, falling back: {str(e)}")
+            return self._search_fallback(query, deadline)
+
+    def close(self):
+        self.sessions.close()
+        if self._fallback is not None:
+            self._fallback.close()
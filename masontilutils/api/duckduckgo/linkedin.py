@@ -2,12 +2,26 @@ from typing import Dict, Any, List
 from fuzzywuzzy import fuzz
 import re
 
-from masontilutils.api.duckduckgo.base import DDGSearch
+from masontilutils.api.deadline import Deadline
+from masontilutils.api.duckduckgo.html_search import DDGHTMLSearch
+from masontilutils.api.duckduckgo.pool import DDGSearchPool
+
+BACKENDS = ("selenium", "html")
 
 
 class DuckDuckGoLinkedInAPI():
-    def __init__(self):
-        self.api = DDGSearch()
+    def __init__(self, pool_size: int = 1, backend: str = "selenium"):
+        """
+        :param pool_size: Number of browser drivers searching in parallel for concurrent calls
+        :param backend: "selenium" to search in undetected Chrome, or "html" to query the
+            lightweight HTML endpoint without a browser, starting the drivers only if it blocks us
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown DuckDuckGo backend {backend!r}, expected one of {BACKENDS}")
+        if backend == "html":
+            self.api = DDGHTMLSearch(fallback=lambda: DDGSearchPool(size=pool_size))
+        else:
+            self.api = DDGSearchPool(size=pool_size)
 
     def _is_linkedin_profile_url(self, url: str) -> bool:
         return url.startswith("https://www.linkedin.com/in/")
@@ -75,12 +89,14 @@ class DuckDuckGoLinkedInAPI():
             self,
             name: str,
             company_name: str,
+            deadline: Deadline | None = None,
     ) -> List[Dict[str, Any]]:
         """
         Search for LinkedIn profiles using DuckDuckGo
 
         :param name: Name of the person
         :param company_name: Name of the company
+        :param deadline: Optional time budget; queries that don't fit in it are skipped
         :return: List of search results
         """
         company_name = self.clean_company_name(company_name)
@@ -91,8 +107,10 @@ class DuckDuckGoLinkedInAPI():
         ]
 
         for query in queries:
+            if deadline is not None and deadline.expired:
+                break
             print(f"Searching for {query}")
-            results = self.api.search(query)
+            results = self.api.search(query, deadline)
 
             print(f"length of results: {len(results)}")
 
@@ -100,4 +118,7 @@ class DuckDuckGoLinkedInAPI():
                 if self._result_valid(result, name, company_name):
                     return result['url']
 
-        return None 
\ No newline at end of file
+        return None
+
+    def close(self):
+        self.api.close()
@@ -0,0 +1,127 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+from masontilutils.api.deadline import Deadline
+from masontilutils.api.duckduckgo.base import DDGSearch
+
+
+class DDGSearchPool:
+    """
+    Pool of up to `size` DDGSearch drivers behind the same `search()` interface. Each
+    concurrent search checks out its own driver, so searches run in parallel while
+    every driver keeps its own pacing clock and stays under the per-session limit.
+
+    The first driver starts right away so start-up failures surface early; the others
+    start on demand, when every running driver is busy. An idle driver that has rested
+    the longest is handed out first, which keeps pacing sleeps short.
+
+        pool = DDGSearchPool(size=4)
+        results = pool.search('"Jane Doe" "Acme" site:linkedin.com')
+    """
+
+    def __init__(self, size: int = 2, headless: bool = True, factory: Callable[..., DDGSearch] = DDGSearch):
+        """
+        :param size: Maximum number of drivers (browser instances) running at the same time
+        :param headless: Whether the browsers run headless
+        :param factory: Creates a new driver, called with `headless`
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self.headless = headless
+        self.factory = factory
+
+        self._cond = threading.Condition()
+        self._idle: List[DDGSearch] = []
+        self._drivers: List[DDGSearch] = []
+        self._starting = 0  # Drivers being created outside the lock
+        self._closed = False
+
+        driver = self.factory(headless=self.headless)
+        self._drivers.append(driver)
+        self._idle.append(driver)
+
+    @property
+    def running(self) -> int:
+        """Number of drivers started."""
+        return len(self._drivers)
+
+    @contextmanager
+    def driver(self, deadline: Deadline | None = None) -> Iterator[DDGSearch | None]:
+        """
+        Check a driver out for the duration of the `with` block. Yields None if the
+        deadline runs out while every driver is busy.
+        """
+        driver = self._checkout(deadline)
+        try:
+            yield driver
+        finally:
+            if driver is not None:
+                self._checkin(driver)
+
+    def _checkout(self, deadline: Deadline | None) -> DDGSearch | None:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("DDGSearchPool is closed")
+                if self._idle:
+                    driver = min(self._idle, key=lambda d: d.last_request_time)
+                    self._idle.remove(driver)
+                    return driver
+                if len(self._drivers) + self._starting < self.size:
+                    self._starting += 1
+                    break
+                if deadline is not None and deadline.expired:
+                    return None
+                self._cond.wait(timeout=deadline.remaining() if deadline is not None else None)
+
+        try:
+            driver = self.factory(headless=self.headless)
+        except Exception as e:
+            with self._cond:
+                self._starting -= 1
+                # Without a new browser, wait for one of the running drivers instead
+                self.size = max(len(self._drivers) + self._starting, 1)
+                self._cond.notify_all()
+                if not self._drivers:
+                    raise
+            print(f"Error starting another search driver, continuing with {self.size}: {str(e)}")
+            return self._checkout(deadline)
+
+        with self._cond:
+            self._starting -= 1
+            self._drivers.append(driver)
+        return driver
+
+    def _checkin(self, driver: DDGSearch):
+        with self._cond:
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                self._idle.append(driver)
+                self._cond.notify()
+        if closed:
+            driver.close()
+
+    def search(self, query: str, deadline: Deadline | None = None) -> List[Dict[str, Any]]:
+        """
+        :param query: Search query
+        :param deadline: Optional time budget, also for waiting on a busy driver
+        """
+        with self.driver(deadline) as driver:
+            if driver is None:
+                print("Deadline exceeded waiting for a search driver, skipping search")
+                return []
+            return driver.search(query, deadline)
+
+    def close(self):
+        """Quit idle drivers; drivers still searching quit when they are returned."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for driver in idle:
+            driver.close()
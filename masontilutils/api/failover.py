@@ -0,0 +1,32 @@
+from typing import Any, Dict
+
+from masontilutils.api.breaker import is_outage
+
+
+class FailoverMixin:
+    """
+    Fail over to a `fallback` API on another provider when this one is unavailable.
+    Both APIs provide `_query`, `_query_async` and `_handle_response` taking the same
+    arguments. Only outages and open circuits fail over; client errors, the cost budget
+    and the deadline would fail the same way on the fallback, or cost twice.
+    """
+    fallback = None
+
+    def _should_fail_over(self, response: Dict[str, Any]) -> bool:
+        if self.fallback is None or not is_outage(response):
+            return False
+        # One hop only, so two APIs set as each other's fallback cannot loop
+        print(f"Failing over to {type(self.fallback).__name__}: {response['error']}")
+        return True
+
+    def _call_with_failover(self, *args) -> Any:
+        response = self._query(*args)
+        if self._should_fail_over(response):
+            return self.fallback._handle_response(self.fallback._query(*args))
+        return self._handle_response(response)
+
+    async def _call_with_failover_async(self, *args) -> Any:
+        response = await self._query_async(*args)
+        if self._should_fail_over(response):
+            return self.fallback._handle_response(await self.fallback._query_async(*args))
+        return self._handle_response(response)
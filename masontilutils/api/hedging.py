@@ -0,0 +1,145 @@
+import math
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+
+class LatencyTracker:
+    """Rolling window of request latencies (seconds) with quantile lookup."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class HedgePolicy:
+    """
+    Tail-latency hedging: once a request has been pending for longer than the
+    `quantile` latency seen so far for its API, one duplicate is sent and the first
+    successful answer wins; the other request is cancelled. Hedging starts after
+    `min_samples` successful requests and duplicates are capped at `max_ratio` of
+    all requests, so spend stays bounded.
+
+    Opt in by assigning an instance to the `hedge` attribute of an API class:
+
+        ThreadedPerplexitySonarAPI.hedge = HedgePolicy(quantile=0.95, max_ratio=0.05)
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        max_ratio: float = 0.05,
+        min_samples: int = 20,
+        window: int = 200,
+    ):
+        """
+        :param quantile: Latency quantile after which a duplicate request is sent
+        :param max_ratio: Maximum number of duplicates as a fraction of all requests
+        :param min_samples: Successful requests to observe before hedging an API
+        :param window: Number of recent latencies the quantile is computed over
+        """
+        self.quantile = quantile
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self.window = window
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0  # Hedges that answered before the original request
+
+        self._lock = threading.Lock()
+        self._trackers: Dict[str, LatencyTracker] = {}
+
+    def tracker(self, key: str) -> LatencyTracker:
+        with self._lock:
+            if key not in self._trackers:
+                self._trackers[key] = LatencyTracker(self.window)
+            return self._trackers[key]
+
+    def start(self, key: str) -> Optional[float]:
+        """Count a request; returns the delay after which it may be hedged, or None."""
+        with self._lock:
+            self.requests += 1
+        tracker = self.tracker(key)
+        if len(tracker) < self.min_samples:
+            return None
+        return tracker.quantile(self.quantile)
+
+    def allow_hedge(self) -> bool:
+        """Reserve a duplicate request if the hedge budget allows one."""
+        with self._lock:
+            if self.hedges + 1 > self.max_ratio * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def record(self, key: str, seconds: float, hedge_won: bool = False):
+        """Record the latency the caller saw for a successful request."""
+        self.tracker(key).record(seconds)
+        if hedge_won:
+            with self._lock:
+                self.hedge_wins += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_ratio": self.hedges / self.requests if self.requests else 0.0,
+            }
+
+
+class HedgedAttempt:
+    """
+    Cancellation handle for one copy of a hedged blocking request. The transport
+    checks `cancelled` between retries and registers the pooled session and the
+    response it is using while it holds them, so `cancel` can close them and abort
+    a streamed read. A copy still waiting for a non-streamed response cannot be
+    interrupted: it keeps its thread and pool slot until the response arrives or
+    its timeout (cut to the deadline, if any) passes.
+    """
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.pool = None
+        self.session = None
+        self.response = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def holding(self, pool, session) -> Iterator[None]:
+        """Register `session` of `pool` for the `with` block, which must end before it is checked in."""
+        with self._lock:
+            self.pool, self.session = pool, session
+        try:
+            yield
+        finally:
+            # Once checked in the session may be lent to another request; never close it then
+            with self._lock:
+                self.pool = self.session = self.response = None
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled.set()
+            if self.response is not None:
+                try:
+                    self.response.close()
+                except Exception:
+                    pass
+            if self.session is not None and self.pool is not None:
+                self.pool.discard(self.session)
@@ -0,0 +1,141 @@
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from masontilutils.api.images import hash_distance, image_hash
+from masontilutils.api.responses.ethgen.ethgen import EthGenResponse
+
+# Image URLs that are never a person's photo: LinkedIn serves its "ghost" avatars as
+# static assets (real photos come from media.licdn.com), older pages link them from
+# its /ghosts/ theme directory, and lazy-loaded <img> tags start out with an inline GIF
+PLACEHOLDER_URL_PATTERNS = (
+    r"^https?://static(-exp\d+)?\.licdn\.com/",
+    r"^https?://(?:[\w-]+\.)*(?:licdn|linkedin)\.com/[^?#]*/(?:ghosts/|ghost_(?:person|company|school)_)",
+    r"^data:image/gif",
+)
+
+BLANK_IMAGE_HASH = 0  # Uniform images, which carry no information
+
+
+class ImageCache:
+    """
+    Local cache of EthGen answers keyed by a perceptual hash of the image, stored in a
+    SQLite file. The same photo re-downloaded, resized or recompressed hashes within
+    `max_distance` bits and is answered without a vision call.
+
+    Known placeholder avatars are kept in a blocklist (by hash and URL pattern); the
+    EthGen API skips them entirely so callers fall back to the name-based GenderAPI.
+
+        ethgen_api = ChatGPTEthGenAPI(api_key, image_cache=ImageCache("images.sqlite"))
+    """
+
+    def __init__(
+        self,
+        path: str = "masontilutils_images.sqlite",
+        max_distance: int = 4,
+        placeholder_urls: Iterable[str] = PLACEHOLDER_URL_PATTERNS,
+    ):
+        """
+        :param path: SQLite file to store hashes and answers in
+        :param max_distance: Largest number of differing hash bits still treated as the same image
+        :param placeholder_urls: Regular expressions of image URLs that are placeholder avatars
+        """
+        self.path = path
+        self.max_distance = max_distance
+        self.placeholder_urls = [re.compile(pattern) for pattern in placeholder_urls]
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            " hash TEXT PRIMARY KEY,"
+            " ethnicity TEXT,"
+            " sex TEXT,"
+            " placeholder INTEGER NOT NULL DEFAULT 0,"
+            " updated REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+        # Hashes are compared by Hamming distance, so they are all kept in memory
+        self._answers: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+        self._placeholders: Set[int] = {BLANK_IMAGE_HASH}
+        for key, ethnicity, sex, placeholder in self._conn.execute(
+                "SELECT hash, ethnicity, sex, placeholder FROM images"):
+            if placeholder:
+                self._placeholders.add(int(key, 16))
+            else:
+                self._answers[int(key, 16)] = (ethnicity, sex)
+
+    @staticmethod
+    def fingerprint(data: bytes) -> int:
+        """Perceptual hash of an encoded image."""
+        return image_hash(data)
+
+    def _nearest(self, fingerprint: int, hashes: Iterable[int]) -> Optional[int]:
+        if fingerprint in hashes:
+            return fingerprint
+        best, best_distance = None, self.max_distance + 1
+        for key in hashes:
+            distance = hash_distance(fingerprint, key)
+            if distance < best_distance:
+                best, best_distance = key, distance
+        return best
+
+    def is_placeholder(self, fingerprint: Optional[int] = None, url: Optional[str] = None) -> bool:
+        """Whether an image (by hash and/or URL) is a known placeholder avatar."""
+        if url is not None and any(pattern.search(url) for pattern in self.placeholder_urls):
+            return True
+        if fingerprint is None:
+            return False
+        with self._lock:
+            return self._nearest(fingerprint, self._placeholders) is not None
+
+    def get(self, fingerprint: int) -> Optional[EthGenResponse]:
+        """Return the answer for this image or a near duplicate, or None on a miss."""
+        with self._lock:
+            key = self._nearest(fingerprint, self._answers)
+            if key is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            ethnicity, sex = self._answers[key]
+        return EthGenResponse(ethnicity=ethnicity, sex=sex)
+
+    def set(self, fingerprint: int, response: EthGenResponse):
+        with self._lock:
+            self._answers[fingerprint] = (response.ethnicity, response.sex)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO images (hash, ethnicity, sex, placeholder, updated) VALUES (?, ?, ?, 0, ?)",
+                (f"{fingerprint:016x}", response.ethnicity, response.sex, time.time())
+            )
+            self._conn.commit()
+
+    def block(self, fingerprint: int):
+        """Add an image to the placeholder blocklist."""
+        with self._lock:
+            self._answers.pop(fingerprint, None)
+            self._placeholders.add(fingerprint)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO images (hash, ethnicity, sex, placeholder, updated) VALUES (?, NULL, NULL, 1, ?)",
+                (f"{fingerprint:016x}", time.time())
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._answers),
+            "placeholders": len(self._placeholders),
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
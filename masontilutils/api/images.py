@@ -0,0 +1,226 @@
+import base64
+import binascii
+import io
+import os
+import threading
+from typing import BinaryIO
+
+from masontilutils.api.deadline import current_deadline
+from masontilutils.api.pool import SessionPool
+
+
+def _pillow():
+    """Pillow is only needed for image preprocessing, so it is imported on first use."""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError as e:
+        raise ImportError("Image preprocessing requires Pillow: pip install pillow") from e
+    return Image, ImageOps
+
+
+_sessions = SessionPool(maxsize=8)  # Image downloads
+
+MAX_IMAGE_BYTES = 20 * 1024 * 1024  # OpenAI rejects larger images
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def _too_large(size: int, max_bytes: int) -> ValueError:
+    return ValueError(f"Image is {size} bytes, larger than the {max_bytes} byte limit")
+
+
+def load_image(image_path: str, is_url: bool = True, timeout: float = 10.0, max_bytes: int = MAX_IMAGE_BYTES) -> bytes:
+    """
+    The raw bytes of an image URL or local file. Downloads go through a shared session
+    pool; the timeout is cut to the deadline of the enclosing deadline_scope. Bodies are
+    streamed and the download stops once it passes `max_bytes`.
+
+    Raises ValueError for images larger than `max_bytes` and TimeoutError if the
+    deadline has already passed.
+    """
+    if not is_url:
+        with open(image_path, "rb") as image_file:
+            data = image_file.read(max_bytes + 1)
+        if len(data) > max_bytes:
+            raise _too_large(os.path.getsize(image_path), max_bytes)
+        return data
+
+    deadline = current_deadline()
+    if deadline is not None:
+        # requests rejects a zero timeout
+        if deadline.expired:
+            raise TimeoutError(f"Deadline exceeded before downloading {image_path}")
+        timeout = deadline.timeout(timeout)
+    with _sessions.session() as session:
+        response = session.get(image_path, timeout=timeout, stream=True)
+        try:
+            response.raise_for_status()
+            length = response.headers.get("Content-Length")
+            if length is not None and length.isdigit() and int(length) > max_bytes:
+                raise _too_large(int(length), max_bytes)
+            data = bytearray()
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                data += chunk
+                if len(data) > max_bytes:
+                    raise _too_large(len(data), max_bytes)
+        finally:
+            response.close()
+    return bytes(data)
+
+
+# Leading bytes of the image formats the vision models accept
+_MAGIC_NUMBERS = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def sniff_mime(data: bytes) -> str | None:
+    """MIME type of an encoded image from its magic bytes, or None if it isn't a known format."""
+    for magic, mime in _MAGIC_NUMBERS:
+        if data.startswith(magic):
+            return mime
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+ENCODE_CHUNK_SIZE = 3 * 64 * 1024  # A multiple of 3, so chunks encode without padding
+MAX_CONCURRENT_ENCODES = 4
+
+# Each encoding briefly holds its buffer and the decoded string (about 2.7x the image),
+# so the number running at once is bounded rather than growing with the thread count
+_encode_slots = threading.BoundedSemaphore(MAX_CONCURRENT_ENCODES)
+
+
+def _read_into(stream: BinaryIO, view: memoryview) -> int:
+    """Fill `view` from `stream`, short only at the end of the stream."""
+    filled = 0
+    while filled < len(view):
+        n = stream.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    return filled
+
+
+def _encode_stream(stream: BinaryIO, size: int, chunk_size: int) -> str:
+    chunk = bytearray(chunk_size)
+    view = memoryview(chunk)
+    n = _read_into(stream, view)
+    mime = sniff_mime(chunk[:n])
+    if mime is None:
+        raise ValueError("Not a JPEG, PNG, GIF or WebP image")
+
+    prefix = f"data:{mime};base64,".encode("ascii")
+    out = bytearray(len(prefix) + 4 * ((size + 2) // 3))
+    out[:len(prefix)] = prefix
+    pos = len(prefix)
+    while n:
+        encoded = binascii.b2a_base64(view[:n], newline=False)
+        out[pos:pos + len(encoded)] = encoded
+        pos += len(encoded)
+        if n < chunk_size:
+            break
+        n = _read_into(stream, view)
+    # The file may have shrunk since it was measured
+    del out[pos:]
+    return out.decode("ascii")
+
+
+def encode_data_uri(source: str | bytes, max_bytes: int = MAX_IMAGE_BYTES, chunk_size: int = ENCODE_CHUNK_SIZE) -> str:
+    """
+    Base64 data URI of a local image file (or of an image's bytes), with the MIME type
+    sniffed from its magic bytes. The file is encoded `chunk_size` bytes at a time into
+    one preallocated buffer, so it is never held in memory whole next to its encoding,
+    and at most MAX_CONCURRENT_ENCODES images are encoded at once across threads.
+
+    Raises ValueError for images larger than `max_bytes` or of an unsupported format.
+    """
+    if chunk_size % 3:
+        raise ValueError("chunk_size must be a multiple of 3")
+    if isinstance(source, (bytes, bytearray)):
+        if len(source) > max_bytes:
+            raise _too_large(len(source), max_bytes)
+        with _encode_slots:
+            return _encode_stream(io.BytesIO(source), len(source), chunk_size)
+
+    with open(source, "rb") as image_file:
+        size = os.fstat(image_file.fileno()).st_size
+        if size > max_bytes:
+            raise _too_large(size, max_bytes)
+        with _encode_slots:
+            return _encode_stream(image_file, size, chunk_size)
+
+
+def image_hash(data: bytes, hash_size: int = 8) -> int:
+    """
+    Perceptual difference hash (dHash) of an encoded image: a `hash_size`² bit integer
+    that stays the same or differs in a few bits when the image is re-encoded,
+    resized or recompressed. Compare hashes with `hash_distance`.
+    """
+    Image, _ = _pillow()
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft("L", (hash_size * 8, hash_size * 8))
+        pixels = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS).tobytes()
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def hash_distance(a: int, b: int) -> int:
+    """Number of differing bits between two image hashes."""
+    return (a ^ b).bit_count()
+
+
+class ImagePreprocessor:
+    """
+    Shrinks profile pictures before they are sent to a vision model: the image is
+    downloaded (or read) once, centre-cropped to a square of at most `size` pixels,
+    re-encoded as a compact JPEG and sent as a data URI with `detail` "low", which
+    OpenAI bills at a fixed 85 tokens per image.
+
+        ethgen_api = ChatGPTEthGenAPI(api_key, preprocessor=ImagePreprocessor())
+    """
+    def __init__(self, size: int = 512, quality: int = 85, detail: str = "low", timeout: float = 10.0):
+        """
+        :param size: Side of the square image in pixels; smaller images are not upscaled
+        :param quality: JPEG quality of the re-encoded image
+        :param detail: Vision detail level sent with the image ("low", "high" or "auto")
+        :param timeout: Download timeout in seconds, cut to the deadline of the enclosing deadline_scope
+        """
+        _pillow()
+        self.size = size
+        self.quality = quality
+        self.detail = detail
+        self.timeout = timeout
+
+    def load(self, image_path: str, is_url: bool = True) -> bytes:
+        """The raw bytes of an image URL or local file."""
+        return load_image(image_path, is_url, self.timeout)
+
+    def process(self, data: bytes) -> bytes:
+        """Crop and downscale an encoded image to a square JPEG."""
+        Image, ImageOps = _pillow()
+        with Image.open(io.BytesIO(data)) as image:
+            # Let the JPEG decoder downscale while decoding instead of decoding full size
+            image.draft("RGB", (self.size, self.size))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            side = min(self.size, *image.size)
+            image = ImageOps.fit(image, (side, side), Image.Resampling.LANCZOS)
+
+            output = io.BytesIO()
+            image.save(output, format="JPEG", quality=self.quality, optimize=True)
+            return output.getvalue()
+
+    def data_uri(self, image_path: str, is_url: bool = True, data: bytes | None = None) -> str:
+        """
+        The preprocessed image as a base64 JPEG data URI.
+        :param data: The image's bytes if they have already been loaded
+        """
+        jpeg = self.process(data if data is not None else self.load(image_path, is_url))
+        return f"data:image/jpeg;base64,{base64.b64encode(jpeg).decode('ascii')}"
@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, Optional
+
+from masontilutils.api.usage import UsageCollector, collect_usage, usage_cost
+
+
+class BudgetExceededError(Exception):
+    """Raised by `CostLedger.check` once a run has spent its budget."""
+
+    def __init__(self, spent: float, budget: float):
+        super().__init__(f"Budget of ${budget:.2f} exceeded: ${spent:.4f} spent")
+        self.spent = spent
+        self.budget = budget
+
+
+@dataclass
+class CostTotals:
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, prompt_tokens: int, completion_tokens: int, cost: float):
+        self.requests += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += cost
+
+
+class CostLedger:
+    """
+    Token usage and USD cost of an enrichment run, rolled up per run, per request ID,
+    per API and per model. Costs use the prices in `masontilutils.api.usage.MODEL_PRICES`.
+
+    Requests are attributed inside `track` blocks. With a `budget`, the API transports
+    stop sending once the run has spent it and `check` raises BudgetExceededError,
+    which a batch loop calls before each item to stop the batch:
+
+        ledger = CostLedger(budget=25.0, path="costs.jsonl")
+        for row in rows:
+            ledger.check()
+            with ledger.track(row.id):
+                api.call(...)
+        print(ledger.report())
+    """
+
+    def __init__(self, budget: Optional[float] = None, path: Optional[str] = None):
+        """
+        :param budget: Hard cap in USD for the run; None for no cap
+        :param path: Optional JSON lines file every request's usage is appended to
+        """
+        self.budget = budget
+        self.path = path
+        self.total = CostTotals()
+        self.by_request: Dict[str, CostTotals] = {}
+        self.by_api: Dict[str, CostTotals] = {}
+        self.by_model: Dict[str, CostTotals] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def exceeded(self) -> bool:
+        return self.budget is not None and self.total.cost >= self.budget
+
+    def check(self):
+        """Raise BudgetExceededError if the run has spent its budget."""
+        if self.exceeded:
+            raise BudgetExceededError(self.total.cost, self.budget)
+
+    def record(self, request_id: Optional[str], api: Optional[str], model: Optional[str], usage: Dict[str, Any]):
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or 0
+        cost = usage_cost(model, usage)
+        with self._lock:
+            self.total.add(prompt_tokens, completion_tokens, cost)
+            for totals, key in (
+                (self.by_request, request_id),
+                (self.by_api, api or "unknown"),
+                (self.by_model, model or "unknown"),
+            ):
+                if key is not None:
+                    totals.setdefault(key, CostTotals()).add(prompt_tokens, completion_tokens, cost)
+            if self.path is not None:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({
+                        "time": time.time(),
+                        "request_id": request_id,
+                        "api": api,
+                        "model": model,
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "cost": cost,
+                    }) + "\n")
+
+    @contextmanager
+    def track(self, request_id: Optional[str] = None) -> Iterator[UsageCollector]:
+        """Attribute the API requests made by this thread or task inside the block to `request_id`."""
+        with collect_usage(_LedgerCollector(self, request_id)) as collector:
+            yield collector
+
+    def report(self) -> Dict[str, Any]:
+        """The run's totals and the per request, API and model breakdowns."""
+        with self._lock:
+            return {
+                "run": asdict(self.total),
+                "budget": self.budget,
+                "by_api": {key: asdict(value) for key, value in self.by_api.items()},
+                "by_model": {key: asdict(value) for key, value in self.by_model.items()},
+                "by_request": {key: asdict(value) for key, value in self.by_request.items()},
+            }
+
+
+class _LedgerCollector(UsageCollector):
+    """Usage collector of one `CostLedger.track` block, forwarding every request to the ledger."""
+
+    def __init__(self, ledger: CostLedger, request_id: Optional[str]):
+        super().__init__()
+        self.ledger = ledger
+        self.request_id = request_id
+
+    @property
+    def budget_exceeded(self) -> bool:
+        return self.ledger.exceeded
+
+    def add(self, model: Optional[str], usage: Dict[str, Any], api: Optional[str] = None):
+        super().add(model, usage, api)
+        self.ledger.record(self.request_id, api, model, usage)
@@ -0,0 +1,117 @@
+import os
+import threading
+from typing import Dict, List, Optional
+
+from masontilutils.api.queries.enums import Sex
+from masontilutils.api.responses.ethgen.ethgen import GenderResponse
+
+# Column order of the counts stored per name; "None" counts answers without a sex (e.g. initials)
+_COLUMNS = [Sex.MALE.value, Sex.FEMALE.value, "None"]
+
+
+class NameLexicon:
+    """
+    Local first name -> sex table placed in front of ChatGPTGenderAPI. Every model
+    answer is counted per first name; once a name has been seen `min_count` times
+    with one answer making up at least `min_confidence` of them, it is answered
+    in-process and never sent to the model again.
+
+    The table is a tab-separated file (name, male, female, none counts) that is read
+    on first lookup and written back by `save`, every `autosave_every` new answers.
+
+        lexicon = NameLexicon("names.tsv")
+        gender_api = ChatGPTGenderAPI(api_key, lexicon=lexicon)
+    """
+
+    def __init__(
+        self,
+        path: str = "masontilutils_names.tsv",
+        min_count: int = 3,
+        min_confidence: float = 0.9,
+        autosave_every: int = 100,
+    ):
+        """
+        :param path: TSV file the lexicon is loaded from and saved to
+        :param min_count: Number of answers recorded for a name before it is trusted
+        :param min_confidence: Share of answers the most common answer must have to be trusted
+        :param autosave_every: Save after this many new answers (0 to only save explicitly)
+        """
+        self.path = path
+        self.min_count = min_count
+        self.min_confidence = min_confidence
+        self.autosave_every = autosave_every
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.RLock()
+        self._counts: Dict[str, List[int]] | None = None
+        self._unsaved = 0
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return name.strip().lower()
+
+    def _load(self) -> Dict[str, List[int]]:
+        if self._counts is None:
+            counts: Dict[str, List[int]] = {}
+            if os.path.exists(self.path):
+                with open(self.path, encoding="utf-8") as f:
+                    for line in f:
+                        fields = line.rstrip("\n").split("\t")
+                        if len(fields) != len(_COLUMNS) + 1 or not fields[0]:
+                            continue
+                        try:
+                            counts[fields[0]] = [int(count) for count in fields[1:]]
+                        except ValueError:
+                            continue
+            self._counts = counts
+        return self._counts
+
+    def confidence(self, name: str) -> tuple[GenderResponse | None, float, int]:
+        """Return the most common answer for a name, its share of answers and the answer count."""
+        with self._lock:
+            counts = self._load().get(self._key(name))
+        if not counts or not sum(counts):
+            return None, 0.0, 0
+        total = sum(counts)
+        best = max(range(len(_COLUMNS)), key=counts.__getitem__)
+        sex = _COLUMNS[best] if _COLUMNS[best] != "None" else None
+        return GenderResponse(sex=sex), counts[best] / total, total
+
+    def lookup(self, name: str) -> Optional[GenderResponse]:
+        """Answer a first name from the table, or None if it is unknown or ambiguous."""
+        response, confidence, total = self.confidence(name)
+        with self._lock:
+            if response is None or total < self.min_count or confidence < self.min_confidence:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return response
+
+    def record(self, name: str, response: GenderResponse):
+        """Count a model answer for a first name."""
+        key = self._key(name)
+        if not key or "\t" in key:
+            return
+        column = _COLUMNS.index(response.sex) if response.sex in _COLUMNS else _COLUMNS.index("None")
+        with self._lock:
+            counts = self._load().setdefault(key, [0] * len(_COLUMNS))
+            counts[column] += 1
+            self._unsaved += 1
+            if self.autosave_every and self._unsaved >= self.autosave_every:
+                self.save()
+
+    def save(self):
+        """Write the table back to disk atomically."""
+        with self._lock:
+            counts = self._load()
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for name in sorted(counts):
+                    f.write("\t".join([name, *map(str, counts[name])]) + "\n")
+            os.replace(tmp_path, self.path)
+            self._unsaved = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
@@ -0,0 +1,102 @@
+import ast
+import json
+import re
+from typing import Any, Optional, Tuple
+
+_decoder = json.JSONDecoder()
+
+# Openings of candidate JSON values
+_OPEN = re.compile(r"[\[{]")
+# Quoted strings (skipped as a whole) and brackets, for finding the end of a candidate
+_TOKEN = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\\n])*\'|[\[\]{}]')
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+# JSON literals outside of strings, mapped to Python literals for ast.literal_eval
+_LITERAL = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\\n])*\'|\b(null|true|false)\b')
+_PYTHON_LITERALS = {"null": "None", "true": "True", "false": "False"}
+
+MAX_CANDIDATES = 64
+
+
+class LLMJSONError(ValueError):
+    """No JSON object or array could be parsed from a model answer."""
+
+
+def _balanced_end(text: str, start: int) -> Optional[int]:
+    """Index after the bracket closing the one at `start`, skipping quoted strings."""
+    stack = []
+    for match in _TOKEN.finditer(text, start):
+        token = match.group()
+        if token in "{[":
+            stack.append(token)
+        elif token in "}]":
+            if not stack:
+                continue
+            if (token == "}") == (stack[-1] == "{"):
+                stack.pop()
+                if not stack:
+                    return match.end()
+    return None
+
+
+def _parse_tolerant(snippet: str) -> Any:
+    """Parse trailing-comma, single-quoted or Python literal output. Never evaluates code."""
+    without_commas = _TRAILING_COMMA.sub(r"\1", snippet)
+    try:
+        return json.loads(without_commas)
+    except ValueError:
+        pass
+    python = _LITERAL.sub(lambda m: _PYTHON_LITERALS[m.group(1)] if m.group(1) else m.group(), without_commas)
+    value = ast.literal_eval(python)
+    if not isinstance(value, (dict, list)):
+        raise ValueError(f"Not a JSON object or array: {type(value).__name__}")
+    return value
+
+
+def find_json(text: str) -> Optional[Tuple[Any, int, int]]:
+    """
+    Find the first JSON object or array in a model answer.
+
+    Each `{` or `[` is tried in order: first as strict JSON with
+    `json.JSONDecoder.raw_decode`, then, up to its matching bracket, as single-quoted,
+    Python literal or trailing-comma output. Stray brackets in prose ("CEO {founder}")
+    and template leftovers ("{{...}}") are skipped.
+
+    A balanced candidate that can't be parsed is skipped as a whole, so a malformed
+    answer never yields one of its nested objects as if it were the answer.
+
+    :return: (value, start, end) of the first parseable candidate, or None
+    """
+    resume = 0
+    for attempt, match in enumerate(_OPEN.finditer(text)):
+        if attempt >= MAX_CANDIDATES:
+            break
+        start = match.start()
+        if start < resume:
+            continue
+        try:
+            value, end = _decoder.raw_decode(text, start)
+            return value, start, end
+        except ValueError:
+            pass
+        end = _balanced_end(text, start)
+        if end is None:
+            continue
+        try:
+            return _parse_tolerant(text[start:end]), start, end
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            # Only a doubled bracket ("{{...}}") is retried from the inside, since its
+            # inner value spans the whole candidate
+            doubled = text[start + 1:start + 2] in ("{", "[") and _balanced_end(text, start + 1) == end - 1
+            resume = start + 1 if doubled else end
+    return None
+
+
+def parse_json(text: str) -> Any:
+    """
+    The first JSON object or array in a model answer (see `find_json`).
+    Raises LLMJSONError, a ValueError, when there is none.
+    """
+    found = find_json(text)
+    if found is None:
+        raise LLMJSONError(f"No JSON found in answer: {text[:100]!r}")
+    return found[0]
@@ -0,0 +1,186 @@
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# Latency buckets in seconds; deep research calls take minutes, vision calls a few seconds
+DEFAULT_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# name -> (type, help)
+METRICS = {
+    "masontilutils_request_duration_seconds": ("histogram", "Upstream API call latency including retries"),
+    "masontilutils_requests_total": ("counter", "Upstream API calls by result status"),
+    "masontilutils_retries_total": ("counter", "Retried API requests by the status that caused the retry"),
+    "masontilutils_rate_limited_total": ("counter", "API responses with status 429"),
+    "masontilutils_parse_failures_total": ("counter", "Model answers that could not be parsed"),
+    "masontilutils_json_repairs_total": ("counter", "Unparseable answers sent to the JSON repair model, by result"),
+    "masontilutils_prompt_tokens_total": ("counter", "Prompt tokens reported in response usage"),
+    "masontilutils_completion_tokens_total": ("counter", "Completion tokens reported in response usage"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and latency histograms, rendered in the Prometheus text
+    exposition format. The API transports record into the module-level `registry`;
+    export it with `write_metrics(path)` or `serve_metrics(port)`.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        :param buckets: Upper bounds of the histogram buckets, in increasing order
+        """
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}  # bucket counts + [sum, count]
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            counts = series.get(key)
+            if counts is None:
+                counts = series[key] = [0.0] * (len(self.buckets) + 2)
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def value(self, name: str, **labels) -> float:
+        """Current value of a counter, or the observation count of a histogram."""
+        key = _labels(labels)
+        with self._lock:
+            if name in self._histograms:
+                counts = self._histograms[name].get(key)
+                return counts[-1] if counts else 0.0
+            return self._counters.get(name, {}).get(key, 0.0)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {k: list(v) for k, v in series.items()} for name, series in self._histograms.items()}
+
+        for name in sorted(set(counters) | set(histograms)):
+            kind, help_text = METRICS.get(name, ("histogram" if name in histograms else "counter", ""))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(counters.get(name, {}).items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            for labels, counts in sorted(histograms.get(name, {}).items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {_format_value(cumulative)}")
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {_format_value(counts[-1])}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(counts[-2])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {_format_value(counts[-1])}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def record_request(api: str, seconds: float, result: Dict[str, Any]):
+    """Record one upstream call and its latency; called by the API transports."""
+    status = "ok" if "error" not in result else str(result.get("status_code") or "error")
+    registry.observe("masontilutils_request_duration_seconds", seconds, api=api)
+    registry.inc("masontilutils_requests_total", api=api, status=status)
+
+
+def record_retry(api: str, status_code: Optional[int]):
+    """Record a retried request; called by the API transports."""
+    registry.inc("masontilutils_retries_total", api=api, status=str(status_code or "error"))
+    if status_code == 429:
+        record_rate_limited(api)
+
+
+def record_rate_limited(api: str):
+    """Record a 429 response that is not retried."""
+    registry.inc("masontilutils_rate_limited_total", api=api)
+
+
+def record_parse_failure(api: str):
+    """Record a model answer that could not be parsed."""
+    registry.inc("masontilutils_parse_failures_total", api=api)
+
+
+def record_repair(api: str, repaired: bool):
+    """Record an unparseable answer of `api` sent for JSON repair, and whether it was recovered."""
+    registry.inc("masontilutils_json_repairs_total", api=api, result="ok" if repaired else "failed")
+
+
+def record_tokens(api: str, model: Optional[str], usage: Optional[Dict[str, Any]]):
+    """Record the prompt and completion tokens of a response's `usage`."""
+    if not usage:
+        return
+    model = model or "unknown"
+    registry.inc("masontilutils_prompt_tokens_total", usage.get("prompt_tokens") or 0, api=api, model=model)
+    registry.inc("masontilutils_completion_tokens_total", usage.get("completion_tokens") or 0, api=api, model=model)
+
+
+def write_metrics(path: str):
+    """Write the metrics to `path` atomically, e.g. for the node exporter textfile collector."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(tmp_path, path)
+
+
+def serve_metrics(port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve the metrics over HTTP from a daemon thread for Prometheus to scrape.
+    Call `shutdown()` on the returned server to stop it.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,17 +1,14 @@
 import json
 import re
-import threading
 import time
 import ast
-from typing import Any, Dict, List, Optional
-from requests.adapters import HTTPAdapter
+from typing import Any, Dict, List, Optional, Sequence
 
-import requests
-from urllib3 import Retry
+from masontilutils.api.streaming import read_completion_stream, read_completion_stream_async
+from masontilutils.api.transport import ThreadedChatCompletionsAPI
 
-class ThreadedPerplexitySonarAPI:
-    _session_lock = threading.Lock()
-    _sessions = {}
+class ThreadedPerplexitySonarAPI(ThreadedChatCompletionsAPI):
+    provider = "perplexity"
     
     def __init__(self, api_key: str):
         """
@@ -25,28 +22,7 @@ class ThreadedPerplexitySonarAPI:
             "Content-Type": "application/json"
         }
         
-    @property
-    def session(self):
-        """Get or create a requests session for the current thread"""
-        thread_id = threading.get_ident()
-        
-        with self._session_lock:
-            if thread_id not in self._sessions:
-                session = requests.Session()
-                # Configure retry strategy
-                retry_strategy = Retry(
-                    total=3,
-                    backoff_factor=0.5,
-                    status_forcelist=[429, 500, 502, 503, 504]
-                )
-                adapter = HTTPAdapter(max_retries=retry_strategy)
-                session.mount("https://", adapter)
-                session.mount("http://", adapter)
-                self._sessions[thread_id] = session
-                
-            return self._sessions[thread_id]
-
-    def execute_query(
+    def _build_payload(
         self,
         query: str = None,
         model: str = "sonar-pro",
@@ -69,54 +45,61 @@ class ThreadedPerplexitySonarAPI:
         if max_tokens is not None:
             payload["max_tokens"] = max_tokens
 
-        max_retries = 5
-        base_delay = 5  # Base delay in seconds
-        current_retry = 0
+        return payload
 
-        while current_retry < max_retries:
-            try:
-                response = self.session.post(
-                    self.base_url,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=500
-                )
-                response.raise_for_status()
-                return response.json()
+    def execute_query(
+        self,
+        query: str = None,
+        model: str = "sonar-pro",
+        max_tokens: Optional[int] = 2500,
+        temperature: float = 0.1,
+        **additional_args
+    ) -> Dict[str, Any]:
+        payload = self._build_payload(query, model, max_tokens, temperature, **additional_args)
+        return self._post(payload)
 
-            except requests.exceptions.HTTPError as e:
-                print(f"API request failed: {str(e)}")
-                if e.response.status_code == 429:
-                    # Get rate limit information from headers
-                    retry_after = int(e.response.headers.get('Retry-After', base_delay * (2 ** current_retry)))
-                    reset_time = e.response.headers.get('X-RateLimit-Reset')
-                    
-                    print(f"Rate limit exceeded. Retry after {retry_after} seconds.")
-                    if reset_time:
-                        print(f"Rate limit resets at: {reset_time}")
-                    
-                    # Sleep for the specified time
-                    time.sleep(retry_after)
-                    current_retry += 1
-                    continue
-                else:
-                    print(f"API request failed: {str(e)}",
-                        f"Status code: {e.response.status_code if hasattr(e, 'response') and e.response else None}")
-                    return {
-                        "error": f"API request failed: {str(e)}",
-                        "status_code": e.response.status_code if hasattr(e, 'response') and e.response else None
-                    }
+    async def execute_query_async(
+        self,
+        query: str = None,
+        model: str = "sonar-pro",
+        max_tokens: Optional[int] = 2500,
+        temperature: float = 0.1,
+        **additional_args
+    ) -> Dict[str, Any]:
+        """
+        Asyncio variant of `execute_query`. Concurrency is capped per event loop
+        by `max_concurrency` instead of one OS thread per in-flight request.
+        """
+        payload = self._build_payload(query, model, max_tokens, temperature, **additional_args)
+        return await self._post_async(payload)
 
-            except requests.exceptions.RequestException as e:
-                print(f"API request failed: {str(e)}",
-                    f"Status code: {e.response.status_code if hasattr(e, 'response') and e.response else None}")
-                return {
-                    "error": f"API request failed: {str(e)}",
-                    "status_code": e.response.status_code if hasattr(e, 'response') and e.response else None
-                }
+    def execute_query_stream(
+        self,
+        query: str = None,
+        model: str = "sonar-pro",
+        max_tokens: Optional[int] = 2500,
+        temperature: float = 0.1,
+        stop_markers: Sequence[str] = (),
+        **additional_args
+    ) -> Dict[str, Any]:
+        """
+        Variant of `execute_query` that streams the completion over server-sent events.
+        <think> sections are discarded as they arrive and the stream is closed as soon
+        as a complete JSON object or one of `stop_markers` has been received. The
+        result has the same shape as a regular completion, without the <think> text.
+        """
+        payload = self._build_payload(query, model, max_tokens, temperature, stream=True, **additional_args)
+        return self._post(payload, lambda response: read_completion_stream(response, stop_markers))
 
-        # If we've exhausted all retries
-        return {
-            "error": "Max retries exceeded for rate limit",
-            "status_code": 429
-        } 
\ No newline at end of file
+    async def execute_query_stream_async(
+        self,
+        query: str = None,
+        model: str = "sonar-pro",
+        max_tokens: Optional[int] = 2500,
+        temperature: float = 0.1,
+        stop_markers: Sequence[str] = (),
+        **additional_args
+    ) -> Dict[str, Any]:
+        """Asyncio variant of `execute_query_stream`."""
+        payload = self._build_payload(query, model, max_tokens, temperature, stream=True, **additional_args)
+        return await self._post_async(payload, lambda response: read_completion_stream_async(response, stop_markers))
@@ -1,21 +1,21 @@
 from typing import Optional
 
 from masontilutils.api.perplexity.base import ThreadedPerplexitySonarAPI
+from masontilutils.api.failover import FailoverMixin
 from masontilutils.api.queries.industry import DESCRIPTION_QUERY, DESCRIPTION_OUTPUT_SYSTEM_MESSAGE
 from masontilutils.utils import clean_deep_research_text
 
 
-class PerplexityBusinessDescAPI(ThreadedPerplexitySonarAPI):
-    def __init__(self, api_key: str):
+class PerplexityBusinessDescAPI(FailoverMixin, ThreadedPerplexitySonarAPI):
+    def __init__(self, api_key: str, fallback=None):
+        """
+        :param api_key: Your Perplexity API key
+        :param fallback: DeepseekBusinessDescriptionAPI to fail over to when this provider is unavailable
+        """
         super().__init__(api_key=api_key)
+        self.fallback = fallback
 
-    def call(self,
-             company_name: str,
-             city: str,
-             state: str,
-             address: str,
-        ) -> str | None:
-
+    def _build_messages(self, company_name: str, city: str, state: str, address: str) -> list[dict]:
         system_role = {"role": "system", "content": DESCRIPTION_OUTPUT_SYSTEM_MESSAGE}
 
         query = DESCRIPTION_QUERY.format(
@@ -25,12 +25,12 @@ class PerplexityBusinessDescAPI(ThreadedPerplexitySonarAPI):
             address=address
         )
 
-        response = super().execute_query(
-            messages=[
-                system_role,
-                {"role": "user", "content": query}
-            ]
-        )
+        return [
+            system_role,
+            {"role": "user", "content": query}
+        ]
+
+    def _handle_response(self, response: dict) -> str | None:
         if "error" not in response:
             answer = response["choices"][0]["message"]["content"]
             if "None" in answer:
@@ -38,4 +38,32 @@ class PerplexityBusinessDescAPI(ThreadedPerplexitySonarAPI):
             return clean_deep_research_text(answer)
         else:
             print(f"Error: {response['error']}")
-            return None 
\ No newline at end of file
+            return None
+
+    def _query(self, company_name: str, city: str, state: str, address: str) -> dict:
+        return super().execute_query(
+            messages=self._build_messages(company_name, city, state, address)
+        )
+
+    async def _query_async(self, company_name: str, city: str, state: str, address: str) -> dict:
+        return await super().execute_query_async(
+            messages=self._build_messages(company_name, city, state, address)
+        )
+
+    def call(self,
+             company_name: str,
+             city: str,
+             state: str,
+             address: str,
+        ) -> str | None:
+
+        return self._call_with_failover(company_name, city, state, address)
+
+    async def call_async(self,
+             company_name: str,
+             city: str,
+             state: str,
+             address: str,
+        ) -> str | None:
+
+        return await self._call_with_failover_async(company_name, city, state, address)
@@ -1,6 +1,8 @@
 import re
 from typing import List, Dict
 
+from masontilutils.api.llm_json import parse_json
+from masontilutils.api.metrics import record_parse_failure
 from masontilutils.api.perplexity.base import ThreadedPerplexitySonarAPI
 from masontilutils.api.queries.email import (
     EMAIL_OUTPUT_SYSTEM_MESSAGE, 
@@ -8,7 +10,6 @@ from masontilutils.api.queries.email import (
     EMAIL_QUERY, 
     EMAIL_QUERY_WITH_CONTACT
 )
-from masontilutils.utils import extract_json_substring
 
 
 class PerplexityEmailAPI(ThreadedPerplexitySonarAPI):
@@ -29,12 +30,12 @@ class PerplexityEmailAPI(ThreadedPerplexitySonarAPI):
                 })
         return emails
 
-    def call(self,
+    def _build_messages(self,
              company_name: str,
              city: str,
              state: str,
              contact: str | None = None,
-        ) -> dict:
+        ) -> list[dict]:
 
         system_role = {"role": "system", "content": EMAIL_OUTPUT_SYSTEM_MESSAGE}
 
@@ -54,21 +55,45 @@ class PerplexityEmailAPI(ThreadedPerplexitySonarAPI):
                 FORMAT=EMAIL_JSON_FORMAT
             )
 
-        response = super().execute_query(
-            messages=[
-                system_role,
-                {"role": "user", "content": query}
-            ]
-        )
+        return [
+            system_role,
+            {"role": "user", "content": query}
+        ]
+
+    def _handle_response(self, response: dict) -> List[dict]:
         if "error" not in response:
             answer = response["choices"][0]["message"]["content"]
-            json_string = extract_json_substring(answer)
             try:
-                results = eval(json_string)
+                results = parse_json(answer)
                 return self.build_response(results)
             except Exception as e:
+                record_parse_failure(type(self).__name__)
                 print(f"Error parsing response: {e}")
                 return []
         else:
             print(f"Error: {response['error']}")
-            return [] 
\ No newline at end of file
+            return []
+
+    def call(self,
+             company_name: str,
+             city: str,
+             state: str,
+             contact: str | None = None,
+        ) -> dict:
+
+        response = super().execute_query(
+            messages=self._build_messages(company_name, city, state, contact)
+        )
+        return self._handle_response(response)
+
+    async def call_async(self,
+             company_name: str,
+             city: str,
+             state: str,
+             contact: str | None = None,
+        ) -> dict:
+
+        response = await super().execute_query_async(
+            messages=self._build_messages(company_name, city, state, contact)
+        )
+        return self._handle_response(response)
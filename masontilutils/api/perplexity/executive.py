@@ -1,9 +1,12 @@
 import re
 from typing import List, Dict, Optional
 
+from masontilutils.api.deadline import Deadline, deadline_scope
 from masontilutils.api.perplexity.base import ThreadedPerplexitySonarAPI
 from masontilutils.api.queries.ethgen import (
-    EXECUTIVE_OUTPUT_SYSTEM_MESSAGE
+    EXECUTIVE_OUTPUT_SYSTEM_MESSAGE,
+    EXECUTIVE_NONE_IDENTIFIER,
+    PUBLICALLY_TRADED_IDENTIFIER,
 )
 from masontilutils.api.requests.executive.executive import (
     ExecutiveRequest,
@@ -12,47 +15,93 @@ from masontilutils.api.requests.executive.executive import (
 from masontilutils.api.responses.executive.executive import ExecutiveResponse, build_executive_response
 
 
+# Answers that end a streamed response before any JSON arrives
+STOP_MARKERS = (EXECUTIVE_NONE_IDENTIFIER, PUBLICALLY_TRADED_IDENTIFIER)
+
+
 class PerplexityExecutiveAPI(ThreadedPerplexitySonarAPI):
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, stream: bool = False, repair=None):
+        """
+        :param api_key: Your Perplexity API key
+        :param stream: Stream deep research answers by default, stopping once the answer is complete
+        :param repair: ChatGPTJSONRepairAPI reformatting unparseable answers instead of discarding them
+        """
         super().__init__(api_key=api_key)
         self.system_message = {"role": "system", "content": EXECUTIVE_OUTPUT_SYSTEM_MESSAGE}
+        self.stream = stream
+        self.repair = repair
+
+    def _build_executive_payload(self, company_name: str, city: str, state: str, address: str) -> dict:
+        request = ExecutiveRequest(
+            company_name=company_name,
+            city=city,
+            state=state,
+            address=address
+        )
+        return build_executive_payload(
+            self.system_message,
+            request,
+            model="sonar-deep-research",
+            max_tokens=1000,
+            temperature=0.0,
+        )
+
+    def _handle_response(self, response: dict) -> ExecutiveResponse | None:
+        if "error" in response:
+            print(f"Error: {response['error']}")
+            return None
+
+        # Extract and validate the response
+        answer = response["choices"][0]["message"]["content"]
+        result: ExecutiveResponse = build_executive_response(answer, repair=self.repair)
+        return result
 
     def call(self,
              company_name: str,
              city: str,
              state: str,
              address: str,
+             stream: bool | None = None,
+             deadline: Deadline | None = None,
         ) -> ExecutiveResponse | None:
 
         try:
-
-            request = ExecutiveRequest(
-                company_name=company_name,
-                city=city,
-                state=state,
-                address=address
-            )
-            payload = build_executive_payload(
-                self.system_message,
-                request,
-                model="sonar-deep-research",
-                max_tokens=1000,
-                temperature=0.0,
-            )
-
-            response = self.execute_query(**payload)
-
-            if "error" in response:
-                print(f"Error: {response['error']}")
-                return None
-
-            # Extract and validate the response
-            answer = response["choices"][0]["message"]["content"]
-            result: ExecutiveResponse = build_executive_response(answer)
-            return result
+            payload = self._build_executive_payload(company_name, city, state, address)
+            with deadline_scope(deadline):
+                if self.stream if stream is None else stream:
+                    response = self.execute_query_stream(stop_markers=STOP_MARKERS, **payload)
+                else:
+                    response = self.execute_query(**payload)
+                # The repair of a malformed answer is bounded by the deadline too
+                return self._handle_response(response)
             
         except Exception as e:
             print(f"Error processing executive search: {str(e)}")
             import traceback
             traceback.print_exc()
-            return None 
\ No newline at end of file
+            return None
+
+    async def call_async(self,
+             company_name: str,
+             city: str,
+             state: str,
+             address: str,
+             stream: bool | None = None,
+             deadline: Deadline | None = None,
+        ) -> ExecutiveResponse | None:
+
+        try:
+            payload = self._build_executive_payload(company_name, city, state, address)
+            with deadline_scope(deadline):
+                if self.stream if stream is None else stream:
+                    response = await self.execute_query_stream_async(stop_markers=STOP_MARKERS, **payload)
+                else:
+                    response = await self.execute_query_async(**payload)
+                # The repair of a malformed answer is bounded by the deadline too
+                return self._handle_response(response)
+
+        except Exception as e:
+            print(f"Error processing executive search: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return None
@@ -13,12 +13,7 @@ class PerplexityNAICSCodeAPI(ThreadedPerplexitySonarAPI):
         naics_codes = re.findall(r'\d{6}', str)
         return naics_codes[0] if naics_codes else None
 
-    def call(self,
-             company_name: str,
-             city: str,
-             state: str,
-        ) -> str | None:
-
+    def _build_messages(self, company_name: str, city: str, state: str) -> list[dict]:
         system_role = {"role": "system", "content": CODE_OUTPUT_SYSTEM_MESSAGE}
 
         query = NAICS_CODE_QUERY.format(
@@ -27,15 +22,37 @@ class PerplexityNAICSCodeAPI(ThreadedPerplexitySonarAPI):
             state=state
         )
 
-        response = super().execute_query(
-            messages=[
-                system_role,
-                {"role": "user", "content": query}
-            ]
-        )
+        return [
+            system_role,
+            {"role": "user", "content": query}
+        ]
+
+    def _handle_response(self, response: dict) -> str | None:
         if "error" not in response:
             answer = response["choices"][0]["message"]["content"]
             return self.extract_code(answer)
         else:
             print(f"Error: {response['error']}")
-            return None 
\ No newline at end of file
+            return None
+
+    def call(self,
+             company_name: str,
+             city: str,
+             state: str,
+        ) -> str | None:
+
+        response = super().execute_query(
+            messages=self._build_messages(company_name, city, state)
+        )
+        return self._handle_response(response)
+
+    async def call_async(self,
+             company_name: str,
+             city: str,
+             state: str,
+        ) -> str | None:
+
+        response = await super().execute_query_async(
+            messages=self._build_messages(company_name, city, state)
+        )
+        return self._handle_response(response)
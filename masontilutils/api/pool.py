@@ -0,0 +1,147 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+
+def new_session() -> requests.Session:
+    """A requests session with the retry strategy shared by the chat completion clients."""
+    session = requests.Session()
+    # Configure retry strategy
+    retry_strategy = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504]
+    )
+    # Pooled sessions serve one request at a time, so a single kept-alive connection is enough
+    adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=1, pool_maxsize=1)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class SessionPool:
+    """
+    Bounded pool of HTTP sessions shared by every thread. A session is checked out
+    for the duration of one request, so it is never used by two threads at once,
+    and checked back in afterwards. At most `maxsize` sessions (and so kept-alive
+    sockets) exist at a time; callers beyond that wait for one to be returned.
+    Sessions left idle for longer than `idle_timeout` seconds are closed.
+
+        with pool.session() as session:
+            response = session.post(url, json=payload)
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], requests.Session] = new_session,
+        maxsize: int = 32,
+        idle_timeout: float = 90.0,
+    ):
+        """
+        :param factory: Creates a new session when no idle one is available
+        :param maxsize: Maximum number of sessions open at the same time
+        :param idle_timeout: Seconds after which an unused session is closed
+        """
+        self.factory = factory
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+
+        self._cond = threading.Condition()
+        self._idle: List[Tuple[requests.Session, float]] = []  # (session, returned at), oldest first
+        self._in_use = set()  # ids of checked out sessions
+        self._discarded = set()
+        self._size = 0  # Open sessions, idle or checked out
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    @contextmanager
+    def session(self) -> Iterator[requests.Session]:
+        """Check a session out for the duration of the `with` block."""
+        session = self._checkout()
+        try:
+            yield session
+        finally:
+            self._checkin(session)
+
+    def discard(self, session: requests.Session):
+        """Close a checked out session (aborting its request); it is not returned to the pool."""
+        with self._cond:
+            if id(session) not in self._in_use:
+                return
+            self._discarded.add(id(session))
+        session.close()
+
+    def _checkout(self) -> requests.Session:
+        expired = []
+        with self._cond:
+            while True:
+                expired += self._evict_idle()
+                if self._idle:
+                    session = self._idle.pop()[0]
+                    break
+                if self._size < self.maxsize:
+                    self._size += 1
+                    session = None
+                    break
+                self._cond.wait(timeout=self.idle_timeout)
+
+        for stale in expired:
+            stale.close()
+        if session is None:
+            try:
+                session = self.factory()
+            except BaseException:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+        with self._cond:
+            self._in_use.add(id(session))
+        return session
+
+    def _checkin(self, session: requests.Session):
+        with self._cond:
+            discarded = id(session) in self._discarded or self._closed
+            self._in_use.discard(id(session))
+            self._discarded.discard(id(session))
+            if discarded:
+                self._size -= 1
+            else:
+                self._idle.append((session, time.monotonic()))
+            self._cond.notify()
+        if discarded:
+            session.close()
+
+    def _evict_idle(self) -> List[requests.Session]:
+        """Remove sessions idle for longer than idle_timeout; the caller closes them."""
+        cutoff = time.monotonic() - self.idle_timeout
+        count = 0
+        while count < len(self._idle) and self._idle[count][1] < cutoff:
+            count += 1
+        expired = [session for session, _ in self._idle[:count]]
+        del self._idle[:count]
+        self._size -= count
+        return expired
+
+    def close(self):
+        """Close idle sessions; sessions still checked out are closed when returned."""
+        with self._cond:
+            self._closed = True
+            idle = [session for session, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for session in idle:
+            session.close()
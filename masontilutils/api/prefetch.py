@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from masontilutils.api.deadline import Deadline, deadline_scope
+from masontilutils.api.images import load_image
+
+
+class ImagePrefetcher:
+    """
+    Downloads images on a bounded thread pool as soon as their URLs are known, so the
+    downloads overlap with browser work and with model calls for earlier images.
+    Downloaded (still encoded) bytes are kept in an LRU capped at `max_bytes`.
+
+        prefetcher.prefetch(picture_url)       # returns immediately
+        ...
+        data = prefetcher.get(picture_url)     # waits for the download if it is still running
+        ethgen_api.call(picture_url, image_data=data)
+    """
+
+    def __init__(self, max_workers: int = 4, max_bytes: int = 32 * 1024 * 1024, timeout: float = 10.0):
+        """
+        :param max_workers: Maximum number of concurrent downloads
+        :param max_bytes: Memory cap of the downloaded images kept; least recently used ones are dropped
+        :param timeout: Download timeout in seconds, cut to the deadline passed to `prefetch`
+        """
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.hits = 0  # Downloaded before they were asked for
+        self.waits = 0  # Still downloading when asked for
+        self.misses = 0  # Never prefetched
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-prefetch")
+        self._lock = threading.Lock()
+        self._images: OrderedDict[str, bytes] = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._bytes = 0
+
+    @property
+    def size(self) -> int:
+        """Bytes of the images currently kept."""
+        return self._bytes
+
+    def prefetch(self, url: str, deadline: Optional[Deadline] = None):
+        """Start downloading `url` unless it is already kept or being downloaded."""
+        if not url.startswith(("http://", "https://")):
+            return
+        with self._lock:
+            if url in self._images or url in self._pending:
+                return
+            self._pending[url] = self._executor.submit(self._download, url, deadline)
+
+    def get(self, url: str, deadline: Optional[Deadline] = None) -> Optional[bytes]:
+        """
+        The image's bytes, waiting for a running download (at most until `deadline`).
+        None if the URL wasn't prefetched or its download failed.
+        """
+        with self._lock:
+            data = self._images.get(url)
+            if data is not None:
+                self._images.move_to_end(url)
+                self.hits += 1
+                return data
+            future = self._pending.get(url)
+            if future is None:
+                self.misses += 1
+                return None
+            self.waits += 1
+        try:
+            return future.result(timeout=deadline.remaining() if deadline is not None else None)
+        except Exception as e:
+            print(f"Error prefetching image {url}: {str(e)}")
+            return None
+
+    def _download(self, url: str, deadline: Optional[Deadline]) -> bytes:
+        try:
+            with deadline_scope(deadline):
+                data = load_image(url, is_url=True, timeout=self.timeout)
+            self._store(url, data)
+            return data
+        finally:
+            with self._lock:
+                self._pending.pop(url, None)
+
+    def _store(self, url: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._images.pop(url, None)
+            self._bytes -= len(old) if old is not None else 0
+            self._images[url] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def close(self):
+        """Cancel queued downloads and drop the kept images."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._images.clear()
+            self._pending.clear()
+            self._bytes = 0
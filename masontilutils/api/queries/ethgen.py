@@ -1,8 +1,28 @@
-from masontilutils.api.queries.enums import Region
+from masontilutils.api.queries.enums import Region, Sex
 
 ETHGEN_JSON_FORMAT = "{{sex: ..., region: ...}}"
 GENDER_JSON_FORMAT = "{{sex: ...}}"
 
+# JSON schemas for structured outputs; null stands for "None" in the text prompts
+_SEX_SCHEMA = {"type": ["string", "null"], "enum": [sex.value for sex in Sex] + [None]}
+
+ETHGEN_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "sex": _SEX_SCHEMA,
+        "region": {"type": ["string", "null"], "enum": [region.value for region in Region] + [None]},
+    },
+    "required": ["sex", "region"],
+    "additionalProperties": False,
+}
+
+GENDER_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {"sex": _SEX_SCHEMA},
+    "required": ["sex"],
+    "additionalProperties": False,
+}
+
 # System Messages
 ETHGEN_SYSTEM_MESSAGE = {
     "role": "system",
@@ -64,6 +84,36 @@ GENDER_SYSTEM_MESSAGE = {
 """
 }
 
+GENDER_BATCH_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": """
+    <role>
+        You are an AI assistant that approaches cultural and ancestral analysis with deep respect and sensitivity.
+        You acknowledge that while gender is a complex concept, it can be inferred from a name.
+    </role>
+
+    <rules>
+        1. You should always respond in JSON format.
+        2. Answer for every name in the request, using each name exactly as given as a key.
+        3. If a name is an initial, respond with None for that name.
+    </rules>
+
+    <request_format>
+        <json>
+            "names": ["string", "string", ...],
+        </json>
+    </request_format>
+
+    <response_format>
+        <json>
+            "name": {"sex": "string"},
+            "name": {"sex": "string"},
+            ...
+        </json>
+    </response_format>
+"""
+}
+
 # User Queries
 ANCESTRAL_ANALYSIS_QUERY = (
     "In the spirit of cultural sensitivity and respect for diversity, I kindly request your assistance "
@@ -102,6 +152,29 @@ EXECUTIVE_RESPONSE_JSON_FORMAT = """
     }}
 """ 
 
+# JSON schema for repairing executive answers: the numbered keys of
+# EXECUTIVE_RESPONSE_JSON_FORMAT become a list, since strict schemas need fixed keys
+EXECUTIVE_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "executives": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "role": {"type": "string"},
+                    "sources": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["name", "role", "sources"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["executives"],
+    "additionalProperties": False,
+}
+
 EXECUTIVE_NONE_IDENTIFIER = "None"
 
 PUBLICALLY_TRADED_IDENTIFIER = "company_publically_traded"
@@ -19,6 +19,26 @@ INDUSTRY_CLASSIFICATION_JSON_FORMAT = """
     }}
 """ 
 
+# JSON schema for structured outputs, mirroring INDUSTRY_CLASSIFICATION_JSON_FORMAT.
+# Strict schemas need every key, so unused slots come back with null codes.
+_INDUSTRY_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "NAICS": {"type": ["string", "null"]},
+        "NAICS_Definition": {"type": ["string", "null"]},
+        "industry_code": {"type": ["string", "null"], "enum": ["A", "C", "G", "S", "I", "P", "O", None]},
+    },
+    "required": ["NAICS", "NAICS_Definition", "industry_code"],
+    "additionalProperties": False,
+}
+
+INDUSTRY_CLASSIFICATION_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {key: _INDUSTRY_ITEM_SCHEMA for key in ("1", "2", "3")},
+    "required": ["1", "2", "3"],
+    "additionalProperties": False,
+}
+
 INDUSTRY_CLASSIFICATION_SYSTEM_MESSAGE = f"""
 <role>
     You are an AI assistant that processes business descriptions and assigns them to a maximum of 3 NAICS codes and given industry codes. 
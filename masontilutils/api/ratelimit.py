@@ -0,0 +1,315 @@
+import asyncio
+import json
+import multiprocessing
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+# Default per-provider quotas (requests/min, tokens/min). None means unlimited;
+# limits advertised by the provider in X-RateLimit-* headers take precedence.
+DEFAULT_RATE_LIMITS: Dict[str, Dict[str, Optional[float]]] = {
+    "perplexity": {"requests_per_minute": 50, "tokens_per_minute": None},
+    "deepseek": {"requests_per_minute": None, "tokens_per_minute": None},
+    "openai": {"requests_per_minute": 500, "tokens_per_minute": 30000},
+}
+
+# Rough token cost of an image part; OpenAI bills 85-1105 tokens per image depending on detail
+IMAGE_TOKEN_ESTIMATE = 800
+
+
+def estimate_tokens(payload: Dict[str, Any]) -> int:
+    """
+    Estimate the tokens a chat completion payload will consume (prompt + max completion),
+    using the common ~4 characters per token heuristic.
+    """
+    return estimate_usage(payload)["total_tokens"]
+
+
+def estimate_usage(payload: Dict[str, Any]) -> Dict[str, int]:
+    """
+    `estimate_tokens` as a completion `usage` dict, charging the full `max_tokens`; stands
+    in for the usage of responses that never reported theirs (streams closed early).
+    """
+    chars = 0
+    images = 0
+    for message in payload.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            chars += len(content)
+        elif isinstance(content, list):
+            for part in content:
+                if part.get("type") == "image_url":
+                    images += 1
+                else:
+                    chars += len(json.dumps(part))
+    prompt = chars // 4 + images * IMAGE_TOKEN_ESTIMATE
+    completion = payload.get("max_tokens") or payload.get("max_completion_tokens") or 0
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """
+    Parse a rate limit reset value into seconds from now.
+    Accepts plain seconds ("12", "1.5"), OpenAI style durations ("6m0s", "20ms"),
+    epoch timestamps and HTTP dates.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        seconds = float(value)
+        # Values this large are epoch timestamps rather than durations
+        if seconds > 1e9:
+            return max(0.0, seconds - time.time())
+        return max(0.0, seconds)
+    except ValueError:
+        pass
+
+    parts = re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value)
+    if parts and ''.join(n + u for n, u in parts) == value:
+        scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+        return sum(float(n) * scale[u] for n, u in parts)
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after(headers: Mapping[str, str] | None, default: float) -> float:
+    """Seconds to wait from a response's Retry-After header (seconds or HTTP date), else `default`."""
+    value = parse_duration(headers.get("Retry-After")) if headers else None
+    return value if value is not None else default
+
+
+class RateLimiter:
+    """
+    Requests/min and tokens/min token buckets for one provider, shared by every
+    client of that provider. Reservations are taken up front and may drive a bucket
+    into debt, so concurrent callers queue behind each other instead of all firing
+    at once. A 429 pauses every caller until the provider's cooldown has passed.
+    """
+    # Layout of the flat state vector; kept as plain floats so it can live in shared memory
+    REQUEST_LEVEL, REQUEST_STAMP, TOKEN_LEVEL, TOKEN_STAMP, COOLDOWN_UNTIL, REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE = range(7)
+    SLOTS = 7
+
+    def __init__(
+        self,
+        provider: str,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        state=None,
+        lock=None,
+    ):
+        """
+        :param provider: Provider name, used for logging
+        :param requests_per_minute: Request quota, None for unlimited
+        :param tokens_per_minute: Token quota, None for unlimited
+        :param state: Existing state vector to attach to (e.g. a shared memory view); quotas are then ignored
+        :param lock: Lock guarding `state`; a process-wide lock when `state` is shared between processes
+        """
+        self.provider = provider
+        self._lock = lock if lock is not None else threading.Lock()
+        if state is None:
+            self._state = [0.0] * self.SLOTS
+            self.configure(requests_per_minute, tokens_per_minute)
+        else:
+            self._state = state
+
+    def configure(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        """Set the quotas and refill both buckets. None or 0 disables a bucket."""
+        now = time.time()
+        with self._lock:
+            state = self._state
+            state[self.REQUESTS_PER_MINUTE] = requests_per_minute or 0.0
+            state[self.TOKENS_PER_MINUTE] = tokens_per_minute or 0.0
+            state[self.REQUEST_LEVEL] = state[self.REQUESTS_PER_MINUTE]
+            state[self.TOKEN_LEVEL] = state[self.TOKENS_PER_MINUTE]
+            state[self.REQUEST_STAMP] = max(now, state[self.REQUEST_STAMP])
+            state[self.TOKEN_STAMP] = max(now, state[self.TOKEN_STAMP])
+
+    @property
+    def requests_per_minute(self) -> float:
+        return self._state[self.REQUESTS_PER_MINUTE]
+
+    @property
+    def tokens_per_minute(self) -> float:
+        return self._state[self.TOKENS_PER_MINUTE]
+
+    def _take(self, level: int, stamp: int, per_minute: float, amount: float, now: float) -> float:
+        """Refill a bucket, charge `amount` and return how long the caller must wait."""
+        state = self._state
+        if per_minute <= 0:
+            return 0.0
+        rate = per_minute / 60.0
+        if now > state[stamp]:
+            state[level] = min(per_minute, state[level] + (now - state[stamp]) * rate)
+            state[stamp] = now
+        state[level] -= amount
+        wait = max(0.0, state[stamp] - now)
+        if state[level] < 0:
+            wait += -state[level] / rate
+        return wait
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserve one request and `tokens` tokens; returns the seconds to wait before sending."""
+        now = time.time()
+        with self._lock:
+            state = self._state
+            wait = max(0.0, state[self.COOLDOWN_UNTIL] - now)
+            wait = max(wait, self._take(self.REQUEST_LEVEL, self.REQUEST_STAMP, state[self.REQUESTS_PER_MINUTE], 1, now))
+            if tokens:
+                wait = max(wait, self._take(self.TOKEN_LEVEL, self.TOKEN_STAMP, state[self.TOKENS_PER_MINUTE], tokens, now))
+            return wait
+
+    def refund(self, tokens: int = 0):
+        """Give back a reservation that was never sent."""
+        with self._lock:
+            state = self._state
+            for level, per_minute, amount in ((self.REQUEST_LEVEL, self.REQUESTS_PER_MINUTE, 1),
+                                              (self.TOKEN_LEVEL, self.TOKENS_PER_MINUTE, tokens)):
+                if state[per_minute] > 0 and amount:
+                    state[level] = min(state[per_minute], state[level] + amount)
+
+    def acquire(self, tokens: int = 0, max_wait: float | None = None) -> float | None:
+        """
+        Block until a request with `tokens` tokens may be sent. Returns the time slept,
+        or None without sleeping (and without keeping the reservation) when the wait
+        would be longer than `max_wait`.
+        """
+        wait = self.reserve(tokens)
+        if max_wait is not None and wait > max_wait:
+            self.refund(tokens)
+            return None
+        if wait > 0:
+            print(f"Rate limiter ({self.provider}): waiting {wait:.2f} seconds")
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int = 0, max_wait: float | None = None) -> float | None:
+        """Asyncio variant of `acquire`."""
+        wait = self.reserve(tokens)
+        if max_wait is not None and wait > max_wait:
+            self.refund(tokens)
+            return None
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        """Correct a token reservation once the real usage is known."""
+        with self._lock:
+            if self._state[self.TOKENS_PER_MINUTE] > 0:
+                self._state[self.TOKEN_LEVEL] = min(
+                    self._state[self.TOKENS_PER_MINUTE],
+                    self._state[self.TOKEN_LEVEL] + estimated_tokens - actual_tokens
+                )
+
+    def pause(self, seconds: float):
+        """Stop all callers for `seconds`; buckets start refilling once the cooldown ends."""
+        until = time.time() + seconds
+        with self._lock:
+            state = self._state
+            state[self.COOLDOWN_UNTIL] = max(state[self.COOLDOWN_UNTIL], until)
+            for level, stamp in ((self.REQUEST_LEVEL, self.REQUEST_STAMP), (self.TOKEN_LEVEL, self.TOKEN_STAMP)):
+                state[level] = min(state[level], 0.0)
+                state[stamp] = max(state[stamp], state[self.COOLDOWN_UNTIL])
+
+    def update_from_headers(self, headers: Mapping[str, str] | None):
+        """
+        Tune the buckets from provider headers: Retry-After, OpenAI style
+        x-ratelimit-{limit,remaining,reset}-{requests,tokens} and the generic
+        X-RateLimit-{Limit,Remaining,Reset} (treated as requests).
+        """
+        if not headers:
+            return
+        headers = {k.lower(): v for k, v in headers.items()}
+
+        buckets = (
+            (self.REQUEST_LEVEL, self.REQUESTS_PER_MINUTE, ("x-ratelimit-limit-requests", "x-ratelimit-limit"),
+             ("x-ratelimit-remaining-requests", "x-ratelimit-remaining"), ("x-ratelimit-reset-requests", "x-ratelimit-reset")),
+            (self.TOKEN_LEVEL, self.TOKENS_PER_MINUTE, ("x-ratelimit-limit-tokens",),
+             ("x-ratelimit-remaining-tokens",), ("x-ratelimit-reset-tokens",)),
+        )
+
+        def first(names):
+            return next((headers[n] for n in names if n in headers), None)
+
+        pause_for = parse_duration(headers.get("retry-after")) or 0.0
+        with self._lock:
+            state = self._state
+            for level, per_minute, limit_names, remaining_names, reset_names in buckets:
+                limit, remaining = first(limit_names), first(remaining_names)
+                try:
+                    if limit is not None and float(limit) > 0:
+                        state[per_minute] = float(limit)
+                    if remaining is not None and state[per_minute] > 0:
+                        state[level] = min(state[level], float(remaining))
+                        if float(remaining) <= 0:
+                            pause_for = max(pause_for, parse_duration(first(reset_names)) or 0.0)
+                except ValueError:
+                    continue
+
+        if pause_for > 0:
+            self.pause(pause_for)
+
+
+class SharedRateLimitState:
+    """
+    Rate limiter state for several providers in one block of shared memory, guarded by a
+    single OS-level lock. Acquiring a permit is a lock + a few float reads/writes on the
+    shared block, so there is no Manager proxy round-trip per request.
+
+    Like other multiprocessing primitives it must be handed to worker processes through
+    inheritance (a `Process` argument), not through a Manager dict. Each worker then calls
+    `install()` once, after which `get_rate_limiter()` returns the shared limiters.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, Optional[float]]] | None = None):
+        limits = limits if limits is not None else DEFAULT_RATE_LIMITS
+        self.providers = list(limits)
+        self._array = multiprocessing.RawArray('d', RateLimiter.SLOTS * len(self.providers))
+        self._lock = multiprocessing.Lock()
+        for provider, quotas in limits.items():
+            self.limiter(provider).configure(**quotas)
+
+    def limiter(self, provider: str) -> RateLimiter:
+        """Build a RateLimiter backed by this provider's slice of the shared block."""
+        offset = self.providers.index(provider) * RateLimiter.SLOTS
+        view = memoryview(self._array).cast('B').cast('d')[offset:offset + RateLimiter.SLOTS]
+        return RateLimiter(provider, state=view, lock=self._lock)
+
+    def install(self):
+        """Make `get_rate_limiter()` in the current process use the shared limiters."""
+        with _limiters_lock:
+            for provider in self.providers:
+                _limiters[provider] = self.limiter(provider)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """Get the process-wide rate limiter for a provider, creating it with the default quotas."""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(provider)
+            if limiter is None:
+                limiter = RateLimiter(provider, **DEFAULT_RATE_LIMITS.get(provider, {}))
+                _limiters[provider] = limiter
+    return limiter
+
+
+def configure_rate_limit(
+    provider: str,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+) -> RateLimiter:
+    """Override the quotas of a provider's shared rate limiter."""
+    limiter = get_rate_limiter(provider)
+    limiter.configure(requests_per_minute, tokens_per_minute)
+    return limiter
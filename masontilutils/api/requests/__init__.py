@@ -1,9 +1,10 @@
 # Requests package for API request handling 
-from masontilutils.api.requests.ethgen.ethgen import EthGenRequest, GenderRequest
+from masontilutils.api.requests.ethgen.ethgen import EthGenRequest, GenderRequest, GenderBatchRequest
 from masontilutils.api.requests.executive.executive import ExecutiveRequest
 
 __all__ = [
     'EthGenRequest',
     'GenderRequest', 
+    'GenderBatchRequest',
     'ExecutiveRequest'
 ] 
\ No newline at end of file
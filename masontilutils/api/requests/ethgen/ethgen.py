@@ -24,13 +24,30 @@ class GenderRequest:
             "name": self.name,
         }
 
+@dataclass
+class GenderBatchRequest:
+    names: List[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "names": self.names,
+        }
 
 
-def build_ethgen_messages(system_message: Dict[str, Any], request: EthGenRequest, image_url: str) -> List[Dict[str, Any]]:
+def build_ethgen_messages(
+    system_message: Dict[str, Any],
+    request: EthGenRequest,
+    image_url: str,
+    detail: Optional[str] = None,
+) -> List[Dict[str, Any]]:
     """
     Build Chat Completions messages for EthGen (image + optional name).
     The `image_url` should already be prepared (either direct URL or data URI).
+    `detail` sets the vision detail level ("low", "high" or "auto"); omitted when None.
     """
+    image = {"url": image_url}
+    if detail is not None:
+        image["detail"] = detail
 
     return [
         system_message,
@@ -38,7 +55,7 @@ def build_ethgen_messages(system_message: Dict[str, Any], request: EthGenRequest
             "role": "user",
             "content": [
                 {"type": "text", "text": json.dumps(request.to_dict())},
-                {"type": "image_url", "image_url": {"url": image_url}},
+                {"type": "image_url", "image_url": image},
             ],
         },
     ]
@@ -58,6 +75,20 @@ def build_gender_messages(system_message: Dict[str, Any], request: GenderRequest
     ]
 
 
+def build_gender_batch_messages(system_message: Dict[str, Any], request: GenderBatchRequest) -> List[Dict[str, Any]]:
+    """
+    Build Chat Completions messages for a batch of first names (text only).
+    """
+
+    return [
+        system_message,
+        {
+            "role": "user",
+            "content": [{"type": "text", "text": json.dumps(request.to_dict())}],
+        },
+    ]
+
+
 def build_ethgen_payload(
     system_message: Dict[str, Any],
     request: EthGenRequest,
@@ -66,16 +97,19 @@ def build_ethgen_payload(
     model: str,
     max_tokens: int = 100,
     temperature: float = 0.0,
+    response_format: Optional[Dict[str, Any]] = None,
+    detail: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Build a ready-to-send payload dict for OpenAI Chat Completions for EthGen.
+    `response_format` defaults to plain text; pass a json_schema format for structured outputs.
     """
     payload = {
         "model": model,
-        "messages": build_ethgen_messages(system_message, request, image_url),
+        "messages": build_ethgen_messages(system_message, request, image_url, detail),
 
         "temperature": temperature,
-        "response_format": {"type": "text"},
+        "response_format": response_format or {"type": "text"},
     }
     if model == "gpt-5":
         print("gpt-5")
@@ -94,15 +128,17 @@ def build_gender_payload(
     model: str = "gpt-4.1",
     max_tokens: int = 100,
     temperature: float = 0.0,
+    response_format: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     """
     Build a ready-to-send payload dict for OpenAI Chat Completions for Gender.
+    `response_format` defaults to plain text; pass a json_schema format for structured outputs.
     """
     payload = {
         "model": model,
         "messages": build_gender_messages(system_message, request),
         "temperature": temperature,
-        "response_format": {"type": "text"},
+        "response_format": response_format or {"type": "text"},
     }
     if model == "gpt-5":
         print("gpt-5")
@@ -111,4 +147,31 @@ def build_gender_payload(
         print("gpt-4.1")
         payload["max_tokens"] = max_tokens
 
-    return payload
\ No newline at end of file
+    return payload
+
+
+def build_gender_batch_payload(
+    system_message: Dict[str, Any],
+    request: GenderBatchRequest,
+    *,
+    model: str = "gpt-4.1",
+    tokens_per_name: int = 16,
+    temperature: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    Build a ready-to-send payload dict for OpenAI Chat Completions for a batch of names.
+    The completion budget scales with the number of names in the batch.
+    """
+    max_tokens = 50 + tokens_per_name * len(request.names)
+    payload = {
+        "model": model,
+        "messages": build_gender_batch_messages(system_message, request),
+        "temperature": temperature,
+        "response_format": {"type": "text"},
+    }
+    if model == "gpt-5":
+        payload["max_completion_tokens"] = max_tokens
+    else:
+        payload["max_tokens"] = max_tokens
+
+    return payload
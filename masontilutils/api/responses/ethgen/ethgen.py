@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 from masontilutils.api.queries.enums import Region, Ethnicity, Sex
 
@@ -87,4 +87,27 @@ def build_gender_response(api_res: Dict[str, Any]) -> GenderResponse:
     if matched_sex is None:
         return None
     
-    return GenderResponse(sex=matched_sex.value) 
\ No newline at end of file
+    return GenderResponse(sex=matched_sex.value) 
+
+
+def build_gender_batch_response(api_res: Dict[str, Any], names: List[str]) -> Dict[str, GenderResponse | None]:
+    """
+    Convert a keyed batch answer into GenderResponse objects.
+    Expected api_res shape: {name: {"sex": ...}} (a bare {name: sex} is accepted too).
+    Every name present in the answer is answered: a null sex gives GenderResponse(sex=None),
+    an unrecognized value gives None. Names missing from the answer are left out of the
+    result so the caller can retry them.
+    """
+    answers = {_normalize_str(key): value for key, value in api_res.items()}
+
+    res: Dict[str, GenderResponse | None] = {}
+    for name in names:
+        key = _normalize_str(name)
+        if key not in answers:
+            continue
+        value = answers[key]
+        if not isinstance(value, dict):
+            value = {"sex": value}
+        res[name] = build_gender_response(value)
+
+    return res
@@ -1,12 +1,17 @@
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
-import json
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 
 from masontilutils.api.queries.ethgen import (
+    EXECUTIVE_JSON_SCHEMA,
     EXECUTIVE_NONE_IDENTIFIER,
     PUBLICALLY_TRADED_IDENTIFIER
 )
-from masontilutils.utils import extract_json_substring, clean_deep_research_text
+from masontilutils.api.llm_json import find_json
+from masontilutils.api.metrics import record_parse_failure
+from masontilutils.utils import clean_deep_research_text
+
+if TYPE_CHECKING:
+    from masontilutils.api.chatgpt.repair import ChatGPTJSONRepairAPI
 
 @dataclass
 class ExecutiveInfo:
@@ -37,27 +42,35 @@ class ExecutiveResponse:
         }
 
 
-def build_executive_response(answer: str) -> ExecutiveResponse:
+def build_executive_response(answer: str, repair: Optional["ChatGPTJSONRepairAPI"] = None) -> ExecutiveResponse:
     """
     Convert raw API response text into a normalized ExecutiveResponse object.
     Handles special cases for publicly traded companies and no executives found.
+    With `repair`, JSON that cannot be parsed is reformatted by a cheap text model
+    instead of being discarded.
     """
 
-    api_response = extract_json_substring(clean_deep_research_text(answer))
+    cleaned = clean_deep_research_text(answer)
+    found = find_json(cleaned)
+    api_response = cleaned[found[1]:found[2]] if found is not None else ""
 
     # Check for special identifiers first
     if EXECUTIVE_NONE_IDENTIFIER in api_response:
         return ExecutiveResponse(executives=[], is_none=True)
     
-    if PUBLICALLY_TRADED_IDENTIFIER in api_response:
+    # The identifier is usually answered bare, outside of any JSON; such an answer
+    # means publicly traded (it used to fall through to "no executives found")
+    if PUBLICALLY_TRADED_IDENTIFIER in api_response or (not api_response and PUBLICALLY_TRADED_IDENTIFIER in cleaned):
         return ExecutiveResponse(executives=[], is_publicly_traded=True)
     
     # Try to extract and parse JSON
     try:
-        if not api_response:
+        if found is None:
+            if "{" in cleaned:
+                raise ValueError(f"No JSON found in answer: {cleaned[:100]!r}")
             return ExecutiveResponse(executives=[], is_none=True)
-            
-        api_json = json.loads(api_response)
+
+        api_json = found[0]
         
         executives = []
         for key, data in api_json.items():
@@ -71,7 +84,17 @@ def build_executive_response(answer: str) -> ExecutiveResponse:
         return ExecutiveResponse(executives=executives)
         
     except Exception as e:
+        record_parse_failure("PerplexityExecutiveAPI")
         print(f"Error parsing executive data: {e}")
         import traceback
         traceback.print_exc()
+        if repair is not None:
+            # Only the malformed JSON is sent, not the deep research text before it
+            malformed = cleaned[cleaned.find("{"):] if "{" in cleaned else cleaned
+            repaired = repair.call(malformed, "executives", EXECUTIVE_JSON_SCHEMA, api="PerplexityExecutiveAPI")
+            if repaired is not None:
+                return ExecutiveResponse(executives=[
+                    ExecutiveInfo(name=data["name"], role=data["role"], sources=data.get("sources", []))
+                    for data in repaired.get("executives", [])
+                ])
         return ExecutiveResponse(executives=[], is_none=True) 
\ No newline at end of file
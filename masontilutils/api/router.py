@@ -0,0 +1,228 @@
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from masontilutils.api.chatgpt import ChatGPTIndustryClassificationAPI
+from masontilutils.api.deepseek import DeepseekBusinessDescriptionAPI, DeepseekNAICSCodeAPI
+from masontilutils.api.hedging import LatencyTracker
+from masontilutils.api.perplexity import PerplexityBusinessDescAPI, PerplexityNAICSCodeAPI
+from masontilutils.api.usage import collect_usage
+
+
+class BackendStats:
+    """Rolling latency, error rate and cost of one backend over its last `window` calls."""
+
+    def __init__(self, window: int = 100):
+        self.latency = LatencyTracker(window)
+        self._outcomes: Deque[Tuple[bool, float]] = deque(maxlen=window)  # (failed, cost)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, failed: bool, cost: float):
+        if not failed:
+            self.latency.record(seconds)
+        with self._lock:
+            self._outcomes.append((failed, cost))
+
+    @property
+    def calls(self) -> int:
+        return len(self._outcomes)
+
+    def p95(self) -> Optional[float]:
+        return self.latency.quantile(0.95)
+
+    def error_rate(self) -> float:
+        with self._lock:
+            outcomes = list(self._outcomes)
+        return sum(failed for failed, _ in outcomes) / len(outcomes) if outcomes else 0.0
+
+    def mean_cost(self) -> float:
+        """Average USD cost of a successful call."""
+        with self._lock:
+            costs = [cost for failed, cost in self._outcomes if not failed]
+        return sum(costs) / len(costs) if costs else 0.0
+
+
+@dataclass
+class Backend:
+    """
+    One way of answering a routed request. `call` receives the router's arguments;
+    `accepts` (optional) tells whether the backend can answer those arguments at all.
+    """
+    name: str
+    call: Callable[..., Any]
+    accepts: Optional[Callable[..., bool]] = None
+
+
+class Router:
+    """
+    Sends each request to the cheapest backend whose rolling p95 latency meets
+    `target_p95` and whose error rate is below `max_error_rate`. Cost is the USD
+    token cost reported by the API transports while the backend handled the call
+    (see `masontilutils.api.usage`). When no backend qualifies, the fastest one
+    is used. Backends with fewer than `min_samples` calls are tried first, and a
+    small `explore` share of requests goes to another backend so stale
+    measurements get refreshed. A failed call, including one that raises, is retried
+    once on the next backend. Calls answered without a request (response cache,
+    coalesced in-flight requests) are left out of the statistics.
+    """
+
+    def __init__(
+        self,
+        backends: List[Backend],
+        target_p95: float,
+        max_error_rate: float = 0.2,
+        min_samples: int = 5,
+        window: int = 100,
+        explore: float = 0.05,
+    ):
+        """
+        :param backends: Interchangeable backends for the same task
+        :param target_p95: Latency in seconds the chosen backend's p95 must stay within
+        :param max_error_rate: Share of failed calls above which a backend is avoided
+        :param min_samples: Calls to observe per backend before trusting its statistics
+        :param window: Number of recent calls the statistics cover
+        :param explore: Share of requests sent to a random other eligible backend
+        """
+        self.backends = {backend.name: backend for backend in backends}
+        self.target_p95 = target_p95
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.explore = explore
+        self.stats: Dict[str, BackendStats] = {backend.name: BackendStats(window) for backend in backends}
+        self._random = random.Random()
+
+    def rank(self, *args, **kwargs) -> List[str]:
+        """Backends able to answer these arguments, in the order they should be tried."""
+        names = [
+            name for name, backend in self.backends.items()
+            if backend.accepts is None or backend.accepts(*args, **kwargs)
+        ]
+
+        def key(name: str):
+            stats = self.stats[name]
+            if stats.calls < self.min_samples:
+                # Unmeasured backends first, least measured first
+                return (0, stats.calls, 0.0)
+            p95 = stats.p95()
+            healthy = stats.error_rate() <= self.max_error_rate
+            if healthy and p95 is not None and p95 <= self.target_p95:
+                return (1, stats.mean_cost(), p95)
+            return (2, stats.error_rate() > self.max_error_rate, p95 if p95 is not None else float("inf"))
+
+        ranked = sorted(names, key=key)
+        if len(ranked) > 1 and self._random.random() < self.explore:
+            ranked.insert(0, ranked.pop(self._random.randrange(1, len(ranked))))
+        return ranked
+
+    def call(self, *args, **kwargs) -> Any:
+        """Answer a request with the best backend, falling back to the next one on failure."""
+        ranked = self.rank(*args, **kwargs)
+        if not ranked:
+            raise ValueError("No backend accepts these arguments")
+
+        result = None
+        for name in ranked[:2]:
+            result, failed = self._call_backend(name, *args, **kwargs)
+            if not failed:
+                return result
+            print(f"Router: {name} failed, trying next backend")
+        return result
+
+    def _call_backend(self, name: str, *args, **kwargs) -> Tuple[Any, bool]:
+        started = time.monotonic()
+        result = None
+        with collect_usage() as usage:
+            try:
+                result = self.backends[name].call(*args, **kwargs)
+                # The APIs return None both for "no answer" and for errors; only the latter count
+                failed = result is None and usage.errors > 0
+            except Exception as e:
+                print(f"Router: {name} raised {type(e).__name__}: {str(e)}")
+                failed = True
+        if failed or usage.requests or usage.errors:
+            self.stats[name].record(time.monotonic() - started, failed, usage.cost)
+        # else the answer came from the response cache or another caller's request in flight,
+        # whose latency and cost say nothing about the backend
+        return result, failed
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Current statistics per backend."""
+        return {
+            name: {
+                "calls": stats.calls,
+                "p95": stats.p95(),
+                "error_rate": stats.error_rate(),
+                "mean_cost": stats.mean_cost(),
+            }
+            for name, stats in self.stats.items()
+        }
+
+
+def build_description_router(
+    perplexity_key: str | None = None,
+    deepseek_key: str | None = None,
+    target_p95: float = 30.0,
+    **router_args,
+) -> Router:
+    """
+    Router over the business description APIs. Call it like the APIs themselves:
+    `router.call(company_name, city, state, address)`.
+    """
+    backends = []
+    if perplexity_key:
+        backends.append(Backend("perplexity", PerplexityBusinessDescAPI(perplexity_key).call))
+    if deepseek_key:
+        backends.append(Backend("deepseek", DeepseekBusinessDescriptionAPI(deepseek_key).call))
+    return Router(backends, target_p95=target_p95, **router_args)
+
+
+def build_naics_router(
+    perplexity_key: str | None = None,
+    deepseek_key: str | None = None,
+    chatgpt_key: str | None = None,
+    target_p95: float = 30.0,
+    **router_args,
+) -> Router:
+    """
+    Router over the NAICS APIs, which take different inputs. Call it with whatever is
+    known about the company: `router.call(company_name=..., city=..., state=..., description=...)`.
+    PerplexityNAICSCodeAPI needs the company and location, DeepseekNAICSCodeAPI and
+    ChatGPTIndustryClassificationAPI need a business description. Every backend
+    answers with a list of 6-digit NAICS codes.
+    """
+    def has_company(company_name=None, city=None, state=None, description=None) -> bool:
+        return bool(company_name and city and state)
+
+    def has_description(company_name=None, city=None, state=None, description=None) -> bool:
+        return bool(description)
+
+    backends = []
+    if perplexity_key:
+        perplexity = PerplexityNAICSCodeAPI(perplexity_key)
+
+        def perplexity_naics(company_name=None, city=None, state=None, description=None):
+            code = perplexity.call(company_name=company_name, city=city, state=state)
+            return [code] if code else None
+
+        backends.append(Backend("perplexity", perplexity_naics, has_company))
+    if deepseek_key:
+        deepseek = DeepseekNAICSCodeAPI(deepseek_key)
+
+        def deepseek_naics(company_name=None, city=None, state=None, description=None):
+            return deepseek.call(description)
+
+        backends.append(Backend("deepseek", deepseek_naics, has_description))
+    if chatgpt_key:
+        chatgpt = ChatGPTIndustryClassificationAPI(chatgpt_key)
+
+        def chatgpt_naics(company_name=None, city=None, state=None, description=None):
+            industries = chatgpt.call(description)
+            if industries is None:
+                return None
+            return [str(industry["NAICS"]) for industry in industries]
+
+        backends.append(Backend("chatgpt", chatgpt_naics, has_description))
+    return Router(backends, target_p95=target_p95, **router_args)
@@ -0,0 +1,112 @@
+import asyncio
+import copy
+import threading
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from masontilutils.api.deadline import current_deadline
+
+
+def is_shareable(result: Any) -> bool:
+    """Whether an API result may be handed to other callers: not one cut short by the leader's own deadline."""
+    return not (isinstance(result, dict) and result.get("deadline_exceeded"))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key: the first caller (the leader) runs
+    the function, every caller that arrives while it is in flight waits for and
+    receives a copy of the leader's result instead of issuing its own request.
+
+    A caller inside a `deadline_scope` waits for the leader at most until its own
+    deadline, then runs the function itself (which answers with its deadline error).
+    Results rejected by `shareable`, e.g. the leader running out of its own shorter
+    deadline, are not handed on: each waiting caller runs the function itself.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[Tuple[int, str], asyncio.Future] = {}
+        self.coalesced = 0  # Number of calls answered by another caller's request
+
+    def do(self, key: str, fn: Callable[[], Any], shareable: Callable[[Any], bool] | None = None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            deadline = current_deadline()
+            if not call.done.wait(deadline.remaining() if deadline is not None else None):
+                return fn()
+            if call.error is not None:
+                raise call.error
+            if shareable is not None and not shareable(call.result):
+                return fn()
+            with self._lock:
+                self.coalesced += 1
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        shareable: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        """Asyncio counterpart of `do`, coalescing tasks on the running event loop."""
+        loop_key = (id(asyncio.get_running_loop()), key)
+        future = self._async_calls.get(loop_key)
+        if future is not None:
+            deadline = current_deadline()
+            try:
+                result = await asyncio.wait_for(
+                    asyncio.shield(future), deadline.remaining() if deadline is not None else None
+                )
+            except asyncio.TimeoutError:
+                return await fn()
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled (a losing hedge, its caller's timeout), not this caller
+                return await fn()
+            if shareable is not None and not shareable(result):
+                return await fn()
+            self.coalesced += 1
+            return copy.deepcopy(result)
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_calls[loop_key] = future
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieve the exception so an unawaited future does not log it
+            future.exception()
+            raise
+        finally:
+            del self._async_calls[loop_key]
@@ -0,0 +1,195 @@
+import json
+import re
+from typing import Any, Dict, Optional, Sequence
+
+from masontilutils.api.deadline import current_deadline
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+
+class StreamedAnswer:
+    """
+    Incremental parser for a chat completion streamed as server-sent events.
+
+    Text inside <think> blocks is dropped as it arrives instead of being buffered.
+    Everything else is kept and scanned for the end of the answer: either the first
+    complete top-level JSON object, or one of `stop_markers` standing alone on a line
+    outside of it (so "None" ends the answer but "None of the sources..." doesn't).
+    Once `complete` is set the caller can close the stream without reading the rest.
+    """
+
+    def __init__(self, stop_markers: Sequence[str] = ()):
+        self.stop_markers = tuple(stop_markers)
+        # A marker only counts once its line has ended, optionally quoted or emphasised
+        self._marker_line = re.compile(
+            r"^[ \t]*[`\"'*]*(?:%s)[`\"'*.]*[ \t]*\r?\n" % "|".join(map(re.escape, self.stop_markers)),
+            re.MULTILINE,
+        ) if self.stop_markers else None
+        self.text = ""  # Visible text (outside <think>) received so far
+        self.usage: Optional[Dict[str, Any]] = None
+        self.complete = False  # Answer is known, the rest of the stream can be skipped
+        self.done = False  # The server finished the stream
+
+        self._pending = ""  # Tail that may be the start of a split <think>/</think> tag
+        self._in_think = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._outside_start = 0  # Start of the visible text not yet scanned for markers
+
+    def feed_line(self, line: str | bytes) -> bool:
+        """Consume one SSE line. Returns True once no more lines need to be read."""
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.startswith("data:"):
+            return self.complete or self.done
+
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            self.done = True
+            return True
+
+        try:
+            event = json.loads(data)
+        except json.JSONDecodeError:
+            return self.complete
+
+        if event.get("usage"):
+            self.usage = event["usage"]
+        for choice in event.get("choices") or []:
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                self.feed(content)
+            if choice.get("finish_reason"):
+                self.done = True
+        return self.complete or self.done
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a piece of completion text. Returns True once the answer is complete."""
+        buffer = self._pending + chunk
+        self._pending = ""
+
+        while buffer and not self.complete:
+            if self._in_think:
+                end = buffer.find(THINK_CLOSE)
+                if end == -1:
+                    self._pending = buffer[-(len(THINK_CLOSE) - 1):]
+                    return False
+                buffer = buffer[end + len(THINK_CLOSE):]
+                self._in_think = False
+                continue
+
+            start = buffer.find(THINK_OPEN)
+            if start != -1:
+                self._scan(buffer[:start])
+                buffer = buffer[start + len(THINK_OPEN):]
+                self._in_think = True
+                continue
+
+            # Hold back a trailing partial "<think>" so a split tag is still recognized
+            keep = next(
+                (k for k in range(len(THINK_OPEN) - 1, 0, -1) if buffer.endswith(THINK_OPEN[:k])),
+                0
+            )
+            self._scan(buffer[:len(buffer) - keep])
+            self._pending = buffer[len(buffer) - keep:]
+            break
+
+        return self.complete
+
+    def _scan(self, visible: str):
+        for i, char in enumerate(visible):
+            if self._depth:
+                if self._in_string:
+                    if self._escaped:
+                        self._escaped = False
+                    elif char == "\\":
+                        self._escaped = True
+                    elif char == '"':
+                        self._in_string = False
+                elif char == '"':
+                    self._in_string = True
+                elif char == "{":
+                    self._depth += 1
+                elif char == "}":
+                    self._depth -= 1
+                    if not self._depth:
+                        self.text += visible[:i + 1]
+                        self.complete = True
+                        return
+            elif char == "{":
+                if self._found_marker(self.text + visible[:i]):
+                    return
+                self._depth = 1
+
+        self.text += visible
+        if not self._depth:
+            self._found_marker(self.text)
+
+    def _found_marker(self, text: str) -> bool:
+        """Check the visible text outside of any JSON object for a line holding only a stop marker."""
+        if self._marker_line is not None:
+            # Rescan from the start of the line the new text continues
+            line_start = text.rfind("\n", 0, self._outside_start) + 1
+            if self._marker_line.search(text, line_start):
+                self.text = text
+                self.complete = True
+        self._outside_start = len(text)
+        return self.complete
+
+    def result(self) -> Dict[str, Any]:
+        """The streamed answer shaped like a regular (non-streamed) completion response."""
+        text = self.text
+        if not self._in_think and not self.complete:
+            # A partial tag held back at the very end of the stream is plain text
+            text += self._pending
+        result: Dict[str, Any] = {
+            "choices": [{"message": {"role": "assistant", "content": text.strip()}}],
+            "stream_stopped_early": self.complete and not self.done,
+        }
+        if self.usage is not None:
+            result["usage"] = self.usage
+        return result
+
+
+def _deadline_exceeded() -> Dict[str, Any]:
+    return {
+        "error": "Deadline exceeded while streaming the answer",
+        "status_code": 408,
+        "deadline_exceeded": True,
+        "stream_stopped_early": True,
+    }
+
+
+def read_completion_stream(response, stop_markers: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Read a streamed `requests` response until the answer is complete, then close it.
+    Inside a `deadline_scope` reading stops once the deadline passes.
+    """
+    answer = StreamedAnswer(stop_markers)
+    deadline = current_deadline()
+    try:
+        for line in response.iter_lines():
+            if line and answer.feed_line(line):
+                break
+            if deadline is not None and deadline.expired:
+                return _deadline_exceeded()
+    finally:
+        response.close()
+    return answer.result()
+
+
+async def read_completion_stream_async(response, stop_markers: Sequence[str] = ()) -> Dict[str, Any]:
+    """Asyncio counterpart of `read_completion_stream` for a streamed httpx response."""
+    answer = StreamedAnswer(stop_markers)
+    deadline = current_deadline()
+    try:
+        async for line in response.aiter_lines():
+            if line and answer.feed_line(line):
+                break
+            if deadline is not None and deadline.expired:
+                return _deadline_exceeded()
+    finally:
+        await response.aclose()
+    return answer.result()
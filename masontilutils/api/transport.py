@@ -0,0 +1,482 @@
+import asyncio
+import contextvars
+import queue
+import threading
+import time
+import weakref
+from contextlib import nullcontext
+from typing import Any, Awaitable, Callable, Dict
+
+import httpx
+import requests
+
+from masontilutils.api.breaker import CircuitBreaker, get_circuit_breaker
+from masontilutils.api.cache import ResponseCache, payload_key
+from masontilutils.api.deadline import current_deadline
+from masontilutils.api.hedging import HedgePolicy, HedgedAttempt
+from masontilutils.api.metrics import record_request, record_retry, record_tokens
+from masontilutils.api.pool import SessionPool
+from masontilutils.api.ratelimit import RateLimiter, estimate_tokens, estimate_usage, get_rate_limiter, retry_after
+from masontilutils.api.singleflight import SingleFlight, is_shareable
+from masontilutils.api.usage import budget_exceeded, record_error, record_usage
+
+
+class GuardedAPIMixin:
+    """
+    Request guards shared by the API clients: the response cache, the cost budget, the
+    endpoint's circuit breaker and coalescing of identical in-flight payloads, wrapped
+    around the subclass's own send function, plus the error results they answer with.
+    Subclasses provide `provider` and `base_url`.
+    """
+    provider = "default"
+    base_delay = 5  # Base delay in seconds for 429s without Retry-After
+
+    cache: ResponseCache | None = None  # Opt-in persistent response cache
+
+    _in_flight = SingleFlight()  # Identical concurrent payloads share one upstream call
+
+    base_url: str
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """Rate limiter shared by every client of this provider"""
+        return get_rate_limiter(self.provider)
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """Circuit breaker shared by every client of this endpoint"""
+        return get_circuit_breaker(self.base_url)
+
+    def _cache_get(self, payload: Dict[str, Any]) -> Dict[str, Any] | None:
+        if self.cache is None:
+            return None
+        return self.cache.get(type(self).__name__, self.base_url, payload)
+
+    def _cache_set(self, payload: Dict[str, Any], result: Dict[str, Any]):
+        if self.cache is not None:
+            self.cache.set(type(self).__name__, self.base_url, payload, result)
+
+    @staticmethod
+    def _error(message: str, status_code: int | None = None) -> Dict[str, Any]:
+        return {
+            "error": message,
+            "status_code": status_code
+        }
+
+    def _circuit_open(self) -> Dict[str, Any]:
+        result = self._error(f"Circuit open for {self.base_url}", 503)
+        result["circuit_open"] = True
+        return result
+
+    def _budget_exceeded(self) -> Dict[str, Any]:
+        result = self._error("Cost budget exceeded", 402)
+        result["budget_exceeded"] = True
+        return result
+
+    def _deadline_exceeded(self) -> Dict[str, Any]:
+        # 408 rather than a server error: running out of time says nothing about the endpoint
+        result = self._error(f"Deadline exceeded before {self.base_url} answered", 408)
+        result["deadline_exceeded"] = True
+        return result
+
+    def _retry_after(self, headers, current_retry: int) -> float:
+        return retry_after(headers, self.base_delay * (2 ** current_retry))
+
+    def _refuse(self) -> Dict[str, Any] | None:
+        """
+        The error to answer with instead of sending, if the deadline has passed, the budget
+        is spent or the circuit is open. Nothing was sent, so the circuit breaker and the
+        request metrics never see these. A caller whose deadline ran out, e.g. while it
+        waited on an identical request in flight, is not counted as a failed request.
+        """
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired:
+            return self._deadline_exceeded()
+        if budget_exceeded():
+            return self._budget_exceeded()
+        # Fail fast while the endpoint is known to be down
+        if not self.circuit_breaker.allow():
+            record_error()
+            return self._circuit_open()
+        return None
+
+    def _record(self, payload: Dict[str, Any], result: Dict[str, Any], started: float):
+        record_request(type(self).__name__, time.monotonic() - started, result)
+        self.circuit_breaker.record(result)
+        if "error" in result:
+            record_error()
+        self._cache_set(payload, result)
+
+    def _guarded(self, payload: Dict[str, Any], send: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Answer `payload` from the response cache, or with `send()` once the budget and the
+        circuit breaker allow it. Concurrent identical payloads are coalesced into one call.
+        """
+        cached = self._cache_get(payload)
+        if cached is not None:
+            return cached
+
+        def guarded_send():
+            refused = self._refuse()
+            if refused is not None:
+                return refused
+            started = time.monotonic()
+            try:
+                result = send()
+            except Exception:
+                self.circuit_breaker.record_failure()
+                raise
+            except BaseException:
+                self.circuit_breaker.release()
+                raise
+            self._record(payload, result, started)
+            return result
+
+        return self._in_flight.do(payload_key(self.base_url, payload), guarded_send, is_shareable)
+
+    async def _guarded_async(
+        self,
+        payload: Dict[str, Any],
+        send: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Asyncio counterpart of `_guarded`."""
+        cached = self._cache_get(payload)
+        if cached is not None:
+            return cached
+
+        async def guarded_send():
+            refused = self._refuse()
+            if refused is not None:
+                return refused
+            started = time.monotonic()
+            try:
+                result = await send()
+            except Exception:
+                self.circuit_breaker.record_failure()
+                raise
+            except BaseException:
+                # Cancelled (asyncio.wait_for, a losing hedge): no verdict on the endpoint
+                self.circuit_breaker.release()
+                raise
+            self._record(payload, result, started)
+            return result
+
+        return await self._in_flight.do_async(payload_key(self.base_url, payload), guarded_send, is_shareable)
+
+
+class ThreadedChatCompletionsAPI(GuardedAPIMixin):
+    """
+    Shared request plumbing for the OpenAI-compatible chat completion endpoints
+    (Perplexity Sonar, Deepseek R1). Subclasses provide `base_url` and `headers`;
+    this class owns the retry loop for both the blocking and the asyncio transports.
+    """
+    max_retries = 5
+    timeout = 500
+    max_concurrency = 64  # Max in-flight async requests per provider and event loop
+    pool_maxsize = 32  # Max pooled HTTP sessions (and sockets) per provider
+    pool_idle_timeout = 90.0  # Seconds after which an unused pooled session is closed
+
+    hedge: HedgePolicy | None = None  # Opt-in duplicate request for calls slower than p95
+
+    _session_pools: Dict[str, SessionPool] = {}
+    _session_pools_lock = threading.Lock()
+    _async_clients = weakref.WeakKeyDictionary()
+    _async_semaphores = weakref.WeakKeyDictionary()
+
+    headers: Dict[str, str]
+
+    @property
+    def session_pool(self) -> SessionPool:
+        """HTTP session pool shared by every client of this provider"""
+        pool = self._session_pools.get(self.provider)
+        if pool is None:
+            with self._session_pools_lock:
+                pool = self._session_pools.get(self.provider)
+                if pool is None:
+                    pool = SessionPool(maxsize=self.pool_maxsize, idle_timeout=self.pool_idle_timeout)
+                    self._session_pools[self.provider] = pool
+        return pool
+
+    def _settle_usage(self, payload: Dict[str, Any], result: Dict[str, Any], estimated_tokens: int):
+        usage = result.get("usage") if isinstance(result, dict) else None
+        if not usage and isinstance(result, dict) and result.get("stream_stopped_early"):
+            # The final usage chunk never arrived; count the reservation as spent
+            usage = estimate_usage(payload)
+        if usage and usage.get("total_tokens") is not None:
+            self.rate_limiter.settle(estimated_tokens, usage["total_tokens"])
+        record_usage(payload.get("model"), usage, type(self).__name__)
+        record_tokens(type(self).__name__, payload.get("model"), usage)
+
+    def _post(self, payload: Dict[str, Any], read: Callable[[Any], Dict[str, Any]] | None = None) -> Dict[str, Any]:
+        """
+        Send a payload, answering from the response cache when one is configured.
+        Concurrent identical payloads are coalesced into a single upstream call.
+        :param read: Reader for a streamed response body (see `masontilutils.api.streaming`)
+        """
+        def send():
+            if self.hedge is not None:
+                return self._send_hedged(payload, read)
+            return self._send(payload, read)
+
+        return self._guarded(payload, send)
+
+    def _send_hedged(self, payload: Dict[str, Any], read: Callable[[Any], Dict[str, Any]] | None = None) -> Dict[str, Any]:
+        """
+        `_send` under the hedge policy: if no answer has arrived after the p95 latency of
+        this API, a duplicate is sent from a second thread and the first success wins.
+        The other copy is cancelled: its pooled session is dropped if it still holds one
+        and a streamed read is aborted. A copy waiting for a non-streamed response can't
+        be aborted; it runs on in its thread until its (deadline-cut) timeout.
+        """
+        key = type(self).__name__
+        started = time.monotonic()
+        delay = self.hedge.start(key)
+        if delay is None:
+            result = self._send(payload, read)
+            if "error" not in result:
+                self.hedge.record(key, time.monotonic() - started)
+            return result
+
+        answers = queue.Queue()
+
+        def run(attempt: HedgedAttempt):
+            try:
+                answers.put((attempt, self._send(payload, read, attempt)))
+            except BaseException as e:
+                answers.put((attempt, e))
+
+        # Workers run in a copy of the caller's context so usage is attributed to it
+        attempts = [HedgedAttempt()]
+        threading.Thread(target=contextvars.copy_context().run, args=(run, attempts[0]), daemon=True).start()
+        try:
+            attempt, result = answers.get(timeout=delay)
+        except queue.Empty:
+            if self.hedge.allow_hedge():
+                print(f"Hedging {key} request pending for more than {delay:.1f} seconds")
+                attempts.append(HedgedAttempt())
+                threading.Thread(target=contextvars.copy_context().run, args=(run, attempts[1]), daemon=True).start()
+            attempt, result = answers.get()
+
+        failed = isinstance(result, BaseException) or "error" in result
+        if failed and len(attempts) > 1:
+            attempt, result = answers.get()
+
+        for other in attempts:
+            if other is not attempt:
+                other.cancel()
+
+        if isinstance(result, BaseException):
+            raise result
+        if "error" not in result:
+            self.hedge.record(key, time.monotonic() - started, hedge_won=attempt is not attempts[0])
+        return result
+
+    def _send(
+        self,
+        payload: Dict[str, Any],
+        read: Callable[[Any], Dict[str, Any]] | None = None,
+        attempt: HedgedAttempt | None = None,
+    ) -> Dict[str, Any]:
+        """
+        POST a chat completion payload. Every attempt goes through the provider's shared
+        rate limiter; a 429 pauses all callers of the provider, not only this thread.
+        When `read` is given the body is streamed and handed to it instead of parsed as JSON.
+        Inside a `deadline_scope` the timeout, rate limit waits and retries are cut to the
+        time left.
+        """
+        current_retry = 0
+        estimated_tokens = estimate_tokens(payload)
+        stream_args = {"stream": True} if read is not None else {}
+        deadline = current_deadline()
+
+        while current_retry < self.max_retries:
+            if attempt is not None and attempt.cancelled.is_set():
+                return self._error("Request cancelled")
+            if current_retry and self.circuit_breaker.is_open:
+                # Other callers saw the endpoint fail meanwhile; stop waiting out retries
+                return self._circuit_open()
+            if deadline is not None and deadline.expired:
+                return self._deadline_exceeded()
+            max_wait = deadline.remaining() if deadline is not None else None
+            if self.rate_limiter.acquire(estimated_tokens, max_wait) is None:
+                return self._deadline_exceeded()
+            timeout = deadline.timeout(self.timeout) if deadline is not None else self.timeout
+            try:
+                with self.session_pool.session() as session, \
+                        attempt.holding(self.session_pool, session) if attempt is not None else nullcontext():
+                    response = session.post(
+                        self.base_url,
+                        headers=self.headers,
+                        json=payload,
+                        timeout=timeout,
+                        **stream_args
+                    )
+                    if attempt is not None:
+                        attempt.response = response
+                    self.rate_limiter.update_from_headers(response.headers)
+                    if read is not None and not response.ok:
+                        response.close()
+                    response.raise_for_status()
+                    result = read(response) if read is not None else response.json()
+                self._settle_usage(payload, result, estimated_tokens)
+                return result
+
+            except requests.exceptions.HTTPError as e:
+                print(f"API request failed: {str(e)}")
+                if e.response.status_code == 429:
+                    # Get rate limit information from headers
+                    retry_after = self._retry_after(e.response.headers, current_retry)
+                    reset_time = e.response.headers.get('X-RateLimit-Reset')
+
+                    print(f"Rate limit exceeded. Retry after {retry_after} seconds.")
+                    if reset_time:
+                        print(f"Rate limit resets at: {reset_time}")
+
+                    # Pause every caller of this provider; the next acquire() sleeps it out
+                    self.rate_limiter.pause(retry_after)
+                    record_retry(type(self).__name__, 429)
+                    current_retry += 1
+                    continue
+                else:
+                    status_code = e.response.status_code if e.response is not None else None
+                    print(f"API request failed: {str(e)}", f"Status code: {status_code}")
+                    return self._error(f"API request failed: {str(e)}", status_code)
+
+            except requests.exceptions.RequestException as e:
+                if deadline is not None and deadline.expired:
+                    return self._deadline_exceeded()
+                status_code = e.response.status_code if e.response is not None else None
+                print(f"API request failed: {str(e)}", f"Status code: {status_code}")
+                return self._error(f"API request failed: {str(e)}", status_code)
+
+        # If we've exhausted all retries
+        return self._error("Max retries exceeded for rate limit", 429)
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Get or create the httpx client bound to the running event loop"""
+        clients = self._async_clients.setdefault(asyncio.get_running_loop(), {})
+        if self.provider not in clients:
+            clients[self.provider] = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency)
+            )
+        return clients[self.provider]
+
+    def _get_async_semaphore(self) -> asyncio.Semaphore:
+        """Get or create the concurrency semaphore for this provider on the running event loop"""
+        semaphores = self._async_semaphores.setdefault(asyncio.get_running_loop(), {})
+        if self.provider not in semaphores:
+            semaphores[self.provider] = asyncio.Semaphore(self.max_concurrency)
+        return semaphores[self.provider]
+
+    async def _post_async(
+        self,
+        payload: Dict[str, Any],
+        read: Callable[[Any], Awaitable[Dict[str, Any]]] | None = None
+    ) -> Dict[str, Any]:
+        """Asyncio counterpart of `_post`."""
+        async def send():
+            if self.hedge is not None:
+                return await self._send_async_hedged(payload, read)
+            return await self._send_async(payload, read)
+
+        return await self._guarded_async(payload, send)
+
+    async def _send_async_hedged(
+        self,
+        payload: Dict[str, Any],
+        read: Callable[[Any], Awaitable[Dict[str, Any]]] | None = None
+    ) -> Dict[str, Any]:
+        """Asyncio counterpart of `_send_hedged`; the losing request's task is cancelled."""
+        key = type(self).__name__
+        started = time.monotonic()
+        delay = self.hedge.start(key)
+        if delay is None:
+            result = await self._send_async(payload, read)
+            if "error" not in result:
+                self.hedge.record(key, time.monotonic() - started)
+            return result
+
+        tasks = [asyncio.ensure_future(self._send_async(payload, read))]
+        pending = set(tasks)
+        result = winner = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done and self.hedge.allow_hedge():
+                print(f"Hedging {key} request pending for more than {delay:.1f} seconds")
+                tasks.append(asyncio.ensure_future(self._send_async(payload, read)))
+                pending.add(tasks[1])
+            while done or pending:
+                for task in done:
+                    if result is None or "error" in result:
+                        result, winner = task.result(), task
+                if (result is not None and "error" not in result) or not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if "error" not in result:
+            self.hedge.record(key, time.monotonic() - started, hedge_won=winner is not tasks[0])
+        return result
+
+    async def _send_async(
+        self,
+        payload: Dict[str, Any],
+        read: Callable[[Any], Awaitable[Dict[str, Any]]] | None = None
+    ) -> Dict[str, Any]:
+        """Asyncio counterpart of `_send`; at most `max_concurrency` requests are in flight."""
+        current_retry = 0
+        estimated_tokens = estimate_tokens(payload)
+        deadline = current_deadline()
+
+        async with self._get_async_semaphore():
+            while current_retry < self.max_retries:
+                if current_retry and self.circuit_breaker.is_open:
+                    return self._circuit_open()
+                if deadline is not None and deadline.expired:
+                    return self._deadline_exceeded()
+                max_wait = deadline.remaining() if deadline is not None else None
+                if await self.rate_limiter.acquire_async(estimated_tokens, max_wait) is None:
+                    return self._deadline_exceeded()
+                timeout = deadline.timeout(self.timeout) if deadline is not None else self.timeout
+                try:
+                    client = self._get_async_client()
+                    request = client.build_request(
+                        "POST", self.base_url, headers=self.headers, json=payload, timeout=timeout
+                    )
+                    response = await client.send(request, stream=read is not None)
+                    self.rate_limiter.update_from_headers(response.headers)
+                    if read is not None and response.is_error:
+                        await response.aread()
+                    response.raise_for_status()
+                    result = await read(response) if read is not None else response.json()
+                    self._settle_usage(payload, result, estimated_tokens)
+                    return result
+
+                except httpx.HTTPStatusError as e:
+                    print(f"API request failed: {str(e)}")
+                    if e.response.status_code == 429:
+                        retry_after = self._retry_after(e.response.headers, current_retry)
+                        print(f"Rate limit exceeded. Retry after {retry_after} seconds.")
+                        self.rate_limiter.pause(retry_after)
+                        record_retry(type(self).__name__, 429)
+                        current_retry += 1
+                        continue
+                    return self._error(f"API request failed: {str(e)}", e.response.status_code)
+
+                except httpx.HTTPError as e:
+                    print(f"API request failed: {str(e)}")
+                    if deadline is not None and deadline.expired:
+                        return self._deadline_exceeded()
+                    return self._error(f"API request failed: {str(e)}")
+
+        return self._error("Max retries exceeded for rate limit", 429)
+
+    async def aclose(self):
+        """Close the async HTTP client bound to the running event loop."""
+        clients = self._async_clients.get(asyncio.get_running_loop(), {})
+        client = clients.pop(self.provider, None)
+        if client is not None:
+            await client.aclose()
@@ -0,0 +1,109 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Approximate list prices in USD per million (prompt, completion) tokens.
+# Override with `configure_model_price` when prices change or for negotiated rates.
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "sonar": (1.0, 1.0),
+    "sonar-pro": (3.0, 15.0),
+    "sonar-reasoning-pro": (2.0, 8.0),
+    "sonar-deep-research": (2.0, 8.0),
+    "deepseek-chat": (0.27, 1.10),
+    "deepseek-reasoner": (0.55, 2.19),
+    "gpt-4.1": (2.0, 8.0),
+    "gpt-4.1-mini": (0.4, 1.6),
+    "gpt-4.1-nano": (0.1, 0.4),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-5": (1.25, 10.0),
+}
+
+_prices_lock = threading.Lock()
+
+
+def configure_model_price(model: str, prompt_per_million: float, completion_per_million: float):
+    """Set the USD price per million prompt and completion tokens of a model."""
+    with _prices_lock:
+        MODEL_PRICES[model] = (prompt_per_million, completion_per_million)
+
+
+def usage_cost(model: Optional[str], usage: Dict[str, Any]) -> float:
+    """USD cost of one response's `usage`; unknown models cost 0."""
+    prompt_price, completion_price = MODEL_PRICES.get(model or "", (0.0, 0.0))
+    prompt_tokens = usage.get("prompt_tokens") or 0
+    completion_tokens = usage.get("completion_tokens") or 0
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class UsageCollector:
+    """Token usage, cost and errors of the API requests made inside a `collect_usage` block."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def budget_exceeded(self) -> bool:
+        """Whether requests should stop; collectors with a spending cap override this."""
+        return False
+
+    def add(self, model: Optional[str], usage: Dict[str, Any], api: Optional[str] = None):
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += usage.get("prompt_tokens") or 0
+            self.completion_tokens += usage.get("completion_tokens") or 0
+            self.cost += usage_cost(model, usage)
+
+    def add_error(self):
+        with self._lock:
+            self.errors += 1
+
+
+_collectors: ContextVar[Tuple[UsageCollector, ...]] = ContextVar("usage_collectors", default=())
+
+
+@contextmanager
+def collect_usage(collector: Optional[UsageCollector] = None) -> Iterator[UsageCollector]:
+    """
+    Collect the usage of every API request made by this thread or task inside the block.
+    Blocks nest; each enclosing collector sees the requests of the inner ones too.
+
+        with collect_usage() as usage:
+            api.call(...)
+        print(usage.total_tokens, usage.cost)
+
+    :param collector: Collector to activate instead of a new UsageCollector
+    """
+    collector = collector if collector is not None else UsageCollector()
+    token = _collectors.set(_collectors.get() + (collector,))
+    try:
+        yield collector
+    finally:
+        _collectors.reset(token)
+
+
+def record_usage(model: Optional[str], usage: Optional[Dict[str, Any]], api: Optional[str] = None):
+    """Report a response's `usage` to the active collectors; called by the API transports."""
+    if usage:
+        for collector in _collectors.get():
+            collector.add(model, usage, api)
+
+
+def budget_exceeded() -> bool:
+    """Whether an active collector's budget is spent; the API transports then send nothing."""
+    return any(collector.budget_exceeded for collector in _collectors.get())
+
+
+def record_error():
+    """Report a failed request to the active collectors; called by the API transports."""
+    for collector in _collectors.get():
+        collector.add_error()
@@ -3,9 +3,14 @@ from typing import List
 import uuid
 from linkedin_selenium import LinkedInBrowser
 from masontilutils.api.responses.ethgen.ethgen import EthGenResponse, GenderResponse
-from masontilutils.api.chatgpt import ChatGPTEthGenAPI, ChatGPTGenderAPI
+from masontilutils.api.chatgpt import ChatGPTEthGenAPI, ChatGPTGenderAPI, ChatGPTJSONRepairAPI
 from masontilutils.api.perplexity import PerplexityExecutiveAPI
 from masontilutils.api.duckduckgo import DuckDuckGoLinkedInAPI
+from masontilutils.api.deadline import Deadline
+from masontilutils.api.ledger import CostLedger
+from masontilutils.api.image_cache import ImageCache
+from masontilutils.api.lexicon import NameLexicon
+from masontilutils.api.prefetch import ImagePrefetcher
 import os
 
 from masontilutils.api.responses.executive.executive import ExecutiveResponse, ExecutiveInfo
@@ -33,6 +38,8 @@ class LinkedInEthGenResponse:
     multiple_genders: bool = False # if true gender is Z
     is_family_owned: bool = False # if true, the company is family owned
     is_publicly_traded: bool = False # if true, the company is publicly traded
+    deadline_exceeded: bool = False # if true, the deadline ran out and the results are partial
+    cost: float | None = None # USD spent on API calls for this company, when the service has a cost ledger
 
 
 class ServiceRequest:
@@ -48,7 +55,12 @@ class ServiceRequest:
 
 
 class LinkedInEthGenService:
-    def __init__(self):
+    def __init__(self, ledger: CostLedger | None = None):
+        """
+        Args:
+            ledger: Optional cost ledger; API usage is attributed to each call's request ID
+                and, once the ledger's budget is spent, call raises BudgetExceededError
+        """
         # Initialize Perplexity Executive API
         perplexity_key = os.getenv('PERPLEXITY_API_KEY')
         if not perplexity_key:
@@ -59,11 +71,27 @@ class LinkedInEthGenService:
         if not chatgpt_key:
             raise ValueError("CHATGPT_API_KEY environment variable not set")
         
-        self.executive_api = PerplexityExecutiveAPI(perplexity_key)
-        self.ethgen_api = ChatGPTEthGenAPI(chatgpt_key)
-        self.gender_api = ChatGPTGenderAPI(chatgpt_key)
-        self.ddg_api = DuckDuckGoLinkedInAPI()
+        # Cheap text model reformatting unparseable executive and EthGen answers
+        self.repair_api = ChatGPTJSONRepairAPI(chatgpt_key)
+        self.executive_api = PerplexityExecutiveAPI(perplexity_key, repair=self.repair_api)
+        # Optional perceptual-hash cache of image answers, which also skips placeholder avatars
+        image_cache_path = os.getenv('IMAGE_CACHE_PATH')
+        self.image_cache = ImageCache(image_cache_path) if image_cache_path else None
+        self.ethgen_api = ChatGPTEthGenAPI(chatgpt_key, repair=self.repair_api, image_cache=self.image_cache)
+        # Downloads profile pictures in the background while the browser finds the next one
+        self.image_prefetcher = ImagePrefetcher()
+        # Optional first name lexicon answering common names locally
+        lexicon_path = os.getenv('NAME_LEXICON_PATH')
+        self.name_lexicon = NameLexicon(lexicon_path) if lexicon_path else None
+        self.gender_api = ChatGPTGenderAPI(chatgpt_key, lexicon=self.name_lexicon)
+        # Concurrent calls search LinkedIn in parallel on up to DDG_POOL_SIZE browsers;
+        # DDG_BACKEND=html searches without a browser unless DuckDuckGo blocks it
+        self.ddg_api = DuckDuckGoLinkedInAPI(
+            pool_size=int(os.getenv('DDG_POOL_SIZE', '1')),
+            backend=os.getenv('DDG_BACKEND', 'selenium'),
+        )
         self.browser = None
+        self.ledger = ledger
 
     def create_executive_info(self, executive: ExecutiveInfo) -> ServiceExecutiveInfo:
         return ServiceExecutiveInfo(
@@ -84,6 +112,8 @@ class LinkedInEthGenService:
     def stop(self):
         if self.browser:
             self.browser.close()
+        if self.name_lexicon is not None:
+            self.name_lexicon.save()
 
     def is_family_owned(self, executives: List[ServiceExecutiveInfo]) -> bool:
         # check if family owned by finding multiple executives with the same last name
@@ -108,7 +138,28 @@ class LinkedInEthGenService:
         print(f"   No shared last names among executives - not family owned")
         return False
     
-    def call(self, company_name: str, city: str, state: str, address: str) -> LinkedInEthGenResponse | None:
+    def call(
+        self,
+        company_name: str,
+        city: str,
+        state: str,
+        address: str,
+        deadline: Deadline | float | None = None,
+    ) -> LinkedInEthGenResponse | None:
+        """
+        Find the company's executives and their ethnicity and gender.
+
+        Args:
+            deadline: Optional time budget (a Deadline or seconds) for the whole company. Every
+                API call is cut to the time left; once it runs out the remaining executives are
+                skipped and the partial results are returned with `deadline_exceeded` set.
+
+        Raises:
+            BudgetExceededError: The cost ledger's budget is spent; stop the batch
+        """
+        if self.ledger is not None:
+            self.ledger.check()
+
         print(f"========== LinkedIn EthGen Service Call Started ==========")
         print(f"Company: {company_name}")
         print(f"Location: {city}, {state}")
@@ -117,6 +168,21 @@ class LinkedInEthGenService:
         request = ServiceRequest(company_name, city, state, address)
         print(f"Service Request ID: {request.id}")
 
+        if self.ledger is None:
+            return self._process(request, deadline)
+
+        with self.ledger.track(request.id) as usage:
+            response = self._process(request, deadline)
+        print(f"Request cost: ${usage.cost:.4f} ({usage.total_tokens} tokens)")
+        if response is not None:
+            response.cost = usage.cost
+        return response
+
+    def _process(self, request: ServiceRequest, deadline: Deadline | float | None = None) -> LinkedInEthGenResponse | None:
+        company_name, city, state, address = request.company_name, request.city, request.state, request.address
+
+        if isinstance(deadline, (int, float)):
+            deadline = Deadline(deadline)
         # Get executive information
         print(f"\n--- Step 1: Fetching Executive Information ---")
         print(f"Calling Perplexity Executive API...")
@@ -125,7 +191,8 @@ class LinkedInEthGenService:
             company_name=company_name,
             city=city, 
             state=state,
-            address=address
+            address=address,
+            deadline=deadline
         )
 
         if not executive_response or executive_response.is_none:
@@ -166,13 +233,21 @@ class LinkedInEthGenService:
             print(f"========== LinkedIn EthGen Service Call Completed ==========\n")
             return request.response
 
-        print(f"\n--- Step 3: LinkedIn Profile and Image Analysis ---")
+        print(f"\n--- Step 3: LinkedIn Profiles and Pictures ---")
+        # The browser finds every profile picture first; each picture starts downloading
+        # in the background as soon as it is found, while the browser moves on
+        searched = []
         for i, executive in enumerate(request.response.executives, 1):
+            if deadline is not None and deadline.expired:
+                print(f"\n>> Deadline exceeded - skipping the remaining executives")
+                break
+            searched.append(executive)
+
             print(f"\n>> Processing Executive {i}: {executive.name}")
             
             # get linkedin url
             print(f"   Searching for LinkedIn profile...")
-            linkedin_url = self.get_linkedin(executive.name, company_name)
+            linkedin_url = self.get_linkedin(executive.name, company_name, deadline)
             
             if linkedin_url:
                 print(f"   LinkedIn profile found: {linkedin_url}")
@@ -180,47 +255,49 @@ class LinkedInEthGenService:
                 
                 # get profile picture
                 print(f"   Attempting to extract profile picture...")
-                if profile_picture := self.browser.get_profile_picture_from_url(linkedin_url):
+                if profile_picture := self.get_profile_picture(linkedin_url, deadline):
                     print(f"   Profile picture extracted successfully")
                     executive.picture_url = profile_picture
-
-                    # get ethnicity and gender
-                    print(f"   Analyzing ethnicity and gender from image...")
-                    ethgen_response: EthGenResponse | None = self.ethgen_api.call(profile_picture)
-                    if ethgen_response:
-                        executive.ethnicity = ethgen_response.ethnicity
-                        executive.gender = ethgen_response.sex
-                        print(f"   Image analysis complete - Ethnicity: {executive.ethnicity}, Gender: {executive.gender}")
-                    else:
-                        # get gender from name
-                        print(f"   No ethnicity or gender found from image for {executive.name}")
-                        print(f"   Falling back to name-based gender detection...")
-                        gender_response: GenderResponse | None = self.gender_api.call(executive.name)
-                        if gender_response:
-                            executive.gender = gender_response.sex
-                            print(f"   Gender detected from name: {executive.gender}")
-                        else:
-                            print(f"   No gender found for {executive.name}")
+                    self.image_prefetcher.prefetch(profile_picture, deadline)
                 else:
                     print(f"   No profile picture found for {executive.name}")
-                    print(f"   Attempting name-based gender detection...")
-                    gender_response: GenderResponse | None = self.gender_api.call(executive.name)
-                    if gender_response:
-                        executive.gender = gender_response.sex
-                        print(f"   Gender detected from name: {executive.gender}")
-                    else:
-                        print(f"   No gender found for {executive.name}")
             else:
                 print(f"   No LinkedIn profile found for {executive.name}")
-                print(f"   Attempting name-based gender detection...")
-                gender_response: GenderResponse | None = self.gender_api.call(executive.name)
-                if gender_response:
-                    executive.gender = gender_response.sex
-                    print(f"   Gender detected from name: {executive.gender}")
-                else:
-                    print(f"   No gender found for {executive.name}")
 
-        print(f"\n--- Step 4: Consolidating Results ---")
+        print(f"\n--- Step 4: Image and Name Analysis ---")
+        for executive in searched:
+            if deadline is not None and deadline.expired:
+                print(f"\n>> Deadline exceeded - skipping the remaining executives")
+                break
+
+            print(f"\n>> Analyzing Executive: {executive.name}")
+            if executive.picture_url:
+                # get ethnicity and gender
+                print(f"   Analyzing ethnicity and gender from image...")
+                image_data = self.image_prefetcher.get(executive.picture_url, deadline)
+                ethgen_response: EthGenResponse | None = self.ethgen_api.call(
+                    executive.picture_url, deadline=deadline, image_data=image_data
+                )
+                if ethgen_response:
+                    executive.ethnicity = ethgen_response.ethnicity
+                    executive.gender = ethgen_response.sex
+                    print(f"   Image analysis complete - Ethnicity: {executive.ethnicity}, Gender: {executive.gender}")
+                    continue
+                print(f"   No ethnicity or gender found from image for {executive.name}")
+
+            # get gender from name
+            print(f"   Attempting name-based gender detection...")
+            gender_response: GenderResponse | None = self.gender_api.call(executive.name, deadline=deadline)
+            if gender_response:
+                executive.gender = gender_response.sex
+                print(f"   Gender detected from name: {executive.gender}")
+            else:
+                print(f"   No gender found for {executive.name}")
+
+        if deadline is not None and deadline.expired:
+            request.response.deadline_exceeded = True
+
+        print(f"\n--- Step 5: Consolidating Results ---")
         # if multiple executives, check if ethnicity and gender are the same
         if request.response.multiple_executives:
             print(f"Processing multiple executives for consistency...")
@@ -275,6 +352,7 @@ class LinkedInEthGenService:
         print(f"Family Owned: {request.response.is_family_owned}")
         print(f"Final Ethnicity: {request.response.ethnicity}")
         print(f"Final Gender: {request.response.gender}")
+        print(f"Deadline Exceeded: {request.response.deadline_exceeded}")
         
         for i, exec in enumerate(request.response.executives, 1):
             print(f"Executive {i}: {exec.name} ({exec.role}) - LinkedIn: {'Yes' if exec.linkedin_url else 'No'}, Image: {'Yes' if exec.picture_url else 'No'}, Ethnicity: {exec.ethnicity or 'N/A'}, Gender: {exec.gender or 'N/A'}")
@@ -283,20 +361,43 @@ class LinkedInEthGenService:
         print(f"========== LinkedIn EthGen Service Call Completed ==========\n")
         return request.response
     
-    def get_linkedin(self, name: str, company_name: str) -> str | None:
+    def get_linkedin(self, name: str, company_name: str, deadline: Deadline | None = None) -> str | None:
         """
         Search for LinkedIn profile URL using DuckDuckGo
         
         Args:
             name: Executive name
             company_name: Company name
+            deadline: Optional time budget for the search
             
         Returns:
             LinkedIn profile URL or None if not found
         """
-        linkedin_url = self.ddg_api.call(name=name, company_name=company_name)
+        linkedin_url = self.ddg_api.call(name=name, company_name=company_name, deadline=deadline)
         return linkedin_url
+
+    def get_profile_picture(self, linkedin_url: str, deadline: Deadline | None = None) -> str | None:
+        """
+        Extract the profile picture URL from a LinkedIn profile
+
+        Args:
+            linkedin_url: LinkedIn profile URL
+            deadline: Optional time budget; the page isn't loaded once it has run out
+
+        Returns:
+            Profile picture URL or None if not found
+        """
+        if deadline is not None and deadline.expired:
+            print(f"   Deadline exceeded - skipping profile picture")
+            return None
+        return self.browser.get_profile_picture_from_url(linkedin_url)
      
     def close(self):
         if self.browser:
-            self.browser.quit() 
\ No newline at end of file
+            self.browser.quit()
+        if self.name_lexicon is not None:
+            self.name_lexicon.save()
+        self.image_prefetcher.close()
+        self.ddg_api.close()
+        if self.image_cache is not None:
+            self.image_cache.close() 
\ No newline at end of file
@@ -0,0 +1,16 @@
+from typing import Any, Dict
+from unittest.mock import Mock
+
+
+def completion(content: str) -> Dict[str, Any]:
+    """A chat completion result as returned by `execute_query`, answering `content`."""
+    return {"choices": [{"message": {"content": content}}]}
+
+
+def download(content: bytes) -> Mock:
+    """A streamed `requests` response with body `content`."""
+    response = Mock(headers={}, content=content)
+    response.iter_content.side_effect = lambda chunk_size=1: (
+        content[i:i + chunk_size] for i in range(0, len(content), chunk_size)
+    )
+    return response
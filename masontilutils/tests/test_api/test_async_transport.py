@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from masontilutils.api.perplexity import PerplexityNAICSCodeAPI
+from masontilutils.api.deepseek import DeepseekNAICSCodeAPI
+
+from helpers import completion
+
+
+class TestAsyncTransport(unittest.IsolatedAsyncioTestCase):
+    def mock_client(self, handler):
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def test_call_async_parses_response(self):
+        """Test that call_async goes through the async transport and parses the answer"""
+        api = PerplexityNAICSCodeAPI("test_key")
+        client = self.mock_client(lambda request: httpx.Response(200, json=completion("NAICS: 541330")))
+
+        with patch.object(PerplexityNAICSCodeAPI, "_get_async_client", return_value=client):
+            result = await api.call_async(company_name="WSP USA Inc.", city="Briarcliff Manor", state="NY")
+
+        self.assertEqual(result, "541330")
+
+    async def test_semaphore_caps_in_flight_requests(self):
+        """Test that no more than max_concurrency requests are in flight at once"""
+        api = DeepseekNAICSCodeAPI("test_key")
+        api.max_concurrency = 3
+        in_flight = 0
+        peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json=completion("236220, 541310"))
+
+        client = self.mock_client(handler)
+        with patch.object(DeepseekNAICSCodeAPI, "_get_async_client", return_value=client):
+            results = await asyncio.gather(*(api.call_async(f"company {i}") for i in range(10)))
+
+        self.assertEqual(peak, 3)
+        self.assertTrue(all(r == ["236220", "541310"] for r in results))
+
+    async def test_rate_limit_retries(self):
+        """Test that a 429 is slept through and retried"""
+        api = PerplexityNAICSCodeAPI("test_key")
+        responses = [
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.Response(200, json=completion("236220")),
+        ]
+        client = self.mock_client(lambda request: responses.pop(0))
+
+        with patch.object(PerplexityNAICSCodeAPI, "_get_async_client", return_value=client):
+            result = await api.call_async(company_name="Test", city="Newark", state="NJ")
+
+        self.assertEqual(result, "236220")
+        self.assertEqual(responses, [])
+
+    async def test_http_error_returns_error_dict(self):
+        """Test that non-429 errors are returned as error dicts"""
+        api = PerplexityNAICSCodeAPI("test_key")
+        client = self.mock_client(lambda request: httpx.Response(500))
+
+        with patch.object(PerplexityNAICSCodeAPI, "_get_async_client", return_value=client):
+            response = await api.execute_query_async(query="test")
+
+        self.assertIn("error", response)
+        self.assertEqual(response["status_code"], 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import Mock, patch, PropertyMock
+
+import httpx
+import openai
+import requests
+
+from masontilutils.api.breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from masontilutils.api.chatgpt.base import ThreadedChatGPTAPI
+from masontilutils.api.deepseek import ThreadedDeepseekR1API, DeepseekBusinessDescriptionAPI
+from masontilutils.api.perplexity import ThreadedPerplexitySonarAPI, PerplexityBusinessDescAPI
+from masontilutils.api.pool import SessionPool
+from masontilutils.api.ratelimit import RateLimiter
+
+from helpers import completion
+
+OUTAGE = {"error": "API request failed: 503 Server Error", "status_code": 503}
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker("test", failure_threshold=3)
+        for _ in range(2):
+            breaker.record(OUTAGE)
+        breaker.record(completion("ok"))
+        for _ in range(2):
+            breaker.record(OUTAGE)
+        self.assertEqual(breaker.state, CLOSED)
+
+        breaker.record(OUTAGE)
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_client_errors_do_not_count(self):
+        breaker = CircuitBreaker("test", failure_threshold=1)
+        breaker.record({"error": "API request failed: 400 Bad Request", "status_code": 400})
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_half_open_lets_one_probe_through(self):
+        """Test that after the recovery timeout a single probe decides the state"""
+        breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0.05)
+        breaker.record(OUTAGE)
+        time.sleep(0.06)
+
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record(OUTAGE)
+        self.assertEqual(breaker.state, OPEN)
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record(completion("ok"))
+        self.assertEqual(breaker.state, CLOSED)
+
+
+class TestProbeRelease(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker("perplexity", failure_threshold=1, recovery_timeout=0.01)
+        self.breaker.record(OUTAGE)
+        time.sleep(0.02)
+        self.patch = patch.object(ThreadedPerplexitySonarAPI, "circuit_breaker", new_callable=PropertyMock,
+                                  return_value=self.breaker)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_probe_that_raises_reopens_the_circuit(self):
+        api = ThreadedPerplexitySonarAPI("test_key")
+        with patch.object(ThreadedPerplexitySonarAPI, "_send", side_effect=KeyError("choices")):
+            with self.assertRaises(KeyError):
+                api.execute_query(messages=[])
+        self.assertEqual(self.breaker.state, OPEN)
+
+        time.sleep(0.02)
+        self.assertTrue(self.breaker.allow())
+
+    async def test_cancelled_probe_is_released(self):
+        api = ThreadedPerplexitySonarAPI("test_key")
+
+        async def hang(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        with patch.object(ThreadedPerplexitySonarAPI, "_send_async", side_effect=hang):
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(api.execute_query_async(messages=[]), timeout=0.05)
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+
+
+class TestChatGPTCircuit(unittest.TestCase):
+    def test_retries_stop_once_the_circuit_opens(self):
+        """Test that a request waiting out retries gives up when other callers open the circuit"""
+        breaker = CircuitBreaker("openai", failure_threshold=1, recovery_timeout=60)
+        client = Mock()
+
+        def create(**kwargs):
+            breaker.record(OUTAGE)
+            raise openai.APIConnectionError(request=httpx.Request("POST", ThreadedChatGPTAPI.base_url))
+
+        client.chat.completions.with_raw_response.create.side_effect = create
+        with patch.object(ThreadedChatGPTAPI, "circuit_breaker", new_callable=PropertyMock, return_value=breaker), \
+                patch.object(ThreadedChatGPTAPI, "client", new_callable=PropertyMock, return_value=client), \
+                patch.object(ThreadedChatGPTAPI, "rate_limiter", new_callable=PropertyMock, return_value=RateLimiter("openai")), \
+                patch("masontilutils.api.chatgpt.base.time.sleep"):
+            response = ThreadedChatGPTAPI("test_key").execute_query(query="circuit test", model="gpt-4.1-mini")
+
+        self.assertTrue(response["circuit_open"])
+        client.chat.completions.with_raw_response.create.assert_called_once()
+
+
+class TestFailover(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker("perplexity", failure_threshold=2, recovery_timeout=60)
+        self.session = Mock()
+        error = requests.exceptions.HTTPError("503 Server Error", response=Mock(status_code=503, headers={}))
+        self.session.post.return_value.raise_for_status.side_effect = error
+        self.session.post.return_value.headers = {}
+
+        self.patches = [
+            patch.object(ThreadedPerplexitySonarAPI, "circuit_breaker", new_callable=PropertyMock, return_value=self.breaker),
+            patch.object(ThreadedPerplexitySonarAPI, "rate_limiter", new_callable=PropertyMock, return_value=RateLimiter("perplexity")),
+            patch.object(ThreadedPerplexitySonarAPI, "session_pool", new_callable=PropertyMock, return_value=SessionPool(lambda: self.session)),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_open_circuit_fails_fast(self):
+        """Test that no request is sent while the endpoint's circuit is open"""
+        api = PerplexityBusinessDescAPI("test_key")
+        for _ in range(2):
+            self.assertIsNone(api.call("Acme LLC", "Austin", "TX", "1 Main St"))
+        self.assertEqual(self.breaker.state, OPEN)
+
+        self.session.post.reset_mock()
+        started = time.monotonic()
+        response = api.execute_query(messages=[])
+        self.assertTrue(response["circuit_open"])
+        self.assertLess(time.monotonic() - started, 0.1)
+        self.session.post.assert_not_called()
+
+    def test_description_fails_over_to_deepseek(self):
+        fallback = DeepseekBusinessDescriptionAPI("deepseek_key", fallback=None)
+        api = PerplexityBusinessDescAPI("test_key", fallback=fallback)
+
+        with patch.object(ThreadedDeepseekR1API, "execute_query",
+                          return_value=completion("<think>...</think>Builds bridges.")) as deepseek_query:
+            for _ in range(3):
+                self.assertEqual(api.call("Acme LLC", "Austin", "TX", "1 Main St"), "Builds bridges.")
+
+        self.assertEqual(deepseek_query.call_count, 3)
+        self.assertEqual(self.session.post.call_count, 2)
+
+    def test_only_outages_fail_over(self):
+        fallback = DeepseekBusinessDescriptionAPI("deepseek_key")
+        api = PerplexityBusinessDescAPI("test_key", fallback=fallback)
+
+        for error in ({"error": "API request failed: 401 Unauthorized", "status_code": 401},
+                      {"error": "Cost budget exceeded", "status_code": 402, "budget_exceeded": True},
+                      {"error": "Deadline exceeded", "status_code": 408, "deadline_exceeded": True}):
+            with patch.object(ThreadedPerplexitySonarAPI, "execute_query", return_value=error), \
+                    patch.object(ThreadedDeepseekR1API, "execute_query") as deepseek_query:
+                self.assertIsNone(api.call("Acme LLC", "Austin", "TX", "1 Main St"))
+            deepseek_query.assert_not_called()
+
+        circuit_open = {"error": "Circuit open", "status_code": 503, "circuit_open": True}
+        with patch.object(ThreadedPerplexitySonarAPI, "execute_query", return_value=circuit_open), \
+                patch.object(ThreadedDeepseekR1API, "execute_query", return_value=completion("Builds bridges.")):
+            self.assertEqual(api.call("Acme LLC", "Austin", "TX", "1 Main St"), "Builds bridges.")
+
+    def test_mutual_fallbacks_do_not_loop(self):
+        fallback = DeepseekBusinessDescriptionAPI("deepseek_key")
+        api = PerplexityBusinessDescAPI("test_key", fallback=fallback)
+        fallback.fallback = api
+
+        with patch.object(ThreadedDeepseekR1API, "execute_query", return_value=OUTAGE):
+            self.assertIsNone(api.call("Acme LLC", "Austin", "TX", "1 Main St"))
+
+
+if __name__ == '__main__':
+    unittest.main()
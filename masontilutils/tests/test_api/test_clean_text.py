@@ -0,0 +1,86 @@
+import re
+import timeit
+import unittest
+
+from masontilutils.utils import DeepResearchTextCleaner, clean_deep_research_text
+
+
+def legacy_clean_deep_research_text(text):
+    """The two re.sub passes clean_deep_research_text used before"""
+    text = re.sub(r'\s*<think>.*?</think>\s*', '', text, flags=re.DOTALL)
+    text = re.sub(r'\[\s*\d+\s*\]', '', text)
+    return text.strip()
+
+
+def deep_research_answer(steps: int, sentences: int) -> str:
+    """A sonar-deep-research style answer: a long <think> section followed by a cited answer"""
+    think = "\n".join(
+        f"Step {i}: searching state filings [{i % 9 + 1}] and LinkedIn for the owner of Acme LLC, "
+        f"the profile says founder {{role}} since 2011 [ {i % 5 + 1} ]."
+        for i in range(steps)
+    )
+    answer = " ".join(f"Acme LLC is owned by Jane Doe, its founder [{i % 9 + 1}][{i % 4 + 1}]." for i in range(sentences))
+    return f"<think>\n{think}\n</think>\n\n{answer}\n"
+
+
+def clean_in_chunks(text: str, size: int) -> str:
+    cleaner = DeepResearchTextCleaner()
+    out = [cleaner.feed(text[i:i + size]) for i in range(0, len(text), size)]
+    out.append(cleaner.close())
+    return "".join(out)
+
+
+class TestCleanDeepResearchText(unittest.TestCase):
+    CASES = [
+        "<think>reasoning [1]</think>\n\nAnswer [1] text [ 23 ].",
+        "  Before <think>a</think>  after <think>b\n</think>end [2]  ",
+        "Jane Doe [1] <think>x</think> owns it",
+        "Price [USD] and list [a, 1] stay, [ 4 ] goes",
+        "<thi not a tag </think> and [ 7",
+        "",
+    ]
+
+    def test_matches_previous_cleaning(self):
+        for text in self.CASES + [deep_research_answer(20, 10)]:
+            self.assertEqual(clean_deep_research_text(text), legacy_clean_deep_research_text(text))
+
+    def test_unterminated_think_is_kept(self):
+        self.assertEqual(clean_deep_research_text("Answer [1] <think>cut off"), "Answer  <think>cut off")
+
+    def test_chunks_give_the_same_text(self):
+        for text in self.CASES + [deep_research_answer(20, 10)]:
+            for size in (1, 2, 3, 7, 64):
+                self.assertEqual(clean_in_chunks(text, size), clean_deep_research_text(text), (text, size))
+
+    def test_chunks_drop_unterminated_think(self):
+        self.assertEqual(clean_in_chunks("Answer [1] <think>cut off", 4), "Answer")
+
+    def test_think_text_is_not_buffered(self):
+        cleaner = DeepResearchTextCleaner()
+        cleaner.feed("<think>")
+        for _ in range(1000):
+            cleaner.feed("still reasoning about the owner [3] ")
+        self.assertLess(len(cleaner._pending), len("</think>"))
+        self.assertEqual(cleaner.feed("</think>Jane Doe [1]") + cleaner.close(), "Jane Doe")
+
+
+class TestCleanDeepResearchTextBenchmark(unittest.TestCase):
+    """
+    Micro-benchmark of the previous two-pass cleaner against the single-pass one on a
+    multi-hundred-KB deep-research answer. Prints both timings.
+    """
+
+    def test_faster_on_large_answers(self):
+        text = deep_research_answer(steps=3000, sentences=2000)
+        self.assertEqual(clean_deep_research_text(text), legacy_clean_deep_research_text(text))
+
+        legacy = min(timeit.repeat(lambda: legacy_clean_deep_research_text(text), number=5, repeat=3)) / 5
+        current = min(timeit.repeat(lambda: clean_deep_research_text(text), number=5, repeat=3)) / 5
+        chunked = min(timeit.repeat(lambda: clean_in_chunks(text, 4096), number=5, repeat=3)) / 5
+        print(f"\n{len(text) / 1024:.0f} KiB answer: two passes {legacy * 1000:.2f} ms, "
+              f"single pass {current * 1000:.2f} ms ({legacy / current:.1f}x), 4 KiB chunks {chunked * 1000:.2f} ms")
+        self.assertLess(current, legacy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch, PropertyMock
+
+from masontilutils.api.breaker import CircuitBreaker
+from masontilutils.api.chatgpt.base import ThreadedChatGPTAPI
+from masontilutils.api.ledger import BudgetExceededError, CostLedger
+from masontilutils.api.perplexity import ThreadedPerplexitySonarAPI
+from masontilutils.api.pool import SessionPool
+from masontilutils.api.ratelimit import RateLimiter
+from masontilutils.api.usage import collect_usage
+
+USAGE = {"prompt_tokens": 1_000_000, "completion_tokens": 100_000, "total_tokens": 1_100_000}
+
+
+class TestCostLedger(unittest.TestCase):
+    def test_rolls_up_per_request_api_and_model(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "costs.jsonl")
+            ledger = CostLedger(path=path)
+            ledger.record("req-1", "PerplexityExecutiveAPI", "sonar-deep-research", USAGE)
+            ledger.record("req-1", "ChatGPTEthGenAPI", "gpt-4.1", USAGE)
+            ledger.record("req-2", "ChatGPTEthGenAPI", "gpt-4.1", USAGE)
+
+            with open(path) as f:
+                entries = [json.loads(line) for line in f]
+
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(entries[0]["request_id"], "req-1")
+        # $2 per million prompt tokens + $8 per million completion tokens
+        self.assertAlmostEqual(ledger.by_request["req-2"].cost, 2.8)
+        self.assertAlmostEqual(ledger.by_request["req-1"].cost, 5.6)
+        self.assertEqual(ledger.by_api["ChatGPTEthGenAPI"].requests, 2)
+        self.assertEqual(ledger.by_model["gpt-4.1"].completion_tokens, 200_000)
+        self.assertAlmostEqual(ledger.total.cost, 8.4)
+        self.assertEqual(ledger.report()["run"]["requests"], 3)
+
+    def test_budget_stops_requests(self):
+        session = Mock()
+        session.post.return_value.ok = True
+        session.post.return_value.headers = {}
+        session.post.return_value.json.return_value = {"choices": [{"message": {"content": "ok"}}], "usage": USAGE}
+        ledger = CostLedger(budget=1.0)
+
+        with patch.object(ThreadedPerplexitySonarAPI, "session_pool", new_callable=PropertyMock,
+                          return_value=SessionPool(lambda: session)), \
+                patch.object(ThreadedPerplexitySonarAPI, "rate_limiter", new_callable=PropertyMock,
+                             return_value=RateLimiter("perplexity")), \
+                patch.object(ThreadedPerplexitySonarAPI, "circuit_breaker", new_callable=PropertyMock,
+                             return_value=CircuitBreaker("perplexity")):
+            api = ThreadedPerplexitySonarAPI("test_key")
+            ledger.check()
+            with ledger.track("req-1"):
+                first = api.execute_query(query="first", model="sonar")
+                second = api.execute_query(query="second", model="sonar")
+
+        self.assertNotIn("error", first)
+        self.assertTrue(second["budget_exceeded"])
+        self.assertEqual(session.post.call_count, 1)
+        self.assertEqual(ledger.by_request["req-1"].requests, 1)
+        with self.assertRaises(BudgetExceededError):
+            ledger.check()
+
+
+class TestChatGPTUsage(unittest.TestCase):
+    def test_result_keeps_usage(self):
+        completion = Mock()
+        completion.choices = [Mock(message=Mock(content="ok"))]
+        completion.usage.total_tokens = 30
+        completion.usage.model_dump.return_value = {"prompt_tokens": 20, "completion_tokens": 10, "total_tokens": 30}
+        client = Mock()
+        client.chat.completions.with_raw_response.create.return_value = Mock(headers={}, parse=Mock(return_value=completion))
+
+        with patch.object(ThreadedChatGPTAPI, "client", new_callable=PropertyMock, return_value=client), \
+                patch.object(ThreadedChatGPTAPI, "circuit_breaker", new_callable=PropertyMock,
+                             return_value=CircuitBreaker("openai")):
+            with collect_usage() as usage:
+                result = ThreadedChatGPTAPI("test_key").execute_query(query="usage test", model="gpt-4.1-mini")
+
+        self.assertEqual(result["usage"]["completion_tokens"], 10)
+        self.assertEqual(usage.total_tokens, 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
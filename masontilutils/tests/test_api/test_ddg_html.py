@@ -0,0 +1,129 @@
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+
+import requests
+
+from masontilutils.api.deadline import Deadline
+from masontilutils.api.duckduckgo import DDGHTMLSearch, DuckDuckGoLinkedInAPI
+from masontilutils.api.duckduckgo.html_search import DDGBlockedError
+from masontilutils.api.pool import SessionPool
+
+FIXTURES = Path(__file__).parent / 'test_data' / 'ddg_html'
+
+
+def page(name: str, status_code: int = 200) -> Mock:
+    return Mock(status_code=status_code, text=(FIXTURES / name).read_text())
+
+
+class TestDDGHTMLParser(unittest.TestCase):
+    def setUp(self):
+        self.search = DDGHTMLSearch()
+
+    def test_results_page(self):
+        results = self.search._parse_response((FIXTURES / 'results.html').read_text())
+
+        self.assertEqual([r['url'] for r in results], [
+            "https://www.linkedin.com/in/jane-doe-4b1a2c3",
+            "https://www.linkedin.com/company/acme-corp",
+            "https://www.linkedin.com/in/john-smith-acme?trk=public",
+        ])
+        self.assertEqual(results[0]['title'], "Jane Doe - Chief Executive Officer - Acme | LinkedIn")
+        self.assertEqual(
+            results[0]['description'],
+            "Chief Executive Officer at Acme · Experience: Acme · Location: Austin · 500+ connections "
+            "on LinkedIn. View Jane Doe's profile on LinkedIn."
+        )
+        self.assertIsNone(results[2]['description'])
+
+    def test_no_results_page(self):
+        self.assertEqual(self.search._parse_response((FIXTURES / 'no_results.html').read_text()), [])
+
+    def test_challenge_and_unknown_pages_are_blocks(self):
+        with self.assertRaises(DDGBlockedError):
+            self.search._parse_response((FIXTURES / 'challenge.html').read_text())
+        with self.assertRaises(DDGBlockedError):
+            self.search._parse_response("<html><body><h1>Something went wrong</h1></body></html>")
+
+
+class TestDDGHTMLSearch(unittest.TestCase):
+    def setUp(self):
+        self.session = Mock()
+        self.session.post.return_value = page('results.html')
+        self.fallback = Mock()
+        self.fallback.search.return_value = [{"url": "https://www.linkedin.com/in/from-selenium"}]
+        self.factory = Mock(return_value=self.fallback)
+        self.search = DDGHTMLSearch(
+            fallback=self.factory,
+            min_interval=0.0,
+            sessions=SessionPool(lambda: self.session),
+        )
+
+    def test_searches_without_starting_the_fallback(self):
+        results = self.search.search("jane doe acme")
+
+        self.assertEqual(results[0]['url'], "https://www.linkedin.com/in/jane-doe-4b1a2c3")
+        self.session.post.assert_called_once_with(
+            "https://html.duckduckgo.com/html/", data={"q": "jane doe acme", "b": ""}, timeout=10.0
+        )
+        self.factory.assert_not_called()
+
+    def test_falls_back_while_blocked(self):
+        self.session.post.return_value = page('challenge.html', status_code=202)
+        self.assertEqual(self.search.search("q1"), self.fallback.search.return_value)
+        self.assertTrue(self.search.blocked)
+
+        self.search.search("q2")
+        self.session.post.assert_called_once()
+        self.assertEqual([c.args for c in self.fallback.search.call_args_list], [("q1", None), ("q2", None)])
+        self.factory.assert_called_once()
+
+        self.search._blocked_until = 0
+        self.session.post.return_value = page('results.html')
+        self.assertEqual(self.search.search("q3")[0]['url'], "https://www.linkedin.com/in/jane-doe-4b1a2c3")
+
+    def test_challenge_page_with_ok_status_is_a_block(self):
+        self.session.post.return_value = page('challenge.html')
+        self.search.search("q")
+        self.assertTrue(self.search.blocked)
+        self.fallback.search.assert_called_once_with("q", None)
+
+    def test_connection_errors_fall_back_without_blocking(self):
+        self.session.post.side_effect = requests.ConnectionError("connection reset")
+        self.assertEqual(self.search.search("q"), self.fallback.search.return_value)
+        self.assertFalse(self.search.blocked)
+
+    def test_blocked_without_fallback_returns_nothing(self):
+        self.search.fallback_factory = None
+        self.session.post.return_value = page('challenge.html', status_code=403)
+        self.assertEqual(self.search.search("q"), [])
+
+    def test_requests_are_paced(self):
+        self.search.min_interval = 0.1
+        started = time.monotonic()
+        for _ in range(3):
+            self.search.search("q")
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+        # A deadline shorter than the wait for the next slot skips the search
+        self.assertEqual(self.search.search("q", Deadline(0.01)), [])
+        self.assertEqual(self.session.post.call_count, 3)
+
+
+class TestDuckDuckGoLinkedInHTMLBackend(unittest.TestCase):
+    def test_finds_the_profile_without_a_browser(self):
+        api = DuckDuckGoLinkedInAPI(backend="html")
+        session = Mock()
+        session.post.return_value = page('results.html')
+        api.api.sessions = SessionPool(lambda: session)
+
+        self.assertEqual(api.call("Jane Doe", "Acme Inc."), "https://www.linkedin.com/in/jane-doe-4b1a2c3")
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            DuckDuckGoLinkedInAPI(backend="lynx")
+
+
+if __name__ == '__main__':
+    unittest.main()
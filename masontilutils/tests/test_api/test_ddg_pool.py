@@ -0,0 +1,120 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from masontilutils.api.deadline import Deadline
+from masontilutils.api.duckduckgo import DDGSearchPool
+
+
+class FakeDriver:
+    """DDGSearch stand-in that paces its own searches `interval` seconds apart"""
+
+    interval = 0.1
+    started = []
+
+    def __init__(self, headless: bool = True):
+        self.last_request_time = 0
+        self.searches = []
+        self.closed = False
+        self.in_use = threading.Lock()
+        FakeDriver.started.append(self)
+
+    def search(self, query, deadline=None):
+        assert self.in_use.acquire(blocking=False), "driver used by two threads at once"
+        try:
+            wait = self.last_request_time + self.interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self.last_request_time = time.monotonic()
+            self.searches.append(self.last_request_time)
+            time.sleep(0.02)  # Page load
+            return [{"url": f"https://www.linkedin.com/in/{query}", "title": query, "description": None}]
+        finally:
+            self.in_use.release()
+
+    def close(self):
+        self.closed = True
+
+
+def search_all(pool: DDGSearchPool, count: int) -> float:
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        results = list(executor.map(pool.search, [f"q{i}" for i in range(count)]))
+    assert [r[0]["title"] for r in results] == [f"q{i}" for i in range(count)]
+    return time.monotonic() - started
+
+
+class TestDDGSearchPool(unittest.TestCase):
+    def setUp(self):
+        FakeDriver.started = []
+
+    def test_throughput_scales_with_pool_size(self):
+        single = DDGSearchPool(size=1, factory=FakeDriver)
+        search_all(single, 4)  # Warm the driver's pacing clock like a running service
+        single_time = search_all(single, 8)
+
+        FakeDriver.started = []
+        pool = DDGSearchPool(size=4, factory=FakeDriver)
+        search_all(pool, 4)
+        pool_time = search_all(pool, 8)
+
+        print(f"\n8 searches: 1 driver {single_time:.2f}s, 4 drivers {pool_time:.2f}s")
+        self.assertLess(pool_time, single_time / 2)
+        self.assertEqual(pool.running, 4)
+        for driver in FakeDriver.started:
+            gaps = [b - a for a, b in zip(driver.searches, driver.searches[1:])]
+            self.assertTrue(all(gap >= FakeDriver.interval - 0.005 for gap in gaps))
+
+    def test_drivers_start_on_demand(self):
+        pool = DDGSearchPool(size=3, factory=FakeDriver)
+        self.assertEqual(pool.running, 1)
+        for i in range(3):
+            pool.search(f"q{i}")
+        self.assertEqual(pool.running, 1)
+
+        search_all(pool, 6)
+        self.assertLessEqual(pool.running, 3)
+
+    def test_most_rested_driver_is_used_first(self):
+        pool = DDGSearchPool(size=2, factory=FakeDriver)
+        with pool.driver() as first, pool.driver() as second:
+            first.last_request_time = time.monotonic()
+        with pool.driver() as driver:
+            self.assertIs(driver, second)
+
+    def test_deadline_while_every_driver_is_busy(self):
+        pool = DDGSearchPool(size=1, factory=FakeDriver)
+        with pool.driver():
+            started = time.monotonic()
+            self.assertEqual(pool.search("q", Deadline(0.05)), [])
+            self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_failed_driver_start_shrinks_the_pool(self):
+        def factory(headless=True):
+            if FakeDriver.started:
+                raise RuntimeError("Failed to initialize WebDriver")
+            return FakeDriver(headless)
+
+        pool = DDGSearchPool(size=3, factory=factory)
+        search_all(pool, 4)
+        self.assertEqual((pool.running, pool.size), (1, 1))
+
+        with self.assertRaises(RuntimeError):
+            DDGSearchPool(factory=factory)
+
+    def test_close_quits_idle_and_returned_drivers(self):
+        pool = DDGSearchPool(size=2, factory=FakeDriver)
+        with pool.driver() as busy:
+            with pool.driver() as idle:
+                pass
+            pool.close()
+            self.assertTrue(idle.closed)
+            self.assertFalse(busy.closed)
+        self.assertTrue(busy.closed)
+        with self.assertRaises(RuntimeError):
+            pool.search("q")
+
+
+if __name__ == '__main__':
+    unittest.main()
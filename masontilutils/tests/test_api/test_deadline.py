@@ -0,0 +1,87 @@
+import time
+import unittest
+from unittest.mock import Mock, patch, PropertyMock
+
+from masontilutils.api.breaker import CircuitBreaker, CLOSED
+from masontilutils.api.deadline import Deadline, current_deadline, deadline_scope
+from masontilutils.api.perplexity import ThreadedPerplexitySonarAPI, PerplexityExecutiveAPI
+from masontilutils.api.pool import SessionPool
+from masontilutils.api.ratelimit import RateLimiter
+
+EXECUTIVE_JSON = '{"1": {"name": "Jane Doe", "role": "CEO", "sources": ["https://example.com"]}}'
+
+
+class TestDeadline(unittest.TestCase):
+    def test_timeout_is_capped_at_remaining_time(self):
+        deadline = Deadline(10)
+        self.assertLessEqual(deadline.timeout(500), 10)
+        self.assertEqual(deadline.timeout(1), 1)
+        self.assertFalse(deadline.expired)
+        self.assertTrue(Deadline(0).expired)
+
+    def test_sleep_stops_at_deadline(self):
+        deadline = Deadline(0.05)
+        started = time.monotonic()
+        self.assertFalse(deadline.sleep(5))
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_scopes_keep_the_earlier_deadline(self):
+        outer, inner = Deadline(10), Deadline(60)
+        with deadline_scope(outer):
+            with deadline_scope(inner):
+                self.assertIs(current_deadline(), outer)
+            with deadline_scope(None):
+                self.assertIs(current_deadline(), outer)
+            with deadline_scope(Deadline(1)) as shorter:
+                self.assertIs(current_deadline(), shorter)
+        self.assertIsNone(current_deadline())
+
+
+class TestTransportDeadline(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker("perplexity", failure_threshold=1)
+        self.limiter = RateLimiter("perplexity")
+        self.session = Mock()
+        self.session.post.return_value.ok = True
+        self.session.post.return_value.headers = {}
+        self.session.post.return_value.json.return_value = {
+            "choices": [{"message": {"content": EXECUTIVE_JSON}}]
+        }
+
+        self.patches = [
+            patch.object(ThreadedPerplexitySonarAPI, "circuit_breaker", new_callable=PropertyMock, return_value=self.breaker),
+            patch.object(ThreadedPerplexitySonarAPI, "rate_limiter", new_callable=PropertyMock, return_value=self.limiter),
+            patch.object(ThreadedPerplexitySonarAPI, "session_pool", new_callable=PropertyMock, return_value=SessionPool(lambda: self.session)),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_request_timeout_fits_the_deadline(self):
+        response = PerplexityExecutiveAPI("test_key").call("Acme LLC", "Austin", "TX", "1 Main St", deadline=Deadline(10))
+        self.assertEqual(response.executives[0].name, "Jane Doe")
+        self.assertLessEqual(self.session.post.call_args.kwargs["timeout"], 10)
+
+    def test_expired_deadline_sends_nothing(self):
+        response = PerplexityExecutiveAPI("test_key").call("Acme LLC", "Austin", "TX", "1 Main St", deadline=Deadline(0))
+        self.assertIsNone(response)
+        self.session.post.assert_not_called()
+        # Running out of time says nothing about the endpoint's health
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_rate_limit_wait_longer_than_deadline_is_skipped(self):
+        """Test that a rate limit cooldown past the deadline fails fast instead of sleeping"""
+        self.limiter.pause(60)
+        started = time.monotonic()
+        with deadline_scope(Deadline(1)):
+            response = ThreadedPerplexitySonarAPI("test_key").execute_query(messages=[])
+        self.assertTrue(response["deadline_exceeded"])
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.session.post.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
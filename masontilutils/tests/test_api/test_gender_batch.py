@@ -0,0 +1,95 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from masontilutils.api.chatgpt.ethgen import ChatGPTGenderAPI
+from masontilutils.api.responses.ethgen.ethgen import GenderResponse
+
+from helpers import completion
+
+
+def requested_names(payload: dict) -> list:
+    return json.loads(payload["messages"][1]["content"][0]["text"])["names"]
+
+
+class TestChatGPTGenderBatch(unittest.TestCase):
+    def setUp(self):
+        self.api = ChatGPTGenderAPI("test_key")
+
+    def test_unique_first_names_share_one_request(self):
+        """Test that names are deduplicated by first name and answered in one call"""
+        def answer(**payload):
+            return completion(json.dumps({"John": {"sex": "Male"}, "Maria": {"sex": "Female"}}))
+
+        with patch.object(ChatGPTGenderAPI, "execute_query", side_effect=answer) as execute_query:
+            res = self.api.call_many(["John Doe", "Maria Garcia", "john Smith", ""])
+
+        self.assertEqual(execute_query.call_count, 1)
+        self.assertEqual(requested_names(execute_query.call_args.kwargs), ["John", "Maria"])
+        self.assertEqual(res["John Doe"], GenderResponse(sex="Male"))
+        self.assertEqual(res["john Smith"], GenderResponse(sex="Male"))
+        self.assertEqual(res["Maria Garcia"], GenderResponse(sex="Female"))
+        self.assertIsNone(res[""])
+
+    def test_batches_are_split_by_size(self):
+        def answer(**payload):
+            if payload["messages"][0] is self.api.system_message:
+                return completion('{"sex": "Female"}')
+            return completion(json.dumps({name: "Female" for name in requested_names(payload)}))
+
+        names = [f"Name{i} Last" for i in range(5)]
+        with patch.object(ChatGPTGenderAPI, "execute_query", side_effect=answer) as execute_query:
+            res = self.api.call_many(names, batch_size=2)
+
+        self.assertEqual(execute_query.call_count, 3)
+        self.assertTrue(all(r == GenderResponse(sex="Female") for r in res.values()))
+
+    def test_missing_names_are_retried(self):
+        """Test that names left out of a batch answer are split off and retried alone"""
+        def answer(**payload):
+            if payload["messages"][0] is self.api.system_message:
+                return completion('{"sex": "Female"}')
+            names = requested_names(payload)
+            return completion(json.dumps({name: {"sex": "Male"} for name in names if name != "Alex"}))
+
+        with patch.object(ChatGPTGenderAPI, "execute_query", side_effect=answer) as execute_query:
+            res = self.api.call_many(["Alex Kim", "Brad Pitt", "Chris Evans"])
+
+        self.assertEqual(res["Brad Pitt"], GenderResponse(sex="Male"))
+        self.assertEqual(res["Chris Evans"], GenderResponse(sex="Male"))
+        self.assertEqual(res["Alex Kim"], GenderResponse(sex="Female"))
+        self.assertEqual(execute_query.call_count, 2)
+
+    def test_null_answers_are_not_retried(self):
+        """Test that names the model answered with null or an unknown value count as answered"""
+        answer = completion(json.dumps({"Alex": {"sex": None}, "Brad": None, "Chris": {"sex": "Unknown"}}))
+
+        with patch.object(ChatGPTGenderAPI, "execute_query", return_value=answer) as execute_query:
+            res = self.api.call_many(["Alex Kim", "Brad Pitt", "Chris Evans"])
+
+        self.assertEqual(execute_query.call_count, 1)
+        self.assertEqual(res["Alex Kim"], GenderResponse(sex=None))
+        self.assertEqual(res["Brad Pitt"], GenderResponse(sex=None))
+        self.assertIsNone(res["Chris Evans"])
+
+    def test_unparseable_batch_falls_back_to_single_calls(self):
+        def answer(**payload):
+            if payload["messages"][0] is self.api.system_message:
+                return completion('{"sex": "Male"}')
+            return completion("I cannot answer that")
+
+        with patch.object(ChatGPTGenderAPI, "execute_query", side_effect=answer) as execute_query:
+            res = self.api.call_many(["Adam A", "Ben B"])
+
+        self.assertEqual(res, {"Adam A": GenderResponse(sex="Male"), "Ben B": GenderResponse(sex="Male")})
+        self.assertEqual(execute_query.call_count, 3)
+
+    def test_api_error_returns_none(self):
+        with patch.object(ChatGPTGenderAPI, "execute_query", return_value={"error": "boom", "status_code": 500}):
+            res = self.api.call_many(["Adam A", "Ben B"])
+
+        self.assertEqual(res, {"Adam A": None, "Ben B": None})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import asyncio
+import itertools
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch, PropertyMock
+
+import httpx
+
+from masontilutils.api.hedging import HedgedAttempt, HedgePolicy, LatencyTracker
+from masontilutils.api.pool import SessionPool
+from masontilutils.api.ratelimit import RateLimiter
+from masontilutils.api.perplexity import ThreadedPerplexitySonarAPI, PerplexityNAICSCodeAPI
+
+from helpers import completion
+
+
+UNLIMITED = RateLimiter("perplexity")
+
+
+def warm_policy(**kwargs) -> HedgePolicy:
+    policy = HedgePolicy(min_samples=5, **kwargs)
+    policy.requests = 100
+    for _ in range(5):
+        policy.record("PerplexityNAICSCodeAPI", 0.05)
+    return policy
+
+
+class TestHedgePolicy(unittest.TestCase):
+    def test_quantile(self):
+        tracker = LatencyTracker()
+        for i in range(1, 101):
+            tracker.record(i / 100)
+        self.assertEqual(tracker.quantile(0.95), 0.95)
+        self.assertEqual(tracker.quantile(0.5), 0.5)
+
+    def test_no_hedging_before_min_samples(self):
+        policy = HedgePolicy(min_samples=3)
+        self.assertIsNone(policy.start("api"))
+        for _ in range(3):
+            policy.record("api", 1.0)
+        self.assertEqual(policy.start("api"), 1.0)
+
+    def test_hedge_ratio_is_capped(self):
+        policy = HedgePolicy(max_ratio=0.1)
+        policy.requests = 20
+        self.assertTrue(policy.allow_hedge())
+        self.assertTrue(policy.allow_hedge())
+        self.assertFalse(policy.allow_hedge())
+
+
+class TestHedgedRequests(unittest.TestCase):
+    def setUp(self):
+        self.calls = itertools.count()
+        self.release = threading.Event()
+        self.sessions = []
+
+    def tearDown(self):
+        self.release.set()
+
+    def new_session(self):
+        def post(*args, **kwargs):
+            if next(self.calls) == 0:
+                # The first request is stuck in the tail
+                self.release.wait(5)
+            response = Mock(headers={}, ok=True)
+            response.json.return_value = completion("541330")
+            return response
+
+        session = Mock()
+        session.post.side_effect = post
+        self.sessions.append(session)
+        return session
+
+    def call(self, policy: HedgePolicy):
+        pool = SessionPool(self.new_session)
+        api = PerplexityNAICSCodeAPI("test_key")
+        with patch.object(ThreadedPerplexitySonarAPI, "hedge", policy), \
+                patch.object(ThreadedPerplexitySonarAPI, "rate_limiter", new_callable=PropertyMock, return_value=UNLIMITED), \
+                patch.object(ThreadedPerplexitySonarAPI, "session_pool", new_callable=PropertyMock, return_value=pool):
+            started = time.monotonic()
+            result = api.call(company_name="Slow Co", city="Austin", state="TX")
+            return result, time.monotonic() - started
+
+    def test_slow_request_is_hedged(self):
+        """Test that a duplicate answers a request stuck past p95 and the original is dropped"""
+        policy = warm_policy()
+        result, elapsed = self.call(policy)
+
+        self.assertEqual(result, "541330")
+        self.assertLess(elapsed, 2)
+        self.assertEqual(policy.stats()["hedges"], 1)
+        self.assertEqual(policy.hedge_wins, 1)
+        self.sessions[0].close.assert_called_once()
+
+    def test_finished_loser_does_not_close_a_reused_session(self):
+        """Test that cancelling a copy that already checked its session in leaves the session alone"""
+        self.release.set()
+        pool = SessionPool(self.new_session)
+        api = PerplexityNAICSCodeAPI("test_key")
+        attempt = HedgedAttempt()
+        with patch.object(ThreadedPerplexitySonarAPI, "rate_limiter", new_callable=PropertyMock, return_value=UNLIMITED), \
+                patch.object(ThreadedPerplexitySonarAPI, "session_pool", new_callable=PropertyMock, return_value=pool):
+            self.assertNotIn("error", api._send({"model": "sonar", "messages": []}, attempt=attempt))
+
+        with pool.session() as session:
+            # Another request now uses the session the loser finished with
+            self.assertIs(session, self.sessions[0])
+            attempt.cancel()
+        session.close.assert_not_called()
+        self.assertEqual(len(self.sessions), 1)
+
+    def test_hedges_stay_within_budget(self):
+        policy = warm_policy(max_ratio=0.0)
+        threading.Timer(0.3, self.release.set).start()
+        result, elapsed = self.call(policy)
+
+        self.assertEqual(result, "541330")
+        self.assertGreaterEqual(elapsed, 0.3)
+        self.assertEqual(policy.hedges, 0)
+        self.assertEqual(len(self.sessions), 1)
+
+
+class TestHedgedRequestsAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_losing_task_is_cancelled(self):
+        calls = itertools.count()
+        cancelled = asyncio.Event()
+
+        async def handler(request):
+            if next(calls) == 0:
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.set()
+                    raise
+            return httpx.Response(200, json=completion("541330"))
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        policy = warm_policy()
+        api = PerplexityNAICSCodeAPI("test_key")
+        with patch.object(ThreadedPerplexitySonarAPI, "hedge", policy), \
+                patch.object(ThreadedPerplexitySonarAPI, "rate_limiter", new_callable=PropertyMock, return_value=UNLIMITED), \
+                patch.object(PerplexityNAICSCodeAPI, "_get_async_client", return_value=client):
+            result = await api.call_async(company_name="Slow Co", city="Austin", state="TX")
+            await asyncio.wait_for(cancelled.wait(), 1)
+
+        self.assertEqual(result, "541330")
+        self.assertEqual(policy.hedge_wins, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
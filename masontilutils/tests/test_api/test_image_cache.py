@@ -0,0 +1,112 @@
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from PIL import Image
+
+from masontilutils.api.chatgpt import ChatGPTEthGenAPI
+from masontilutils.api.image_cache import ImageCache
+from masontilutils.api.images import hash_distance
+from masontilutils.api.responses.ethgen.ethgen import EthGenResponse
+
+from helpers import completion
+
+IMAGES = sorted((Path(__file__).parent / 'test_images').glob('*.jpg'))
+
+
+def recompressed(path: Path, scale: float = 0.5) -> bytes:
+    """The same photo as served at another size and quality"""
+    with Image.open(path) as image:
+        image = image.convert("RGB").resize((int(image.width * scale), int(image.height * scale)))
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=70)
+        return output.getvalue()
+
+
+class TestImageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "images.sqlite")
+        self.cache = ImageCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_hash_survives_resizing_and_tells_people_apart(self):
+        hashes = [self.cache.fingerprint(path.read_bytes()) for path in IMAGES]
+        for path, fingerprint in zip(IMAGES, hashes):
+            self.assertLessEqual(hash_distance(fingerprint, self.cache.fingerprint(recompressed(path))), self.cache.max_distance)
+        for i, a in enumerate(hashes):
+            for b in hashes[i + 1:]:
+                self.assertGreater(hash_distance(a, b), self.cache.max_distance)
+
+    def test_near_duplicates_hit_after_reopening(self):
+        self.cache.set(self.cache.fingerprint(IMAGES[0].read_bytes()), EthGenResponse(ethnicity="A", sex="M"))
+        self.cache.close()
+
+        self.cache = ImageCache(self.path)
+        self.assertEqual(self.cache.get(self.cache.fingerprint(recompressed(IMAGES[0]))), EthGenResponse("A", "M"))
+        self.assertIsNone(self.cache.get(self.cache.fingerprint(IMAGES[1].read_bytes())))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_placeholders(self):
+        self.assertTrue(self.cache.is_placeholder(url="https://static.licdn.com/aero-v1/sc/h/9c8pery4andzj6ohjkjp54ma2"))
+        self.assertFalse(self.cache.is_placeholder(url="https://media.licdn.com/dms/image/v2/profile-displayphoto.jpg"))
+        self.assertTrue(self.cache.is_placeholder(
+            url="https://www.linkedin.com/scds/common/u/images/themes/katy/ghosts/person/ghost_person_100x100_v1.png"
+        ))
+        # Only LinkedIn's ghost avatar paths, not any URL containing "ghost"
+        self.assertFalse(self.cache.is_placeholder(url="https://media.licdn.com/dms/image/v2/ghostwriter-profile.jpg"))
+        self.assertFalse(self.cache.is_placeholder(url="https://example.com/ghost.png"))
+
+        output = io.BytesIO()
+        Image.new("RGB", (200, 200), (220, 220, 220)).save(output, format="PNG")
+        self.assertTrue(self.cache.is_placeholder(self.cache.fingerprint(output.getvalue())))
+
+        fingerprint = self.cache.fingerprint(IMAGES[0].read_bytes())
+        self.assertFalse(self.cache.is_placeholder(fingerprint))
+        self.cache.block(fingerprint)
+        self.cache.close()
+        self.cache = ImageCache(self.path)
+        self.assertTrue(self.cache.is_placeholder(self.cache.fingerprint(recompressed(IMAGES[0]))))
+
+
+class TestEthGenImageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ImageCache(os.path.join(self.tmp.name, "images.sqlite"))
+        self.api = ChatGPTEthGenAPI("test_key", image_cache=self.cache)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_same_photo_is_analysed_once(self):
+        copy = os.path.join(self.tmp.name, "copy.jpg")
+        with open(copy, "wb") as f:
+            f.write(recompressed(IMAGES[2]))
+
+        with patch.object(ChatGPTEthGenAPI, "execute_query",
+                          return_value=completion('{"sex": "Female", "region": "East Asia"}')) as query:
+            first = self.api.call(str(IMAGES[2]), parse_url=False)
+            second = self.api.call(copy, parse_url=False)
+
+        self.assertEqual(first, second)
+        query.assert_called_once()
+
+    def test_placeholder_skips_the_vision_call(self):
+        with patch.object(ChatGPTEthGenAPI, "execute_query") as query, \
+                patch("masontilutils.api.chatgpt.ethgen.load_image") as load:
+            result = self.api.call("https://static.licdn.com/aero-v1/sc/h/9c8pery4andzj6ohjkjp54ma2")
+
+        self.assertIsNone(result)
+        query.assert_not_called()
+        load.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
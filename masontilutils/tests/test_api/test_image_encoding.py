@@ -0,0 +1,134 @@
+import base64
+import os
+import tempfile
+import tracemalloc
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+from masontilutils.api.chatgpt import ChatGPTEthGenAPI
+from masontilutils.api.images import MAX_CONCURRENT_ENCODES, encode_data_uri
+
+from helpers import completion
+
+IMAGES = sorted((Path(__file__).parent / 'test_images').glob('*.jpg'))
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 40
+
+
+def legacy_encode(image_path: str) -> str:
+    """The former whole-file encoding of ChatGPTEthGenAPI._encode_image"""
+    with open(image_path, "rb") as image_file:
+        base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+    return f"data:image/{image_path.split('.')[-1]};base64,{base64_image}"
+
+
+def peak_memory(func, *args) -> int:
+    """Peak bytes allocated while running func; the results are dropped as soon as they are made"""
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def encode_concurrently(encode, path: str, threads: int = 16):
+    """Encode on many threads at once, each dropping its data URI like a sent request"""
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for _ in executor.map(lambda p: len(encode(p)), [path] * threads):
+            pass
+
+
+class TestEncodeDataUri(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_matches_whole_file_encoding(self):
+        for path in IMAGES:
+            data = path.read_bytes()
+            expected = f"data:image/jpeg;base64,{base64.b64encode(data).decode()}"
+            self.assertEqual(encode_data_uri(str(path)), expected)
+            self.assertEqual(encode_data_uri(data), expected)
+
+    def test_chunk_boundaries(self):
+        for size in range(len(PNG) - 5, len(PNG) + 1):
+            path = self.write("image.png", PNG[:size])
+            expected = f"data:image/png;base64,{base64.b64encode(PNG[:size]).decode()}"
+            for chunk_size in (12, 300, 3 * 1024):
+                self.assertEqual(encode_data_uri(path, chunk_size=chunk_size), expected)
+
+    def test_mime_type_comes_from_the_content(self):
+        path = self.write("photo.jpg", PNG)
+        self.assertTrue(encode_data_uri(path).startswith("data:image/png;base64,"))
+        with self.assertRaises(ValueError):
+            encode_data_uri(self.write("page.jpg", b"<!DOCTYPE html><html></html>"))
+
+    def test_size_cap(self):
+        path = self.write("image.png", PNG)
+        with self.assertRaises(ValueError):
+            encode_data_uri(path, max_bytes=len(PNG) - 1)
+        with self.assertRaises(ValueError):
+            encode_data_uri(PNG, max_bytes=len(PNG) - 1)
+        with self.assertRaises(ValueError):
+            encode_data_uri(path, chunk_size=1000)
+
+    def test_peak_memory(self):
+        path = self.write("large.jpg", b"\xff\xd8\xff" + os.urandom(6 * 1024 * 1024))
+        size = os.path.getsize(path)
+        self.assertEqual(encode_data_uri(path).split(",")[1], legacy_encode(path).split(",")[1])
+
+        legacy = peak_memory(legacy_encode, path)
+        chunked = peak_memory(encode_data_uri, path)
+        print(f"\nPeak memory encoding {size / 2 ** 20:.0f} MB: "
+              f"whole file {legacy / 2 ** 20:.1f} MB, chunked {chunked / 2 ** 20:.1f} MB")
+        # The buffer and the returned string, each 4/3 of the file
+        self.assertLess(chunked, 2.8 * size)
+        self.assertLess(chunked, legacy)
+
+        legacy = peak_memory(encode_concurrently, legacy_encode, path)
+        chunked = peak_memory(encode_concurrently, encode_data_uri, path)
+        print(f"Peak memory encoding it on 16 threads: "
+              f"whole file {legacy / 2 ** 20:.1f} MB, chunked {chunked / 2 ** 20:.1f} MB")
+        self.assertLess(chunked, (MAX_CONCURRENT_ENCODES + 1) * 2.8 * size)
+
+
+class TestEthGenEncoding(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.api = ChatGPTEthGenAPI("test_key")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_local_image_is_sent_with_its_sniffed_type(self):
+        path = os.path.join(self.tmp.name, "face.jpeg")
+        with open(path, "wb") as f:
+            f.write(PNG)
+        with patch.object(ChatGPTEthGenAPI, "execute_query",
+                          return_value=completion('{"sex": "Male", "region": "Europe"}')) as query:
+            self.api.call(path, parse_url=False)
+
+        image = query.call_args.kwargs["messages"][-1]["content"][1]["image_url"]
+        self.assertEqual(image["url"], f"data:image/png;base64,{base64.b64encode(PNG).decode()}")
+
+    def test_unusable_prefetched_bytes_fall_back_to_the_url(self):
+        with patch.object(ChatGPTEthGenAPI, "execute_query",
+                          return_value=completion('{"sex": "Male", "region": "Europe"}')) as query:
+            self.api.call("https://media.licdn.com/face.jpg", image_data=b"<html>403 Forbidden</html>")
+
+        image = query.call_args.kwargs["messages"][-1]["content"][1]["image_url"]
+        self.assertEqual(image, {"url": "https://media.licdn.com/face.jpg"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import base64
+import io
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from PIL import Image
+
+from masontilutils.api.chatgpt import ChatGPTEthGenAPI
+from masontilutils.api.images import ImagePreprocessor
+from masontilutils.api.pool import SessionPool
+
+from helpers import completion, download
+
+IMAGES = sorted((Path(__file__).parent / 'test_images').glob('*.jpg'))
+
+
+def decode_data_uri(uri: str) -> Image.Image:
+    prefix = "data:image/jpeg;base64,"
+    assert uri.startswith(prefix)
+    return Image.open(io.BytesIO(base64.b64decode(uri[len(prefix):])))
+
+
+class TestImagePreprocessor(unittest.TestCase):
+    def setUp(self):
+        self.preprocessor = ImagePreprocessor()
+
+    def test_test_images_become_small_square_jpegs(self):
+        for path in IMAGES:
+            data = path.read_bytes()
+            jpeg = self.preprocessor.process(data)
+            with Image.open(io.BytesIO(jpeg)) as image:
+                original = Image.open(path).size
+                self.assertEqual(image.format, "JPEG")
+                self.assertEqual(image.size[0], image.size[1])
+                self.assertEqual(image.size[0], min(512, *original))
+            if min(original) > 512:
+                self.assertLess(len(jpeg), len(data) / 2)
+
+    def test_transparent_png_is_flattened(self):
+        output = io.BytesIO()
+        Image.new("RGBA", (900, 600), (255, 0, 0, 128)).save(output, format="PNG")
+        with Image.open(io.BytesIO(ImagePreprocessor(size=128).process(output.getvalue()))) as image:
+            self.assertEqual((image.mode, image.size), ("RGB", (128, 128)))
+
+    def test_url_is_downloaded_through_the_session_pool(self):
+        session = Mock()
+        session.get.return_value = download(IMAGES[0].read_bytes())
+        with patch("masontilutils.api.images._sessions", SessionPool(lambda: session)):
+            uri = self.preprocessor.data_uri("https://example.com/face.jpg")
+
+        session.get.assert_called_once_with("https://example.com/face.jpg", timeout=10.0, stream=True)
+        self.assertEqual(decode_data_uri(uri).size, (512, 512))
+
+
+class TestEthGenPreprocessing(unittest.TestCase):
+    def test_sends_low_detail_jpeg(self):
+        api = ChatGPTEthGenAPI("test_key", preprocessor=ImagePreprocessor(size=256))
+        with patch.object(ChatGPTEthGenAPI, "execute_query",
+                          return_value=completion('{"sex": "Male", "region": "Europe"}')) as query:
+            result = api.call(str(IMAGES[0]), parse_url=False)
+
+        self.assertEqual(result.sex, "Male")
+        text, image = query.call_args.kwargs["messages"][-1]["content"]
+        self.assertEqual(image["image_url"]["detail"], "low")
+        self.assertEqual(decode_data_uri(image["image_url"]["url"]).size, (256, 256))
+        self.assertNotIn("base64", text["text"])
+
+    def test_falls_back_to_the_original_url(self):
+        api = ChatGPTEthGenAPI("test_key", preprocessor=ImagePreprocessor())
+        with patch.object(ImagePreprocessor, "load", side_effect=OSError("403 Forbidden")), \
+                patch.object(ChatGPTEthGenAPI, "execute_query",
+                             return_value=completion('{"sex": "Male", "region": "Europe"}')) as query:
+            api.call("https://example.com/face.jpg")
+
+        image = query.call_args.kwargs["messages"][-1]["content"][1]["image_url"]
+        self.assertEqual(image, {"url": "https://example.com/face.jpg"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import time
+import unittest
+from pathlib import Path
+
+from masontilutils.api.chatgpt import ChatGPTEthGenAPI
+from masontilutils.api.hedging import LatencyTracker
+from masontilutils.api.images import ImagePreprocessor
+from masontilutils.api.usage import collect_usage
+
+
+class TestImagePreprocessingBenchmark(unittest.TestCase):
+    """
+    Live comparison of sending the test images as they are against the preprocessed
+    low-detail JPEGs: prompt tokens, latency and how often both paths give the same
+    answer. Prints a table and checks that preprocessing cuts the prompt tokens.
+    """
+    rounds = 2
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test environment before running tests"""
+        cls.api_key = os.getenv('CHATGPT_API_KEY')
+        if not cls.api_key:
+            raise ValueError("CHATGPT_API_KEY environment variable not set")
+
+        cls.images = sorted((Path(__file__).parent / 'test_images').glob('*.jpg'))
+
+    def run_mode(self, api: ChatGPTEthGenAPI) -> dict:
+        latency = LatencyTracker(window=len(self.images) * self.rounds)
+        answers = {}
+        with collect_usage() as usage:
+            for _ in range(self.rounds):
+                for path in self.images:
+                    started = time.monotonic()
+                    result = api.call(str(path), parse_url=False)
+                    latency.record(time.monotonic() - started)
+                    answers.setdefault(path.name, []).append(
+                        (result.ethnicity, result.sex) if result is not None else None
+                    )
+        return {
+            "answers": answers,
+            "prompt_tokens": usage.prompt_tokens / (len(self.images) * self.rounds),
+            "p50": latency.quantile(0.5),
+            "p95": latency.quantile(0.95),
+        }
+
+    def test_tokens_latency_and_agreement(self):
+        if not self.images:
+            self.skipTest("No test images found")
+
+        original = self.run_mode(ChatGPTEthGenAPI(self.api_key))
+        preprocessed = self.run_mode(ChatGPTEthGenAPI(self.api_key, preprocessor=ImagePreprocessor()))
+
+        print(f"\n{'mode':<14}{'prompt tokens':>14}{'p50 s':>8}{'p95 s':>8}")
+        for mode, stats in (("original", original), ("preprocessed", preprocessed)):
+            print(f"{mode:<14}{stats['prompt_tokens']:>14.0f}{stats['p50']:>8.2f}{stats['p95']:>8.2f}")
+
+        agree = total = 0
+        for name, answers in original["answers"].items():
+            for before, after in zip(answers, preprocessed["answers"][name]):
+                total += 1
+                agree += before == after
+            print(f"{name:<28}{answers} -> {preprocessed['answers'][name]}")
+        print(f"agreement: {agree}/{total}")
+
+        self.assertLess(preprocessed["prompt_tokens"], original["prompt_tokens"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+from masontilutils.api.chatgpt import ChatGPTEthGenAPI, ChatGPTJSONRepairAPI
+from masontilutils.api.deadline import Deadline, current_deadline
+from masontilutils.api.metrics import registry
+from masontilutils.api.perplexity import PerplexityExecutiveAPI
+from masontilutils.api.queries.enums import Ethnicity, Sex
+from masontilutils.api.queries.ethgen import ETHGEN_JSON_SCHEMA, EXECUTIVE_JSON_SCHEMA
+from masontilutils.api.responses.executive.executive import build_executive_response
+
+from helpers import completion
+
+MALFORMED_EXECUTIVES = (
+    "<think>searching filings</think>After reviewing state filings and LinkedIn [1], the owner is:\n"
+    '{"1": {"name": "Jane Doe", "role": "Owner" "sources": ["https://example.com"]}'
+)
+
+
+def repairs(api: str, result: str) -> float:
+    return registry.value("masontilutils_json_repairs_total", api=api, result=result)
+
+
+class TestJSONRepair(unittest.TestCase):
+    def setUp(self):
+        self.repair = ChatGPTJSONRepairAPI("test_key")
+
+    def test_ethgen_answer_is_repaired(self):
+        api = ChatGPTEthGenAPI("test_key", repair=self.repair)
+        before = repairs("ChatGPTEthGenAPI", "ok")
+        with patch.object(ChatGPTEthGenAPI, "execute_query", return_value=completion("sex: Female, region: East Asia")), \
+                patch.object(ChatGPTJSONRepairAPI, "execute_query",
+                             return_value=completion('{"sex": "Female", "region": "East Asia"}')) as repair_query:
+            result = api.call("https://example.com/face.jpg")
+
+        self.assertEqual(result.sex, Sex.FEMALE.value)
+        self.assertEqual(result.ethnicity, Ethnicity.EAST_ASIA.value)
+        payload = repair_query.call_args.kwargs
+        self.assertEqual(payload["model"], "gpt-4.1-nano")
+        self.assertEqual(payload["messages"][-1]["content"], "sex: Female, region: East Asia")
+        self.assertEqual(payload["response_format"]["json_schema"]["schema"], ETHGEN_JSON_SCHEMA)
+        self.assertEqual(repairs("ChatGPTEthGenAPI", "ok"), before + 1)
+
+    def test_ethgen_repair_runs_under_the_deadline_and_counts_one_failure(self):
+        api = ChatGPTEthGenAPI("test_key", repair=self.repair)
+        deadline = Deadline(60)
+        seen = []
+
+        def repair_query(**payload):
+            seen.append(current_deadline())
+            return completion('["Female", "East Asia"]')
+
+        before = registry.value("masontilutils_parse_failures_total", api="ChatGPTEthGenAPI")
+        with patch.object(ChatGPTEthGenAPI, "execute_query", return_value=completion("sex: Female")), \
+                patch.object(ChatGPTJSONRepairAPI, "execute_query", side_effect=repair_query):
+            self.assertIsNone(api.call("https://example.com/face.jpg", deadline=deadline))
+
+        self.assertEqual(seen, [deadline])
+        self.assertEqual(registry.value("masontilutils_parse_failures_total", api="ChatGPTEthGenAPI"), before + 1)
+
+    def test_ethgen_without_repair_discards_answer(self):
+        api = ChatGPTEthGenAPI("test_key")
+        with patch.object(ChatGPTEthGenAPI, "execute_query", return_value=completion("sex: Female")), \
+                patch.object(ChatGPTJSONRepairAPI, "execute_query") as repair_query:
+            self.assertIsNone(api.call("https://example.com/face.jpg"))
+        repair_query.assert_not_called()
+
+    def test_executive_repair_runs_under_the_deadline(self):
+        api = PerplexityExecutiveAPI("test_key", repair=self.repair)
+        repaired = {"executives": [{"name": "Jane Doe", "role": "Owner", "sources": []}]}
+        deadline = Deadline(60)
+        seen = []
+
+        def repair_query(**payload):
+            seen.append(current_deadline())
+            return completion(json.dumps(repaired))
+
+        async def answer(**payload):
+            return completion(MALFORMED_EXECUTIVES)
+
+        with patch.object(PerplexityExecutiveAPI, "execute_query", return_value=completion(MALFORMED_EXECUTIVES)), \
+                patch.object(PerplexityExecutiveAPI, "execute_query_async", side_effect=answer), \
+                patch.object(ChatGPTJSONRepairAPI, "execute_query", side_effect=repair_query):
+            response = api.call("Acme LLC", "Austin", "TX", "1 Main St", deadline=deadline)
+            async_response = asyncio.run(api.call_async("Acme LLC", "Austin", "TX", "1 Main St", deadline=deadline))
+
+        self.assertEqual(seen, [deadline, deadline])
+        self.assertEqual([e.name for e in response.executives], ["Jane Doe"])
+        self.assertEqual([e.name for e in async_response.executives], ["Jane Doe"])
+
+    def test_executive_repair_gets_only_the_json(self):
+        repaired = {"executives": [{"name": "Jane Doe", "role": "Owner", "sources": ["https://example.com"]}]}
+        with patch.object(ChatGPTJSONRepairAPI, "execute_query", return_value=completion(json.dumps(repaired))) as repair_query:
+            response = build_executive_response(MALFORMED_EXECUTIVES, repair=self.repair)
+
+        self.assertFalse(response.is_none)
+        self.assertEqual([(e.name, e.role) for e in response.executives], [("Jane Doe", "Owner")])
+        payload = repair_query.call_args.kwargs
+        self.assertTrue(payload["messages"][-1]["content"].startswith('{"1": {"name": "Jane Doe"'))
+        self.assertEqual(payload["response_format"]["json_schema"]["schema"], EXECUTIVE_JSON_SCHEMA)
+
+    def test_failed_repair_keeps_previous_result(self):
+        before = repairs("PerplexityExecutiveAPI", "failed")
+        with patch.object(ChatGPTJSONRepairAPI, "execute_query", return_value={"error": "Server error", "status_code": 500}):
+            response = build_executive_response(MALFORMED_EXECUTIVES, repair=self.repair)
+
+        self.assertTrue(response.is_none)
+        self.assertEqual(repairs("PerplexityExecutiveAPI", "failed"), before + 1)
+
+    def test_parseable_answers_are_not_repaired(self):
+        with patch.object(ChatGPTJSONRepairAPI, "execute_query") as repair_query:
+            response = build_executive_response('{"1": {"name": "Jane Doe", "role": "Owner", "sources": []}}',
+                                                repair=self.repair)
+        self.assertEqual(len(response.executives), 1)
+        repair_query.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import json
+import timeit
+import unittest
+from unittest.mock import patch
+
+from masontilutils.api.llm_json import LLMJSONError, find_json, parse_json
+from masontilutils.api.perplexity import PerplexityEmailAPI
+from masontilutils.api.responses.executive.executive import build_executive_response
+from masontilutils.utils import clean_deep_research_text, extract_json_substring
+
+
+def legacy_extract_json_substring(text: str) -> str:
+    """The character-by-character scanner extract_json_substring used before llm_json"""
+    start_idx = -1
+    for i, char in enumerate(text):
+        if char in '{[':
+            start_idx = i
+            break
+    if start_idx == -1:
+        return ""
+    stack = []
+    for i in range(start_idx, len(text)):
+        char = text[i]
+        if char in '{[':
+            stack.append(char)
+        elif char in '}]':
+            if not stack:
+                continue
+            if (char == '}' and stack[-1] == '{') or (char == ']' and stack[-1] == '['):
+                stack.pop()
+                if not stack:
+                    return text[start_idx:i + 1]
+    return ""
+
+
+def deep_research_answer(paragraphs: int, executives: int) -> str:
+    """A long sonar-deep-research style answer: cited prose followed by the JSON"""
+    prose = " ".join(
+        f"Paragraph {i}: state filings list the company's managing member as its owner [{i % 9 + 1}]. "
+        f"The LinkedIn profile lists the same person as founder and principal since 2011 [{i % 7 + 1}]."
+        for i in range(paragraphs)
+    )
+    data = {
+        str(i): {"name": f"Executive {i}", "role": "Owner", "sources": [f"https://example.com/{i}/{j}" for j in range(5)]}
+        for i in range(1, executives + 1)
+    }
+    return f"{prose}\n\n```json\n{json.dumps(data, indent=2)}\n```\nLet me know if you need anything else."
+
+
+class TestLLMJSON(unittest.TestCase):
+    def test_first_json_value_in_prose(self):
+        self.assertEqual(parse_json('Sure! Here it is: {"sex": "Male", "region": "Europe"} Hope that helps {x}'),
+                         {"sex": "Male", "region": "Europe"})
+        self.assertEqual(parse_json('```json\n[1, 2, {"a": null}]\n```'), [1, 2, {"a": None}])
+
+    def test_skips_stray_braces_and_template_leftovers(self):
+        self.assertEqual(parse_json('CEO {founder} of the firm: {"1": {"name": "Jane Doe"}}'),
+                         {"1": {"name": "Jane Doe"}})
+        self.assertEqual(parse_json('{{"sex": "Female", "region": null}}'), {"sex": "Female", "region": None})
+
+    def test_malformed_answer_does_not_yield_a_nested_fragment(self):
+        with self.assertRaises(LLMJSONError):
+            parse_json('{"sex": "Male" "region": {"a": 1}}')
+        self.assertEqual(parse_json('{"sex": "Male" "region": {"a": 1}} Corrected: {"sex": "Male", "region": "Europe"}'),
+                         {"sex": "Male", "region": "Europe"})
+
+        executives = '{"1": {"name": "Jane Doe", "role": "CEO"} "2": {"name": "John Roe", "role": "COO"}}'
+        with patch("masontilutils.api.responses.executive.executive.record_parse_failure") as failed, \
+                patch("traceback.print_exc"):
+            self.assertEqual(build_executive_response(executives).executives, [])
+        failed.assert_called_once()
+
+        api = PerplexityEmailAPI("test_key")
+        emails = "{'info@acme.com': {'sources': ['https://acme.com/contact']} 'sales@acme.com': {'sources': []}}"
+        with patch("masontilutils.api.perplexity.email.record_parse_failure") as failed:
+            self.assertEqual(api._handle_response({"choices": [{"message": {"content": emails}}]}), [])
+        failed.assert_called_once()
+
+    def test_single_quoted_python_literals_and_trailing_commas(self):
+        self.assertEqual(parse_json("{'info@acme.com': {'sources': ['https://acme.com'], 'verified': True, 'note': None}}"),
+                         {"info@acme.com": {"sources": ["https://acme.com"], "verified": True, "note": None}})
+        self.assertEqual(parse_json('{"a": [1, 2,], "b": {"c": true,},}'), {"a": [1, 2], "b": {"c": True}})
+        self.assertEqual(parse_json("{'owner': 'O\\'Brien', 'active': true}"), {"owner": "O'Brien", "active": True})
+
+    def test_never_evaluates_code(self):
+        with patch("builtins.print") as printed:
+            self.assertIsNone(find_json("{'a': print('pwned')}"))
+        printed.assert_not_called()
+        with self.assertRaises(LLMJSONError):
+            parse_json("[__import__('os').system('echo pwned')]")
+
+    def test_no_json(self):
+        self.assertIsNone(find_json("company_publically_traded"))
+        self.assertEqual(extract_json_substring("no json here {"), "")
+        with self.assertRaises(ValueError):
+            parse_json("")
+
+    def test_extract_json_substring_returns_span(self):
+        text = 'prefix {"a": {"b": [1, 2]}} suffix'
+        self.assertEqual(extract_json_substring(text), '{"a": {"b": [1, 2]}}')
+
+    def test_email_answer_without_eval(self):
+        api = PerplexityEmailAPI("test_key")
+        answer = "{'info@acme.com': {'sources': ['https://acme.com/contact']}, 'not-an-email': {'sources': []}}"
+        self.assertEqual(api._handle_response({"choices": [{"message": {"content": answer}}]}),
+                         [{"email": "info@acme.com", "sources": ["https://acme.com/contact"]}])
+
+    def test_executive_answer(self):
+        response = build_executive_response(deep_research_answer(paragraphs=3, executives=2))
+        self.assertEqual([e.name for e in response.executives], ["Executive 1", "Executive 2"])
+
+    def test_bare_publicly_traded_answer(self):
+        """Test that the identifier answered without any JSON means publicly traded, not "no executives" """
+        for answer in ("company_publically_traded", "<think>{draft}</think>company_publically_traded"):
+            response = build_executive_response(answer)
+            self.assertTrue(response.is_publicly_traded)
+            self.assertFalse(response.is_none)
+        # Next to executives JSON, a mention in the prose does not count
+        response = build_executive_response(
+            'Not company_publically_traded. {"1": {"name": "Jane Doe", "role": "Owner", "sources": []}}'
+        )
+        self.assertFalse(response.is_publicly_traded)
+        self.assertEqual([e.name for e in response.executives], ["Jane Doe"])
+
+
+class TestLLMJSONBenchmark(unittest.TestCase):
+    """
+    Micro-benchmark of the old scan-then-json.loads path against parse_json on a large
+    deep-research answer. Prints both timings and checks that parse_json is faster.
+    """
+
+    def test_faster_on_large_deep_research_output(self):
+        answer = clean_deep_research_text(deep_research_answer(paragraphs=1500, executives=200))
+        expected = json.loads(legacy_extract_json_substring(answer))
+        self.assertEqual(len(expected), 200)
+        self.assertEqual(parse_json(answer), expected)
+
+        legacy = min(timeit.repeat(lambda: json.loads(legacy_extract_json_substring(answer)), number=3, repeat=3)) / 3
+        current = min(timeit.repeat(lambda: parse_json(answer), number=3, repeat=3)) / 3
+        print(f"\n{len(answer) / 1024:.0f} KiB answer: scanner + json.loads {legacy * 1000:.2f} ms, "
+              f"parse_json {current * 1000:.2f} ms ({legacy / current:.1f}x)")
+        self.assertLess(current, legacy)
+
+
+if __name__ == '__main__':
+    unittest.main()
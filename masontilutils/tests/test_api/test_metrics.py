@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+import urllib.request
+from unittest.mock import Mock, patch, PropertyMock
+
+import requests
+
+from masontilutils.api.breaker import CircuitBreaker
+from masontilutils.api.metrics import MetricsRegistry, registry, serve_metrics, write_metrics
+from masontilutils.api.perplexity import ThreadedPerplexitySonarAPI
+from masontilutils.api.pool import SessionPool
+from masontilutils.api.ratelimit import RateLimiter
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_render_counters_and_histograms(self):
+        metrics = MetricsRegistry(buckets=(1.0, 5.0))
+        metrics.inc("masontilutils_retries_total", api="ChatGPTEthGenAPI", status="429")
+        metrics.inc("masontilutils_retries_total", api="ChatGPTEthGenAPI", status="429")
+        for seconds in (0.5, 2.0, 30.0):
+            metrics.observe("masontilutils_request_duration_seconds", seconds, api="ChatGPTEthGenAPI")
+
+        text = metrics.render()
+
+        self.assertIn("# TYPE masontilutils_retries_total counter", text)
+        self.assertIn('masontilutils_retries_total{api="ChatGPTEthGenAPI",status="429"} 2', text)
+        self.assertIn("# TYPE masontilutils_request_duration_seconds histogram", text)
+        # Buckets are cumulative
+        self.assertIn('masontilutils_request_duration_seconds_bucket{api="ChatGPTEthGenAPI",le="1"} 1', text)
+        self.assertIn('masontilutils_request_duration_seconds_bucket{api="ChatGPTEthGenAPI",le="5"} 2', text)
+        self.assertIn('masontilutils_request_duration_seconds_bucket{api="ChatGPTEthGenAPI",le="+Inf"} 3', text)
+        self.assertIn('masontilutils_request_duration_seconds_sum{api="ChatGPTEthGenAPI"} 32.5', text)
+        self.assertIn('masontilutils_request_duration_seconds_count{api="ChatGPTEthGenAPI"} 3', text)
+
+    def test_label_values_are_escaped(self):
+        metrics = MetricsRegistry()
+        metrics.inc("custom_total", model='say "hi"\n')
+        self.assertIn('custom_total{model="say \\"hi\\"\\n"} 1', metrics.render())
+
+    def test_export_to_file_and_http(self):
+        registry.inc("masontilutils_parse_failures_total", api="TestExportAPI")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "masontilutils.prom")
+            write_metrics(path)
+            with open(path) as f:
+                self.assertIn('masontilutils_parse_failures_total{api="TestExportAPI"}', f.read())
+
+        server = serve_metrics(port=0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                self.assertIn('masontilutils_parse_failures_total{api="TestExportAPI"}', response.read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestTransportMetrics(unittest.TestCase):
+    def test_records_latency_retries_and_tokens(self):
+        rate_limited = Mock(status_code=429, headers={"Retry-After": "0"})
+        ok = Mock(ok=True, headers={})
+        ok.json.return_value = {
+            "choices": [{"message": {"content": "ok"}}],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15},
+        }
+        session = Mock()
+        session.post.side_effect = [rate_limited, ok]
+        rate_limited.raise_for_status.side_effect = requests.exceptions.HTTPError("429", response=rate_limited)
+
+        api = "ThreadedPerplexitySonarAPI"
+        before = {
+            "calls": registry.value("masontilutils_request_duration_seconds", api=api),
+            "retries": registry.value("masontilutils_retries_total", api=api, status="429"),
+            "rate_limited": registry.value("masontilutils_rate_limited_total", api=api),
+            "prompt": registry.value("masontilutils_prompt_tokens_total", api=api, model="sonar"),
+        }
+
+        with patch.object(ThreadedPerplexitySonarAPI, "session_pool", new_callable=PropertyMock,
+                          return_value=SessionPool(lambda: session)), \
+                patch.object(ThreadedPerplexitySonarAPI, "rate_limiter", new_callable=PropertyMock,
+                             return_value=RateLimiter("perplexity")), \
+                patch.object(ThreadedPerplexitySonarAPI, "circuit_breaker", new_callable=PropertyMock,
+                             return_value=CircuitBreaker("perplexity")):
+            result = ThreadedPerplexitySonarAPI("test_key").execute_query(query="metrics", model="sonar")
+
+        self.assertNotIn("error", result)
+        self.assertEqual(registry.value("masontilutils_request_duration_seconds", api=api), before["calls"] + 1)
+        self.assertEqual(registry.value("masontilutils_retries_total", api=api, status="429"), before["retries"] + 1)
+        self.assertEqual(registry.value("masontilutils_rate_limited_total", api=api), before["rate_limited"] + 1)
+        self.assertEqual(registry.value("masontilutils_prompt_tokens_total", api=api, model="sonar"), before["prompt"] + 12)
+        self.assertGreater(registry.value("masontilutils_requests_total", api=api, status="ok"), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
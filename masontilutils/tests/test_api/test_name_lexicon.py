@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from masontilutils.api.chatgpt.ethgen import ChatGPTGenderAPI
+from masontilutils.api.lexicon import NameLexicon
+from masontilutils.api.responses.ethgen.ethgen import GenderResponse
+
+from helpers import completion
+
+
+class TestNameLexicon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "names.tsv")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_names_are_trusted_after_enough_agreeing_answers(self):
+        lexicon = NameLexicon(self.path, min_count=3)
+        for _ in range(2):
+            lexicon.record("John", GenderResponse(sex="Male"))
+        self.assertIsNone(lexicon.lookup("john"))
+
+        lexicon.record("JOHN", GenderResponse(sex="Male"))
+        self.assertEqual(lexicon.lookup("John"), GenderResponse(sex="Male"))
+
+    def test_ambiguous_names_are_not_answered(self):
+        """Test that a name without a dominant answer keeps going to the model"""
+        lexicon = NameLexicon(self.path, min_count=3, min_confidence=0.9)
+        for sex in ("Male", "Female", "Male", "Female"):
+            lexicon.record("Alex", GenderResponse(sex=sex))
+        self.assertIsNone(lexicon.lookup("Alex"))
+        _, confidence, total = lexicon.confidence("Alex")
+        self.assertEqual((confidence, total), (0.5, 4))
+
+    def test_save_and_lazy_reload(self):
+        lexicon = NameLexicon(self.path, min_count=1)
+        lexicon.record("Maria", GenderResponse(sex="Female"))
+        lexicon.record("J.", GenderResponse(sex=None))
+        lexicon.save()
+
+        reloaded = NameLexicon(self.path, min_count=1)
+        self.assertEqual(reloaded.lookup("Maria"), GenderResponse(sex="Female"))
+        self.assertEqual(reloaded.lookup("J."), GenderResponse(sex=None))
+        self.assertEqual(len(reloaded), 2)
+
+    def test_autosave(self):
+        lexicon = NameLexicon(self.path, autosave_every=2)
+        lexicon.record("Maria", GenderResponse(sex="Female"))
+        self.assertFalse(os.path.exists(self.path))
+        lexicon.record("Maria", GenderResponse(sex="Female"))
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_gender_api_escalates_only_unknown_names(self):
+        """Test that known names are answered locally and model answers grow the lexicon"""
+        lexicon = NameLexicon(self.path, min_count=1)
+        lexicon.record("John", GenderResponse(sex="Male"))
+        api = ChatGPTGenderAPI("test_key", lexicon=lexicon)
+
+        def answer(**payload):
+            names = json.loads(payload["messages"][1]["content"][0]["text"])["names"]
+            return completion(json.dumps({name: {"sex": "Female"} for name in names}))
+
+        with patch.object(ChatGPTGenderAPI, "execute_query", side_effect=answer) as execute_query:
+            res = api.call_many(["John Doe", "Maria Garcia", "Anna Smith"])
+            self.assertEqual(api.call("Maria Lopez"), GenderResponse(sex="Female"))
+
+        self.assertEqual(execute_query.call_count, 1)
+        self.assertEqual(execute_query.call_args.kwargs["messages"][1]["content"][0]["text"],
+                         json.dumps({"names": ["Maria", "Anna"]}))
+        self.assertEqual(res["John Doe"], GenderResponse(sex="Male"))
+        self.assertEqual(res["Anna Smith"], GenderResponse(sex="Female"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import base64
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+from masontilutils.api.chatgpt import ChatGPTEthGenAPI
+from masontilutils.api.deadline import Deadline, deadline_scope
+from masontilutils.api.images import load_image, sniff_mime
+from masontilutils.api.pool import SessionPool
+from masontilutils.api.prefetch import ImagePrefetcher
+
+from helpers import completion, download
+
+JPEG = next((Path(__file__).parent / 'test_images').glob('*.jpg')).read_bytes()
+
+
+class SlowSession:
+    """Session whose downloads take `delay` seconds and return `size` bytes"""
+
+    def __init__(self, delay: float = 0.1, size: int = 1000):
+        self.delay = delay
+        self.size = size
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None, stream=False):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if "missing" in url:
+            raise requests.ConnectionError("connection refused")
+        return download(url.encode().ljust(self.size, b"x"))
+
+    def close(self):
+        pass
+
+
+class TestImagePrefetcher(unittest.TestCase):
+    def setUp(self):
+        self.session = SlowSession()
+        self.sessions = patch("masontilutils.api.images._sessions", SessionPool(lambda: self.session))
+        self.sessions.start()
+
+    def tearDown(self):
+        self.sessions.stop()
+
+    def test_downloads_run_concurrently_on_a_bounded_pool(self):
+        prefetcher = ImagePrefetcher(max_workers=3)
+        urls = [f"https://media.licdn.com/{i}.jpg" for i in range(6)]
+        started = time.monotonic()
+        for url in urls:
+            prefetcher.prefetch(url)
+        results = [prefetcher.get(url) for url in urls]
+        elapsed = time.monotonic() - started
+        prefetcher.close()
+
+        self.assertTrue(all(data.startswith(url.encode()) for url, data in zip(urls, results)))
+        self.assertEqual(self.session.max_active, 3)
+        self.assertLess(elapsed, 0.5)
+
+    def test_memory_cap_evicts_least_recently_used(self):
+        prefetcher = ImagePrefetcher(max_bytes=2500)
+        for url in ("https://a/0", "https://a/1"):
+            prefetcher.prefetch(url)
+            prefetcher.get(url)
+        prefetcher.get("https://a/0")
+        prefetcher.prefetch("https://a/2")
+        prefetcher.get("https://a/2")
+
+        self.assertIn("https://a/0", prefetcher._images)
+        self.assertNotIn("https://a/1", prefetcher._images)
+        self.assertEqual(prefetcher.size, 2000)
+        prefetcher.close()
+
+    def test_failed_or_unknown_downloads_return_none(self):
+        prefetcher = ImagePrefetcher()
+        prefetcher.prefetch("https://media.licdn.com/missing.jpg")
+        prefetcher.prefetch("base64_encoded_image")
+        self.assertIsNone(prefetcher.get("https://media.licdn.com/missing.jpg"))
+        self.assertIsNone(prefetcher.get("base64_encoded_image"))
+        self.assertIsNone(prefetcher.get("https://media.licdn.com/never-prefetched.jpg"))
+        prefetcher.close()
+
+    def test_pending_downloads_are_counted_apart_from_misses(self):
+        prefetcher = ImagePrefetcher()
+        prefetcher.prefetch("https://a/0")
+        prefetcher.get("https://a/0")
+        prefetcher.get("https://a/0")
+        prefetcher.get("https://a/1")
+        self.assertEqual((prefetcher.hits, prefetcher.waits, prefetcher.misses), (1, 1, 1))
+        prefetcher.close()
+
+    def test_download_size_is_capped(self):
+        self.session.size = 5000
+        with patch("masontilutils.api.images.DOWNLOAD_CHUNK_SIZE", 1024):
+            with self.assertRaises(ValueError):
+                load_image("https://a/huge.jpg", max_bytes=4096)
+        self.assertEqual(len(load_image("https://a/small.jpg", max_bytes=5000)), 5000)
+
+    def test_expired_deadline_skips_the_download(self):
+        with deadline_scope(Deadline(0)):
+            with self.assertRaises(TimeoutError):
+                load_image("https://a/0.jpg")
+        self.assertEqual(self.session.max_active, 0)
+
+
+class TestEthGenImageData(unittest.TestCase):
+    def test_sniff_mime(self):
+        self.assertEqual(sniff_mime(JPEG), "image/jpeg")
+        self.assertEqual(sniff_mime(b"\x89PNG\r\n\x1a\n...."), "image/png")
+        self.assertEqual(sniff_mime(b"RIFF\x00\x00\x00\x00WEBPVP8 "), "image/webp")
+        self.assertIsNone(sniff_mime(b"<html>"))
+
+    def test_prefetched_bytes_are_sent_as_data_uri(self):
+        api = ChatGPTEthGenAPI("test_key")
+        with patch.object(ChatGPTEthGenAPI, "execute_query",
+                          return_value=completion('{"sex": "Male", "region": "Europe"}')) as query:
+            api.call("https://media.licdn.com/face.jpg", image_data=JPEG)
+
+        text, image = query.call_args.kwargs["messages"][-1]["content"]
+        self.assertEqual(image["image_url"]["url"], f"data:image/jpeg;base64,{base64.b64encode(JPEG).decode()}")
+        self.assertIn("https://media.licdn.com/face.jpg", text["text"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+from email.utils import formatdate
+from time import time
+from unittest.mock import Mock, patch, PropertyMock
+
+import requests
+
+from masontilutils.api.perplexity import ThreadedPerplexitySonarAPI
+from masontilutils.api.pool import SessionPool
+from masontilutils.api.ratelimit import RateLimiter, estimate_tokens, get_rate_limiter, parse_duration, retry_after
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_requests_queue_once_bucket_is_empty(self):
+        """Test that callers beyond the per-minute quota are spaced at the refill rate"""
+        limiter = RateLimiter("test", requests_per_minute=60)
+        waits = [limiter.reserve() for _ in range(62)]
+
+        self.assertTrue(all(w == 0 for w in waits[:60]))
+        self.assertAlmostEqual(waits[60], 1.0, delta=0.05)
+        self.assertAlmostEqual(waits[61], 2.0, delta=0.05)
+
+    def test_token_bucket_and_settle(self):
+        """Test that token reservations are charged and corrected by real usage"""
+        limiter = RateLimiter("test", tokens_per_minute=600)
+        self.assertEqual(limiter.reserve(tokens=600), 0)
+        self.assertAlmostEqual(limiter.reserve(tokens=10), 1.0, delta=0.05)
+
+        # The first request only used 100 of its 600 estimated tokens
+        limiter.settle(estimated_tokens=600, actual_tokens=100)
+        self.assertEqual(limiter.reserve(tokens=10), 0)
+
+    def test_deadline_rejection_refunds_the_reservation(self):
+        limiter = RateLimiter("test", requests_per_minute=60, tokens_per_minute=600)
+        self.assertEqual(limiter.acquire(tokens=600), 0)
+        for _ in range(5):
+            self.assertIsNone(limiter.acquire(tokens=300, max_wait=0.1))
+
+        # Without refunds the five rejections would have left 1500 tokens of debt
+        self.assertAlmostEqual(limiter.reserve(tokens=300), 30.0, delta=0.5)
+
+    def test_pause_applies_to_every_caller(self):
+        """Test that a 429 cooldown delays all subsequent reservations"""
+        limiter = RateLimiter("test", requests_per_minute=600)
+        limiter.pause(5)
+
+        first, second = limiter.reserve(), limiter.reserve()
+        self.assertAlmostEqual(first, 5.1, delta=0.05)
+        self.assertAlmostEqual(second, 5.2, delta=0.05)
+
+    def test_unlimited_provider_still_honours_cooldown(self):
+        """Test that providers without quotas still pause on Retry-After"""
+        limiter = RateLimiter("test")
+        self.assertEqual(limiter.reserve(), 0)
+
+        limiter.update_from_headers({"Retry-After": "3"})
+        self.assertAlmostEqual(limiter.reserve(), 3.0, delta=0.05)
+
+    def test_update_from_openai_headers(self):
+        """Test tuning from x-ratelimit-* headers"""
+        limiter = RateLimiter("test", requests_per_minute=10, tokens_per_minute=1000)
+        limiter.update_from_headers({
+            "x-ratelimit-limit-requests": "120",
+            "x-ratelimit-limit-tokens": "40000",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "2s",
+            "x-ratelimit-remaining-tokens": "39000",
+        })
+
+        self.assertEqual(limiter.requests_per_minute, 120)
+        self.assertEqual(limiter.tokens_per_minute, 40000)
+        self.assertGreaterEqual(limiter.reserve(), 2.0)
+
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration("12"), 12)
+        self.assertAlmostEqual(parse_duration("6m0s"), 360)
+        self.assertAlmostEqual(parse_duration("20ms"), 0.02)
+        self.assertAlmostEqual(parse_duration("1h2m3.5s"), 3723.5)
+        self.assertIsNone(parse_duration("soon"))
+
+    def test_retry_after(self):
+        self.assertEqual(retry_after({"Retry-After": "1.5"}, 5), 1.5)
+        self.assertAlmostEqual(retry_after({"Retry-After": formatdate(time() + 30, usegmt=True)}, 5), 30, delta=2)
+        self.assertEqual(retry_after({"Retry-After": "later"}, 5), 5)
+        self.assertEqual(retry_after({}, 5), 5)
+
+    def test_fractional_retry_after_is_retried(self):
+        limited = Mock(headers={"Retry-After": "0.01"}, status_code=429)
+        limited.raise_for_status.side_effect = requests.exceptions.HTTPError("429", response=limited)
+        ok = Mock(headers={})
+        ok.json.return_value = {"choices": [{"message": {"content": "ok"}}]}
+        session = Mock()
+        session.post.side_effect = [limited, ok]
+
+        api = ThreadedPerplexitySonarAPI("test_key")
+        with patch.object(ThreadedPerplexitySonarAPI, "session_pool", new_callable=PropertyMock,
+                          return_value=SessionPool(lambda: session)), \
+                patch.object(ThreadedPerplexitySonarAPI, "rate_limiter", new_callable=PropertyMock,
+                             return_value=RateLimiter("test")):
+            self.assertEqual(api.execute_query(messages=[{"role": "user", "content": "retry"}]), ok.json.return_value)
+
+    def test_estimate_tokens(self):
+        payload = {
+            "messages": [
+                {"role": "system", "content": "x" * 400},
+                {"role": "user", "content": [
+                    {"type": "text", "text": "hello"},
+                    {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}},
+                ]},
+            ],
+            "max_tokens": 100,
+        }
+        self.assertGreater(estimate_tokens(payload), 100 + 100 + 800 - 1)
+
+    def test_limiter_is_shared_per_provider(self):
+        self.assertIs(get_rate_limiter("perplexity"), get_rate_limiter("perplexity"))
+        self.assertIsNot(get_rate_limiter("perplexity"), get_rate_limiter("openai"))
+
+
+if __name__ == '__main__':
+    unittest.main()
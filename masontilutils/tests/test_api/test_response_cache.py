@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch, PropertyMock
+
+from masontilutils.api.cache import ResponseCache, payload_key
+from masontilutils.api.pool import SessionPool
+from masontilutils.api.perplexity import ThreadedPerplexitySonarAPI, PerplexityNAICSCodeAPI
+
+from helpers import completion
+
+ENDPOINT = "https://api.perplexity.ai/chat/completions"
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite")
+        self.cache = ResponseCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_payload_key_is_canonical(self):
+        """Test that key order does not change the hash but content does"""
+        a = {"model": "sonar-pro", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.1}
+        b = {"temperature": 0.1, "messages": [{"content": "hi", "role": "user"}], "model": "sonar-pro"}
+        self.assertEqual(payload_key(ENDPOINT, a), payload_key(ENDPOINT, b))
+        self.assertNotEqual(payload_key(ENDPOINT, a), payload_key(ENDPOINT, {**a, "temperature": 0.2}))
+
+    def test_hit_miss_and_persistence(self):
+        payload = {"model": "sonar-pro", "messages": []}
+        self.assertIsNone(self.cache.get("PerplexityNAICSCodeAPI", ENDPOINT, payload))
+        self.cache.set("PerplexityNAICSCodeAPI", ENDPOINT, payload, completion("541330"))
+
+        reopened = ResponseCache(self.path)
+        self.assertEqual(reopened.get("PerplexityNAICSCodeAPI", ENDPOINT, payload), completion("541330"))
+        reopened.close()
+
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_errors_are_not_cached(self):
+        payload = {"model": "sonar-pro", "messages": []}
+        self.cache.set("PerplexityNAICSCodeAPI", ENDPOINT, payload, {"error": "boom", "status_code": 500})
+        self.assertIsNone(self.cache.get("PerplexityNAICSCodeAPI", ENDPOINT, payload))
+
+    def test_per_api_ttl(self):
+        cache = ResponseCache(os.path.join(self.tmp.name, "ttl.sqlite"), ttls={"PerplexityExecutiveAPI": -1})
+        executive = {"model": "sonar-deep-research", "messages": []}
+        naics = {"model": "sonar-pro", "messages": []}
+        cache.set("PerplexityExecutiveAPI", ENDPOINT, executive, completion("None"))
+        cache.set("PerplexityNAICSCodeAPI", ENDPOINT, naics, completion("541330"))
+
+        self.assertIsNone(cache.get("PerplexityExecutiveAPI", ENDPOINT, executive))
+        self.assertIsNotNone(cache.get("PerplexityNAICSCodeAPI", ENDPOINT, naics))
+        cache.close()
+
+    def test_size_eviction_drops_least_recently_used(self):
+        cache = ResponseCache(os.path.join(self.tmp.name, "small.sqlite"), max_bytes=2000)
+        for i in range(40):
+            cache.set("PerplexityNAICSCodeAPI", ENDPOINT, {"i": i}, completion(os.urandom(40).hex()))
+
+        stats = cache.stats()
+        self.assertLessEqual(stats["bytes"], 2000)
+        self.assertIsNotNone(cache.get("PerplexityNAICSCodeAPI", ENDPOINT, {"i": 39}))
+        self.assertIsNone(cache.get("PerplexityNAICSCodeAPI", ENDPOINT, {"i": 0}))
+        cache.close()
+
+    def test_execute_query_uses_cache(self):
+        """Test that an identical request is answered without a second HTTP call"""
+        session = Mock()
+        session.post.return_value.headers = {}
+        session.post.return_value.json.return_value = completion("NAICS 541330")
+
+        api = PerplexityNAICSCodeAPI("test_key")
+        api.cache = self.cache
+        with patch.object(ThreadedPerplexitySonarAPI, "session_pool", new_callable=PropertyMock, return_value=SessionPool(lambda: session)):
+            first = api.call(company_name="WSP USA Inc.", city="Briarcliff Manor", state="NY")
+            second = api.call(company_name="WSP USA Inc.", city="Briarcliff Manor", state="NY")
+
+        self.assertEqual(first, "541330")
+        self.assertEqual(second, "541330")
+        self.assertEqual(session.post.call_count, 1)
+        self.assertEqual(self.cache.hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from masontilutils.api.router import Backend, Router, build_naics_router
+from masontilutils.api.usage import collect_usage, record_error, record_usage
+
+
+def backend(name: str, latency: float, tokens: int, result="ok", model="sonar-pro"):
+    def call(*args, **kwargs):
+        time.sleep(latency)
+        if result is None:
+            record_error()
+        else:
+            record_usage(model, {"prompt_tokens": tokens, "completion_tokens": tokens})
+        return result
+    return Backend(name, call)
+
+
+class TestUsageCollection(unittest.TestCase):
+    def test_nested_collectors_and_prices(self):
+        with collect_usage() as outer:
+            record_usage("gpt-4.1", {"prompt_tokens": 1_000_000, "completion_tokens": 0})
+            with collect_usage() as inner:
+                record_usage("deepseek-chat", {"prompt_tokens": 0, "completion_tokens": 1_000_000})
+        self.assertAlmostEqual(inner.cost, 1.10)
+        self.assertAlmostEqual(outer.cost, 3.10)
+        self.assertEqual(outer.total_tokens, 2_000_000)
+
+
+class TestRouter(unittest.TestCase):
+    def warm(self, router: Router, calls: int = 12):
+        for _ in range(calls):
+            router.call()
+
+    def test_cheapest_backend_meeting_target_wins(self):
+        """Test that the cheap backend is preferred while it meets the latency target"""
+        router = Router([
+            backend("expensive", 0.0, 1000, model="sonar-pro"),
+            backend("cheap", 0.0, 1000, model="deepseek-chat"),
+        ], target_p95=1.0, explore=0)
+        self.warm(router)
+        self.assertEqual(router.rank(), ["cheap", "expensive"])
+
+    def test_slow_backend_is_avoided(self):
+        router = Router([
+            backend("fast", 0.0, 1000, model="sonar-pro"),
+            backend("slow", 0.03, 1000, model="deepseek-chat"),
+        ], target_p95=0.02, explore=0)
+        self.warm(router)
+        self.assertEqual(router.rank()[0], "fast")
+
+    def test_failing_backend_is_avoided_and_retried_elsewhere(self):
+        router = Router([
+            backend("broken", 0.0, 0, result=None, model="deepseek-chat"),
+            backend("healthy", 0.0, 1000, model="sonar-pro"),
+        ], target_p95=1.0, explore=0)
+        results = [router.call() for _ in range(12)]
+
+        self.assertTrue(all(r == "ok" for r in results))
+        self.assertEqual(router.rank()[0], "healthy")
+        self.assertEqual(router.report()["broken"]["error_rate"], 1.0)
+
+    def test_empty_answers_are_not_errors(self):
+        """Test that a None answer without a failed request does not count as an error"""
+        router = Router([Backend("a", lambda: None)], target_p95=1.0)
+        self.assertIsNone(router.call())
+        self.assertEqual(router.report()["a"]["error_rate"], 0.0)
+
+    def test_raising_backend_falls_through(self):
+        def broken():
+            raise KeyError("NAICS")
+
+        router = Router([Backend("broken", broken), backend("healthy", 0.0, 1000)], target_p95=1.0, explore=0)
+        self.assertEqual(router.call(), "ok")
+        self.assertEqual(router.report()["broken"]["error_rate"], 1.0)
+
+    def test_answers_without_a_request_are_not_measured(self):
+        """Test that cache hits and coalesced calls leave the backend statistics alone"""
+        router = Router([Backend("cached", lambda: "ok")], target_p95=1.0)
+        self.assertEqual(router.call(), "ok")
+        self.assertEqual(router.report()["cached"]["calls"], 0)
+
+
+class TestNAICSRouter(unittest.TestCase):
+    def test_backends_are_filtered_by_inputs(self):
+        """Test that description-based backends are skipped when only the company is known"""
+        router = build_naics_router("p_key", "d_key", "c_key", explore=0)
+        self.assertEqual(router.rank(company_name="WSP USA Inc.", city="Briarcliff Manor", state="NY"), ["perplexity"])
+        self.assertEqual(sorted(router.rank(description="Engineering services")), ["chatgpt", "deepseek"])
+
+    def test_adapters_return_code_lists(self):
+        router = build_naics_router("p_key", None, "c_key", explore=0)
+        with patch("masontilutils.api.router.PerplexityNAICSCodeAPI.call", return_value="541330"):
+            self.assertEqual(router.call(company_name="WSP USA Inc.", city="Briarcliff Manor", state="NY"), ["541330"])
+        with patch("masontilutils.api.router.ChatGPTIndustryClassificationAPI.call",
+                   return_value=[{"NAICS": 541330, "industry_code": "C"}]):
+            self.assertEqual(router.call(description="Engineering services"), ["541330"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+from masontilutils.api.chatgpt import ThreadedChatGPTAPI
+from masontilutils.api.pool import SessionPool
+
+
+class TestSessionPool(unittest.TestCase):
+    def test_sessions_are_reused(self):
+        factory = Mock(side_effect=lambda: Mock())
+        pool = SessionPool(factory, maxsize=4)
+        for _ in range(10):
+            with pool.session():
+                pass
+
+        self.assertEqual(factory.call_count, 1)
+        self.assertEqual((pool.size, pool.idle), (1, 1))
+
+    def test_size_is_bounded_across_threads(self):
+        """Test that short-lived threads share at most maxsize sessions"""
+        in_use = 0
+        peak = 0
+        lock = threading.Lock()
+        factory = Mock(side_effect=lambda: Mock())
+        pool = SessionPool(factory, maxsize=3)
+
+        def request(_):
+            nonlocal in_use, peak
+            with pool.session():
+                with lock:
+                    in_use += 1
+                    peak = max(peak, in_use)
+                time.sleep(0.01)
+                with lock:
+                    in_use -= 1
+
+        for _ in range(5):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(request, range(16)))
+
+        self.assertEqual(peak, 3)
+        self.assertLessEqual(factory.call_count, 3)
+        self.assertLessEqual(pool.size, 3)
+
+    def test_idle_sessions_are_closed(self):
+        sessions = []
+
+        def factory():
+            sessions.append(Mock())
+            return sessions[-1]
+
+        pool = SessionPool(factory, idle_timeout=0.05)
+        with pool.session():
+            pass
+        time.sleep(0.1)
+        with pool.session() as session:
+            self.assertIs(session, sessions[1])
+
+        sessions[0].close.assert_called_once()
+        self.assertEqual(pool.size, 1)
+
+    def test_discarded_sessions_are_not_reused(self):
+        pool = SessionPool(lambda: Mock())
+        with pool.session() as first:
+            pool.discard(first)
+        with pool.session() as second:
+            self.assertIsNot(first, second)
+        self.assertEqual(pool.size, 1)
+
+
+class TestChatGPTClientPool(unittest.TestCase):
+    def test_one_client_per_api_key(self):
+        """Test that the OpenAI client is shared by threads instead of created per thread"""
+        with patch.dict(ThreadedChatGPTAPI._clients, clear=True):
+            api = ThreadedChatGPTAPI("test_key")
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                clients = set(map(id, executor.map(lambda _: api.client, range(8))))
+
+            self.assertEqual(len(clients), 1)
+            self.assertIsNot(ThreadedChatGPTAPI("other_key").client, api.client)
+            self.assertEqual(len(ThreadedChatGPTAPI._clients), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import multiprocessing
+import unittest
+
+from masontilutils.api.ratelimit import get_rate_limiter
+from masontilutils.utils import create_shared_rate_limits
+
+
+def reserve_in_worker(state, count, pause):
+    state.install()
+    limiter = get_rate_limiter("perplexity")
+    for _ in range(count):
+        limiter.reserve()
+    if pause:
+        limiter.pause(pause)
+
+
+class TestSharedRateLimits(unittest.TestCase):
+    def setUp(self):
+        self.state = create_shared_rate_limits({"perplexity": {"requests_per_minute": 60}})
+
+    def run_workers(self, *args_list):
+        workers = [multiprocessing.Process(target=reserve_in_worker, args=(self.state, *args)) for args in args_list]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+            self.assertEqual(worker.exitcode, 0)
+
+    def test_quota_is_shared_between_processes(self):
+        """Test that reservations made by workers drain the same bucket"""
+        self.run_workers((30, 0), (30, 0))
+
+        limiter = self.state.limiter("perplexity")
+        self.assertAlmostEqual(limiter.reserve(), 1.0, delta=0.1)
+
+    def test_cooldown_is_shared_between_processes(self):
+        """Test that a 429 pause in one worker stops callers in every process"""
+        self.run_workers((0, 10))
+
+        limiter = self.state.limiter("perplexity")
+        self.assertGreater(limiter.reserve(), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
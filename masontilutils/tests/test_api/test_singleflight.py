@@ -0,0 +1,207 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch, PropertyMock
+
+from masontilutils.api.breaker import CircuitBreaker
+from masontilutils.api.deadline import Deadline, deadline_scope
+from masontilutils.api.metrics import registry
+from masontilutils.api.pool import SessionPool
+from masontilutils.api.perplexity import ThreadedPerplexitySonarAPI, PerplexityNAICSCodeAPI
+from masontilutils.api.ratelimit import RateLimiter
+from masontilutils.api.singleflight import SingleFlight, is_shareable
+from masontilutils.api.usage import collect_usage
+
+from helpers import completion
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"value": 42}
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            results = list(pool.map(lambda _: flight.do("key", slow), range(5)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.coalesced, 4)
+        self.assertTrue(all(r == {"value": 42} for r in results))
+
+    def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError("upstream failed")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(flight.do, "key", failing)
+            started.wait()
+            follower = pool.submit(flight.do, "key", failing)
+            for future in (leader, follower):
+                with self.assertRaises(RuntimeError):
+                    future.result()
+
+    def test_sequential_calls_are_not_coalesced(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do("key", lambda: 1), 1)
+        self.assertEqual(flight.do("key", lambda: 2), 2)
+
+    def test_async_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return ["541330"]
+
+        async def run():
+            return await asyncio.gather(*(flight.do_async("key", slow) for _ in range(5)))
+
+        results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r == ["541330"] for r in results))
+
+    def test_follower_waits_at_most_until_its_own_deadline(self):
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def leader():
+            started.set()
+            time.sleep(0.5)
+            return {"value": 42}
+
+        def follower():
+            with deadline_scope(Deadline(0.05)):
+                began = time.monotonic()
+                result = flight.do("key", lambda: {"error": "Deadline exceeded", "deadline_exceeded": True})
+                return result, time.monotonic() - began
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            first = pool.submit(flight.do, "key", leader)
+            started.wait()
+            result, waited = pool.submit(follower).result()
+            self.assertEqual(first.result(), {"value": 42})
+
+        self.assertTrue(result["deadline_exceeded"])
+        self.assertLess(waited, 0.3)
+        self.assertEqual(flight.coalesced, 0)
+
+    def test_leader_deadline_errors_are_not_shared(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        calls = []
+
+        def leader():
+            started.set()
+            time.sleep(0.1)
+            return {"error": "Deadline exceeded", "status_code": 408, "deadline_exceeded": True}
+
+        def own_call():
+            calls.append(1)
+            return {"value": 42}
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            first = pool.submit(flight.do, "key", leader, is_shareable)
+            started.wait()
+            second = pool.submit(flight.do, "key", own_call, is_shareable)
+            self.assertTrue(first.result()["deadline_exceeded"])
+            self.assertEqual(second.result(), {"value": 42})
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(flight.coalesced, 0)
+
+    def test_async_follower_waits_at_most_until_its_own_deadline(self):
+        flight = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.5)
+            return {"value": 42}
+
+        async def expired():
+            return {"error": "Deadline exceeded", "deadline_exceeded": True}
+
+        async def run():
+            leader_task = asyncio.create_task(flight.do_async("key", slow, is_shareable))
+            await asyncio.sleep(0)
+            began = time.monotonic()
+            with deadline_scope(Deadline(0.05)):
+                result = await flight.do_async("key", expired, is_shareable)
+            waited = time.monotonic() - began
+            await leader_task
+            return result, waited
+
+        result, waited = asyncio.run(run())
+        self.assertTrue(result["deadline_exceeded"])
+        self.assertLess(waited, 0.3)
+        self.assertEqual(flight.coalesced, 0)
+
+    def test_execute_query_coalesces_identical_payloads(self):
+        """Test that rows for the same company in flight together make one request"""
+        def post(*args, **kwargs):
+            time.sleep(0.2)
+            response = Mock(headers={})
+            response.json.return_value = completion("541330")
+            return response
+
+        session = Mock()
+        session.post.side_effect = post
+        api = PerplexityNAICSCodeAPI("test_key")
+
+        with patch.object(ThreadedPerplexitySonarAPI, "session_pool", new_callable=PropertyMock, return_value=SessionPool(lambda: session)):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(
+                    lambda _: api.call(company_name="WSP USA Inc.", city="Briarcliff Manor", state="NY"),
+                    range(4)
+                ))
+
+        self.assertEqual(session.post.call_count, 1)
+        self.assertEqual(results, ["541330"] * 4)
+
+    def test_impatient_follower_is_not_recorded_as_a_failed_request(self):
+        """Test that a follower out of time answers 408 without the breaker, metrics or usage seeing a request"""
+        def post(*args, **kwargs):
+            time.sleep(0.3)
+            response = Mock(headers={})
+            response.json.return_value = completion("541330")
+            return response
+
+        session = Mock()
+        session.post.side_effect = post
+        breaker = CircuitBreaker("perplexity", failure_threshold=1)
+        api = ThreadedPerplexitySonarAPI("test_key")
+        timeouts = lambda: registry.value("masontilutils_requests_total", api="ThreadedPerplexitySonarAPI", status="408")
+
+        def follower():
+            with deadline_scope(Deadline(0.05)), collect_usage() as usage:
+                return api.execute_query(messages=[{"role": "user", "content": "impatient"}]), usage
+
+        before = timeouts()
+        with patch.object(ThreadedPerplexitySonarAPI, "session_pool", new_callable=PropertyMock, return_value=SessionPool(lambda: session)), \
+                patch.object(ThreadedPerplexitySonarAPI, "circuit_breaker", new_callable=PropertyMock, return_value=breaker), \
+                patch.object(ThreadedPerplexitySonarAPI, "rate_limiter", new_callable=PropertyMock, return_value=RateLimiter("perplexity")):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                leader = pool.submit(api.execute_query, messages=[{"role": "user", "content": "impatient"}])
+                time.sleep(0.05)
+                result, usage = pool.submit(follower).result()
+                self.assertNotIn("error", leader.result())
+
+        self.assertTrue(result["deadline_exceeded"])
+        self.assertEqual(usage.errors, 0)
+        self.assertEqual(timeouts(), before)
+        self.assertEqual(session.post.call_count, 1)
+        self.assertEqual(breaker._failures, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
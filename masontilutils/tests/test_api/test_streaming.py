@@ -0,0 +1,141 @@
+import json
+import unittest
+from unittest.mock import Mock, patch, PropertyMock
+
+import httpx
+
+from masontilutils.api.pool import SessionPool
+from masontilutils.api.perplexity import ThreadedPerplexitySonarAPI, PerplexityExecutiveAPI
+from masontilutils.api.streaming import StreamedAnswer
+from masontilutils.api.usage import collect_usage
+
+EXECUTIVE_JSON = '{"1": {"name": "Jane Doe", "role": "CEO {founder}", "sources": ["https://example.com"]}}'
+
+
+def sse_lines(*chunks: str, usage: dict | None = None) -> list:
+    lines = [f"data: {json.dumps({'choices': [{'delta': {'content': chunk}}]})}" for chunk in chunks]
+    if usage:
+        lines.append(f"data: {json.dumps({'choices': [], 'usage': usage})}")
+    return lines + ["data: [DONE]"]
+
+
+class TestStreamedAnswer(unittest.TestCase):
+    def test_think_sections_are_dropped_across_chunk_boundaries(self):
+        answer = StreamedAnswer()
+        for chunk in ["<thi", "nk>searching for the None owner", " of the company</th", "ink>\n", "Result"]:
+            answer.feed(chunk)
+        self.assertEqual(answer.result()["choices"][0]["message"]["content"], "Result")
+
+    def test_completes_on_first_json_object(self):
+        """Test that the answer is complete once the top-level object closes"""
+        answer = StreamedAnswer()
+        self.assertFalse(answer.feed("<think>{draft}</think>```json\n" + EXECUTIVE_JSON[:30]))
+        self.assertTrue(answer.feed(EXECUTIVE_JSON[30:] + "\n```\nextra text"))
+        content = answer.result()["choices"][0]["message"]["content"]
+        self.assertEqual(json.loads(content[content.index("{"):]), json.loads(EXECUTIVE_JSON))
+
+    def test_stop_markers_outside_json(self):
+        answer = StreamedAnswer(stop_markers=["company_publically_traded"])
+        self.assertFalse(answer.feed("<think>is it company_publically_traded?</think>company_publ"))
+        self.assertFalse(answer.feed("ically_traded"))
+        self.assertTrue(answer.feed("\nSources: ..."))
+
+    def test_stop_markers_must_stand_alone(self):
+        for prose in ("None of the sources list an owner.\n", "Nonetheless, the filings show\n", "It is None\n"):
+            answer = StreamedAnswer(stop_markers=["None"])
+            self.assertFalse(answer.feed(prose), prose)
+        for line in ("None\n", "**None**\n", "`None`.\r\n"):
+            answer = StreamedAnswer(stop_markers=["None"])
+            self.assertFalse(answer.feed("Research notes\n" + line[:2]))
+            self.assertTrue(answer.feed(line[2:]), line)
+
+    def test_stop_markers_inside_json_are_ignored(self):
+        answer = StreamedAnswer(stop_markers=["None"])
+        self.assertFalse(answer.feed('{"1": {"name": "None'))
+        self.assertTrue(answer.feed('", "role": "Owner"}}'))
+
+    def test_usage_and_done(self):
+        answer = StreamedAnswer()
+        for line in sse_lines("plain answer", usage={"total_tokens": 42}):
+            if answer.feed_line(line):
+                break
+        result = answer.result()
+        self.assertEqual(result["usage"], {"total_tokens": 42})
+        self.assertFalse(result["stream_stopped_early"])
+
+
+class TestExecutiveStreaming(unittest.TestCase):
+    def test_stream_is_closed_after_the_answer(self):
+        """Test that the executive lookup stops reading once the JSON object is complete"""
+        consumed = []
+
+        def iter_lines():
+            for line in sse_lines("<think>long research", " notes</think>", EXECUTIVE_JSON, "trailing", "more"):
+                consumed.append(line)
+                yield line.encode("utf-8")
+
+        response = Mock(headers={}, ok=True)
+        response.iter_lines.side_effect = iter_lines
+        session = Mock()
+        session.post.return_value = response
+
+        api = PerplexityExecutiveAPI("test_key", stream=True)
+        with patch.object(ThreadedPerplexitySonarAPI, "session_pool", new_callable=PropertyMock, return_value=SessionPool(lambda: session)):
+            result = api.call("Acme LLC", "Austin", "TX", "1 Main St")
+
+        self.assertEqual([e.name for e in result.executives], ["Jane Doe"])
+        self.assertEqual(len(consumed), 3)
+        response.close.assert_called_once()
+        self.assertTrue(session.post.call_args.kwargs["stream"])
+        self.assertTrue(session.post.call_args.kwargs["json"]["stream"])
+
+    def test_stream_closed_early_still_counts_usage(self):
+        lines = sse_lines("<think>notes</think>", "None\n", "Sources: the state registry lists no officers",
+                          usage={"prompt_tokens": 90, "completion_tokens": 900, "total_tokens": 990})
+        response = Mock(headers={}, ok=True)
+        response.iter_lines.return_value = iter(line.encode("utf-8") for line in lines)
+        session = Mock()
+        session.post.return_value = response
+
+        api = PerplexityExecutiveAPI("test_key")
+        with patch.object(ThreadedPerplexitySonarAPI, "session_pool", new_callable=PropertyMock, return_value=SessionPool(lambda: session)), \
+                collect_usage() as usage:
+            result = api.call("Acme Corp", "Austin", "TX", "1 Main St", stream=True)
+
+        self.assertTrue(result.is_none)
+        self.assertEqual(usage.requests, 1)
+        self.assertEqual(usage.completion_tokens, 1000)  # The payload's max_tokens
+        self.assertGreater(usage.prompt_tokens, 0)
+
+    def test_publicly_traded_sentinel(self):
+        response = Mock(headers={}, ok=True)
+        response.iter_lines.return_value = iter(
+            line.encode("utf-8") for line in sse_lines("<think>...</think>", "company_publically_traded")
+        )
+        session = Mock()
+        session.post.return_value = response
+
+        api = PerplexityExecutiveAPI("test_key")
+        with patch.object(ThreadedPerplexitySonarAPI, "session_pool", new_callable=PropertyMock, return_value=SessionPool(lambda: session)):
+            result = api.call("Acme Corp", "Austin", "TX", "1 Main St", stream=True)
+
+        self.assertTrue(result.is_publicly_traded)
+
+
+class TestExecutiveStreamingAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_call_async_streams(self):
+        body = "\n\n".join(sse_lines("<think>notes</think>", EXECUTIVE_JSON)) + "\n\n"
+        client = httpx.AsyncClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=body.encode("utf-8"),
+                                           headers={"content-type": "text/event-stream"})
+        ))
+
+        api = PerplexityExecutiveAPI("test_key")
+        with patch.object(PerplexityExecutiveAPI, "_get_async_client", return_value=client):
+            result = await api.call_async("Acme LLC", "Austin", "TX", "1 Main St", stream=True)
+
+        self.assertEqual([e.role for e in result.executives], ["CEO {founder}"])
+
+
+if __name__ == '__main__':
+    unittest.main()
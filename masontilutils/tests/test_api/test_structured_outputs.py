@@ -0,0 +1,73 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from masontilutils.api.chatgpt import ChatGPTEthGenAPI, ChatGPTGenderAPI, ChatGPTIndustryClassificationAPI
+from masontilutils.api.queries.enums import Ethnicity, Sex
+from masontilutils.api.queries.ethgen import ETHGEN_JSON_SCHEMA, GENDER_JSON_SCHEMA
+from masontilutils.api.queries.industry import INDUSTRY_CLASSIFICATION_JSON_SCHEMA
+
+from helpers import completion
+
+
+class TestStructuredOutputs(unittest.TestCase):
+    def assert_strict(self, schema: dict):
+        """Strict structured outputs need closed objects with every property required"""
+        if schema.get("type") == "object":
+            self.assertFalse(schema["additionalProperties"])
+            self.assertEqual(set(schema["required"]), set(schema["properties"]))
+            for child in schema["properties"].values():
+                self.assert_strict(child)
+
+    def test_schemas_are_strict(self):
+        for schema in (ETHGEN_JSON_SCHEMA, GENDER_JSON_SCHEMA, INDUSTRY_CLASSIFICATION_JSON_SCHEMA):
+            self.assert_strict(schema)
+
+    def test_ethgen_sends_schema_and_parses_answer(self):
+        api = ChatGPTEthGenAPI("test_key", structured_outputs=True)
+        answer = json.dumps({"sex": "Female", "region": "East Asia"})
+
+        with patch.object(ChatGPTEthGenAPI, "execute_query", return_value=completion(answer)) as query:
+            result = api.call("https://example.com/face.jpg")
+
+        response_format = query.call_args.kwargs["response_format"]
+        self.assertEqual(response_format["type"], "json_schema")
+        self.assertTrue(response_format["json_schema"]["strict"])
+        self.assertEqual(response_format["json_schema"]["schema"], ETHGEN_JSON_SCHEMA)
+        self.assertEqual(result.ethnicity, Ethnicity.EAST_ASIA.value)
+        self.assertEqual(result.sex, Sex.FEMALE.value)
+
+    def test_text_mode_is_unchanged(self):
+        api = ChatGPTEthGenAPI("test_key")
+        with patch.object(ChatGPTEthGenAPI, "execute_query",
+                          return_value=completion('Sure! {"sex": "Male", "region": "Europe"}')) as query:
+            result = api.call("https://example.com/face.jpg")
+
+        self.assertEqual(query.call_args.kwargs["response_format"], {"type": "text"})
+        self.assertEqual(result.ethnicity, Ethnicity.EUROPE.value)
+
+    def test_gender_null_means_unknown(self):
+        api = ChatGPTGenderAPI("test_key", structured_outputs=True)
+        with patch.object(ChatGPTGenderAPI, "execute_query", return_value=completion('{"sex": null}')):
+            result = api.call("J. Ross")
+
+        self.assertIsNotNone(result)
+        self.assertIsNone(result.sex)
+
+    def test_industry_drops_empty_slots(self):
+        api = ChatGPTIndustryClassificationAPI("test_key", structured_outputs=True)
+        empty = {"NAICS": None, "NAICS_Definition": None, "industry_code": None}
+        answer = json.dumps({
+            "1": {"NAICS": "541310", "NAICS_Definition": "Architectural services", "industry_code": "A"},
+            "2": empty,
+            "3": empty,
+        })
+        with patch.object(ChatGPTIndustryClassificationAPI, "execute_query", return_value=completion(answer)) as query:
+            result = api.call("An architecture firm")
+
+        self.assertEqual(query.call_args.kwargs["response_format"]["json_schema"]["name"], "industry_classification")
+        self.assertEqual([d["NAICS"] for d in result], ["541310"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import time
+import unittest
+from pathlib import Path
+from typing import Callable, List
+
+from masontilutils.api.chatgpt import ChatGPTEthGenAPI, ChatGPTGenderAPI, ChatGPTIndustryClassificationAPI
+from masontilutils.api.hedging import LatencyTracker
+from masontilutils.api.metrics import registry
+
+NAMES = [
+    "Brad Beneski", "Jay Silver", "Ryan L Condon", "Victor Jimenez", "Anand Deshmukh",
+    "Hamid Rastega", "Ayad Jaber", "Vivian E. Norman", "Geraldine Jones", "Evguenia Vatchkova",
+    "J. Ross", "Bill",
+]
+
+DESCRIPTIONS = [
+    "Cornerstone Architectural Group, LLC is a full-service architectural firm based in South Plainfield, NJ, "
+    "specializing in civic, commercial, industrial, institutional, and public sector projects.",
+    "Cleveland Auto & Tire Co., Inc. in Elizabeth, NJ, operates as a full-service automotive facility specializing "
+    "in tire sales and comprehensive vehicle maintenance.",
+    "DPM Technology Solutions LLC is a technology consulting firm based in Old Tappan, New Jersey, specializing in "
+    "the implementation and customization of cloud-based business solutions.",
+]
+
+
+class TestStructuredOutputsBenchmark(unittest.TestCase):
+    """
+    Live comparison of the text + parse_json path against strict JSON
+    schema answers: parse failures and latency per API. Prints a table and checks
+    that structured answers never fail to parse.
+    """
+    rounds = 2
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test environment before running tests"""
+        cls.api_key = os.getenv('CHATGPT_API_KEY')
+        if not cls.api_key:
+            raise ValueError("CHATGPT_API_KEY environment variable not set")
+
+        cls.images = sorted((Path(__file__).parent / 'test_images').glob('*.jpg'))
+
+    def run_mode(self, api, call: Callable, inputs: List) -> dict:
+        name = type(api).__name__
+        failures_before = registry.value("masontilutils_parse_failures_total", api=name)
+        latency = LatencyTracker(window=len(inputs) * self.rounds)
+        empty = 0
+        for _ in range(self.rounds):
+            for value in inputs:
+                started = time.monotonic()
+                if call(api, value) is None:
+                    empty += 1
+                latency.record(time.monotonic() - started)
+        return {
+            "calls": len(inputs) * self.rounds,
+            "parse_failures": registry.value("masontilutils_parse_failures_total", api=name) - failures_before,
+            "empty": empty,
+            "p50": latency.quantile(0.5),
+            "p95": latency.quantile(0.95),
+        }
+
+    def test_parse_failures_and_latency(self):
+        cases = [
+            ("gender", ChatGPTGenderAPI, lambda api, name: api.call(name), NAMES),
+            ("industry", ChatGPTIndustryClassificationAPI, lambda api, text: api.call(text), DESCRIPTIONS),
+            ("ethgen", ChatGPTEthGenAPI, lambda api, path: api.call(str(path), parse_url=False), self.images),
+        ]
+
+        print(f"\n{'api':<10}{'mode':<12}{'calls':>6}{'parse fail':>12}{'None':>6}{'p50 s':>8}{'p95 s':>8}")
+        for label, api_class, call, inputs in cases:
+            if not inputs:
+                continue
+            for mode, structured in (("text", False), ("structured", True)):
+                stats = self.run_mode(api_class(self.api_key, structured_outputs=structured), call, inputs)
+                print(f"{label:<10}{mode:<12}{stats['calls']:>6}{stats['parse_failures']:>12.0f}{stats['empty']:>6}"
+                      f"{stats['p50']:>8.2f}{stats['p95']:>8.2f}")
+                if structured:
+                    self.assertEqual(stats["parse_failures"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
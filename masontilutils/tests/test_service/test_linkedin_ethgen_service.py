@@ -1,4 +1,5 @@
 import os
+import time
 import unittest
 from unittest.mock import Mock, patch, MagicMock
 from pathlib import Path
@@ -8,6 +9,8 @@ from masontilutils.service.ethgen.linkedin_ethgen_service import (
     LinkedInEthGenResponse, 
     ServiceExecutiveInfo
 )
+from masontilutils.api.deadline import Deadline
+from masontilutils.api.ledger import BudgetExceededError, CostLedger
 from masontilutils.api.responses.ethgen.ethgen import EthGenResponse, GenderResponse
 from masontilutils.api.responses.executive.executive import ExecutiveResponse, ExecutiveInfo
 from masontilutils.api.queries.enums import Ethnicity, Sex
@@ -120,7 +123,7 @@ class TestLinkedInEthGenService(unittest.TestCase):
 
         result = self.service.get_linkedin("John Doe", "Test Company")
 
-        self.mock_ddg_api.call.assert_called_once_with(name="John Doe", company_name="Test Company")
+        self.mock_ddg_api.call.assert_called_once_with(name="John Doe", company_name="Test Company", deadline=None)
         self.assertEqual(result, expected_url)
 
     def test_call_publicly_traded_company(self):
@@ -219,6 +222,29 @@ class TestLinkedInEthGenService(unittest.TestCase):
         self.assertEqual(result.ethnicity, Ethnicity.EUROPE.value)
         self.assertEqual(result.gender, Sex.MALE.value)
 
+    def test_call_passes_prefetched_picture_to_ethgen(self):
+        """Test that profile pictures are prefetched during the browser pass and handed to EthGen"""
+        self.mock_executive_api.call.return_value = ExecutiveResponse(
+            executives=[ExecutiveInfo(name="John Doe", role="CEO", sources=["source1"])],
+            is_publicly_traded=False,
+            is_none=False
+        )
+        self.mock_ddg_api.call.return_value = "https://www.linkedin.com/in/johndoe"
+        picture_url = "https://media.licdn.com/dms/image/johndoe.jpg"
+        self.mock_browser.get_profile_picture_from_url.return_value = picture_url
+        self.mock_ethgen_api.call.return_value = EthGenResponse(
+            ethnicity=Ethnicity.EUROPE.value,
+            sex=Sex.MALE.value
+        )
+        self.service.image_prefetcher = Mock()
+        self.service.image_prefetcher.get.return_value = b"jpeg bytes"
+
+        result = self.service.call("Test Company", "Test City", "TX", "Test Address")
+
+        self.assertEqual(result.ethnicity, Ethnicity.EUROPE.value)
+        self.service.image_prefetcher.prefetch.assert_called_once_with(picture_url, None)
+        self.mock_ethgen_api.call.assert_called_once_with(picture_url, deadline=None, image_data=b"jpeg bytes")
+
     def test_call_single_executive_no_linkedin(self):
         """Test handling of single executive with no LinkedIn profile found"""
         # Mock executive response
@@ -299,7 +325,7 @@ class TestLinkedInEthGenService(unittest.TestCase):
         executive = result.executives[0]
         self.assertEqual(executive.ethnicity, "")
         self.assertEqual(executive.gender, Sex.MALE.value)
-        self.mock_gender_api.call.assert_called_once_with("John Doe")
+        self.mock_gender_api.call.assert_called_once_with("John Doe", deadline=None)
 
     def test_call_single_executive_all_apis_fail(self):
         """Test when both ethnicity and gender APIs fail"""
@@ -516,6 +542,42 @@ class TestLinkedInEthGenService(unittest.TestCase):
         self.assertFalse(response.multiple_genders)
         self.assertFalse(response.is_publicly_traded)
 
+    def test_call_deadline_returns_partial_results(self):
+        """Test that executives left when the deadline runs out are skipped"""
+        executive_response = ExecutiveResponse(
+            executives=[
+                ExecutiveInfo(name="John Doe", role="CEO", sources=["source1"]),
+                ExecutiveInfo(name="Jane Doe", role="COO", sources=["source1"]),
+            ],
+            is_publicly_traded=False,
+            is_none=False
+        )
+
+        def slow_executive_call(**kwargs):
+            time.sleep(0.1)
+            return executive_response
+
+        self.mock_executive_api.call.side_effect = slow_executive_call
+        deadline = Deadline(0.05)
+
+        result = self.service.call("Test Company", "Test City", "TX", "Test Address", deadline=deadline)
+
+        self.assertIs(self.mock_executive_api.call.call_args.kwargs["deadline"], deadline)
+        self.assertTrue(result.deadline_exceeded)
+        self.assertTrue(result.executive_found)
+        self.assertEqual(len(result.executives), 2)
+        self.mock_ddg_api.call.assert_not_called()
+        self.mock_gender_api.call.assert_not_called()
+
+    def test_call_stops_once_budget_is_spent(self):
+        """Test that a spent cost ledger budget stops the batch before any API call"""
+        self.service.ledger = CostLedger(budget=1.0)
+        self.service.ledger.record("earlier-request", "PerplexityExecutiveAPI", "sonar-pro", {"prompt_tokens": 1_000_000})
+
+        with self.assertRaises(BudgetExceededError):
+            self.service.call("Test Company", "Test City", "TX", "Test Address")
+        self.mock_executive_api.call.assert_not_called()
+
     def test_close_method(self):
         """Test the close method"""
         self.service.browser = Mock()
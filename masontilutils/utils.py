@@ -11,12 +11,35 @@ def create_shared_data():
     })
     return shared_data
 
+def create_shared_rate_limits(limits=None):
+    """
+    Create rate limiter state shared by all worker processes. Pass the returned
+    object to each worker as a Process argument (like the dict from
+    create_shared_data) and call its install() at worker start-up, so that
+    all processes draw from the same per-provider quota.
+
+    :param limits: {provider: {"requests_per_minute": ..., "tokens_per_minute": ...}}, defaults to DEFAULT_RATE_LIMITS
+    """
+    from masontilutils.api.ratelimit import SharedRateLimitState
+    return SharedRateLimitState(limits)
+
 def create_query(query: str, **kwargs):
     return query.format(**kwargs)
 
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+_THINK_CLOSE = re.compile(r'</think>\s*')
+_CITATION = re.compile(r'\[\s*\d+\s*\]')
+# End of a chunk that may still become a citation or a <think> tag with the next chunk
+_PARTIAL_TAIL = re.compile(r'(?:\[\s*\d*\s*|<(?:t(?:h(?:i(?:n(?:k)?)?)?)?)?)\Z')
+
 def clean_deep_research_text(text):
     """
     Remove both <think> tags and source citations from text.
+
+    Single pass: <think> blocks are skipped with str.find instead of a lazy regex, and
+    citations are only removed from the text outside of them.
     
     Args:
         text (str): Input text containing tags to be removed
@@ -24,48 +47,111 @@ def clean_deep_research_text(text):
     Returns:
         str: Cleaned text with all specified tags removed
     """
-    # Remove <think> tags and surrounding whitespace
-    text = re.sub(r'\s*<think>.*?</think>\s*', '', text, flags=re.DOTALL)
-    
-    # Remove source citations [1], [2], etc. (including optional whitespace inside brackets)
-    text = re.sub(r'\[\s*\d+\s*\]', '', text)
-    
-    return text.strip()
+    parts = []
+    pos = 0
+    while True:
+        # <think> tags and surrounding whitespace
+        start = text.find(THINK_OPEN, pos)
+        if start == -1:
+            break
+        end = text.find(THINK_CLOSE, start + len(THINK_OPEN))
+        if end == -1:
+            break
+        before = start
+        while before > pos and text[before - 1].isspace():
+            before -= 1
+        # Source citations [1], [2], etc. (including optional whitespace inside brackets)
+        parts.append(_CITATION.sub('', text[pos:before]))
+        pos = _THINK_CLOSE.match(text, end).end()
+    parts.append(_CITATION.sub('', text[pos:]))
 
-def extract_json_substring(text: str) -> str:
-    """Extract a JSON substring starting from the first '{' or '[' character.
+    return ''.join(parts).strip()
+
+class DeepResearchTextCleaner:
+    """
+    Chunked counterpart of clean_deep_research_text for filtering a streamed answer
+    without building the full string. feed() returns the cleaned text that is final so
+    far, holding back a tail that may still turn into a tag or citation; close()
+    returns the rest. feed() + ... + close() equals clean_deep_research_text on the
+    whole text, except that an unterminated <think> block is dropped rather than kept.
+
+        cleaner = DeepResearchTextCleaner()
+        for chunk in chunks:
+            out.write(cleaner.feed(chunk))
+        out.write(cleaner.close())
     """
-    start_idx = -1
-    for i, char in enumerate(text):
-        if char in '{[':
-            start_idx = i
+
+    def __init__(self):
+        self._pending = ""  # Raw tail held back until the next chunk
+        self._space = ""  # Cleaned trailing whitespace, dropped if nothing follows it
+        self._in_think = False
+        self._skip_space = True  # Whitespace after </think> is removed with the tag
+        self._started = False
+
+    def feed(self, chunk: str) -> str:
+        buffer = self._pending + chunk
+        self._pending = ""
+        out = []
+
+        while buffer:
+            if self._in_think:
+                end = buffer.find(THINK_CLOSE)
+                if end == -1:
+                    self._pending = buffer[-(len(THINK_CLOSE) - 1):]
+                    break
+                buffer = buffer[end + len(THINK_CLOSE):]
+                self._in_think = False
+                self._skip_space = True
+                continue
+
+            if self._skip_space:
+                buffer = buffer.lstrip()
+                if not buffer:
+                    break
+                self._skip_space = False
+
+            start = buffer.find(THINK_OPEN)
+            if start != -1:
+                self._emit(out, buffer[:start].rstrip())
+                buffer = buffer[start + len(THINK_OPEN):]
+                self._in_think = True
+                continue
+
+            # Trailing whitespace may precede a <think> tag and is removed with it
+            visible = buffer.rstrip()
+            partial = _PARTIAL_TAIL.search(visible, max(len(visible) - 32, 0))
+            cut = len(visible[:partial.start()].rstrip()) if partial else len(visible)
+            self._emit(out, buffer[:cut])
+            self._pending = buffer[cut:]
             break
-    
-    if start_idx == -1:
+
+        return ''.join(out)
+
+    def close(self) -> str:
+        out = []
+        if not self._in_think and not self._skip_space:
+            self._emit(out, self._pending)
+        self._pending = ""
+        return ''.join(out)
+
+    def _emit(self, out: list, text: str):
+        text = self._space + _CITATION.sub('', text)
+        if not self._started:
+            text = text.lstrip()
+        stripped = text.rstrip()
+        self._space = text[len(stripped):]
+        if stripped:
+            self._started = True
+            out.append(stripped)
+
+def extract_json_substring(text: str) -> str:
+    """Extract the first JSON object or array in text, "" if there is none.
+    Tolerates single-quoted, Python literal and trailing-comma output, see
+    masontilutils.api.llm_json.find_json; use parse_json there for the parsed value.
+    """
+    from masontilutils.api.llm_json import find_json
+    found = find_json(text)
+    if found is None:
         return ""
-        
-    # Track nested brackets to find the matching end bracket
-    stack = []
-    for i in range(start_idx, len(text)):
-        char = text[i]
-        if char in '{[':
-            stack.append(char)
-        elif char in '}]':
-            if not stack:
-                continue
-            if (char == '}' and stack[-1] == '{') or (char == ']' and stack[-1] == '['):
-                stack.pop()
-                if not stack:  # Found matching end bracket
-                    json_str = text[start_idx:i+1]
-                    
-                    # Handle double brace edge case: {{...}}
-                    if json_str.startswith('{{') and json_str.endswith('}}'):
-                        # Extract inner JSON by removing outer braces
-                        inner_json = json_str[1:-1]
-                        # Verify it's valid JSON by checking it starts and ends with braces/brackets
-                        if (inner_json.startswith('{') and inner_json.endswith('}')) or \
-                           (inner_json.startswith('[') and inner_json.endswith(']')):
-                            return inner_json
-                    
-                    return json_str
-    return ""
\ No newline at end of file
+    _, start, end = found
+    return text[start:end]